@@ -5,21 +5,34 @@ macOS特化的FastAPI依赖项
 from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.security import verify_token
+from app.core.database import get_async_db
+from app.core.security import verify_token, Principal, principal_cache
 from app.models.user import User
 from app.schemas.user import TokenData
 
 # HTTP Bearer认证
 security = HTTPBearer(auto_error=False)
 
-async def get_current_user(
+async def _load_principal(db: AsyncSession, username: str) -> Optional[Principal]:
+    """从数据库读取调用者（只取鉴权字段）"""
+    row = (await db.execute(
+        select(User.id, User.username, User.role, User.is_active).where(User.username == username)
+    )).first()
+    if row is None:
+        return None
+    return Principal(id=row.id, username=row.username, role=row.role, is_active=row.is_active)
+
+async def get_current_principal(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """获取当前用户"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """
+    获取当前调用者（短TTL缓存，命中时不查询数据库）
+    只需要id和角色的路由使用它
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="无效的认证凭证",
@@ -34,18 +47,34 @@ async def get_current_user(
     if token_data is None:
         raise credentials_exception
     
-    # 查询用户
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
+    principal = await principal_cache.get_or_load_async(
+        token_data.username, lambda: _load_principal(db, token_data.username)
+    )
+    if principal is None:
         raise credentials_exception
     
     # 检查用户状态
-    if not user.is_active:
+    if not principal.is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="用户已被禁用"
         )
     
+    return principal
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    """获取当前用户（完整的User对象，用于需要读写用户资料的路由）"""
+    user = await db.get(User, principal.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="无效的认证凭证",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
     return user
 
 async def get_current_active_user(
@@ -60,8 +89,8 @@ async def get_current_active_user(
     return current_user
 
 async def get_current_admin_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
     """获取当前管理员用户"""
     if not current_user.is_admin:
         raise HTTPException(
@@ -71,8 +100,8 @@ async def get_current_admin_user(
     return current_user
 
 async def get_current_teacher_or_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_principal)
+) -> Principal:
     """获取当前老师或管理员"""
     if not (current_user.is_teacher or current_user.is_admin):
         raise HTTPException(
@@ -83,9 +112,9 @@ async def get_current_teacher_or_admin(
 
 async def optional_current_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    db: Session = Depends(get_db)
-) -> Optional[User]:
-    """可选的当前用户（未登录返回None）"""
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[Principal]:
+    """可选的当前调用者（未登录返回None）"""
     if credentials is None:
         return None
     
@@ -94,10 +123,12 @@ async def optional_current_user(
         if token_data is None:
             return None
         
-        user = db.query(User).filter(User.username == token_data.username).first()
-        if user and user.is_active:
-            return user
+        principal = await principal_cache.get_or_load_async(
+            token_data.username, lambda: _load_principal(db, token_data.username)
+        )
+        if principal and principal.is_active:
+            return principal
         return None
         
     except Exception:
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,43 @@
+"""
+HTTP条件请求（ETag / If-None-Match）工具
+"""
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response, status
+
+# 客户端每次使用前都需重新验证（命中时只返回304，不传输响应体）
+CACHE_CONTROL = "private, no-cache"
+
+def make_etag(*parts: Any) -> str:
+    """
+    根据版本信息生成弱ETag
+    版本只随题目内容、发布状态和知识点关联变化；响应中的答题计数（total_attempts等）
+    由写缓冲批量累加，不改变版本，命中304时客户端持有的计数可能滞后，因此不是逐字节一致的强ETag
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match是否命中（按RFC 7232，If-None-Match使用弱比较）"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = {
+        tag.strip().removeprefix("W/")
+        for tag in header.split(",")
+    }
+    return etag.removeprefix("W/") in candidates
+
+def not_modified(etag: str) -> Response:
+    """304响应（不序列化响应体）"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+    )
+
+def set_etag(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
@@ -2,17 +2,17 @@
 用户认证API路由
 注册、登录、令牌刷新等
 """
-from datetime import timedelta
-from typing import Any
+from datetime import datetime, timedelta
+from typing import Any, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Body, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.database import get_db
-from app.core.security import create_access_token, verify_token
-from app.crud.user import (
-    create_user, authenticate_user, get_user_by_username,
+from app.core.database import get_async_db
+from app.core.security import create_access_token, verify_token, Principal
+from app.crud.async_user import (
+    create_user, authenticate_user, get_user_by_username, get_user_by_email,
     change_password as crud_change_password
 )
 from app.schemas.user import (
@@ -27,8 +27,8 @@ router = APIRouter()
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def register(
     user_in: UserCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(optional_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Optional[Principal] = Depends(optional_current_user)
 ):
     """
     注册新用户
@@ -48,7 +48,7 @@ async def register(
             )
     
     try:
-        user = create_user(db, user_in)
+        user = await create_user(db, user_in)
         return user
     except ValueError as e:
         raise HTTPException(
@@ -60,7 +60,7 @@ async def register(
 async def login(
     request: Request,
     login_json_data: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     用户登录
@@ -73,7 +73,7 @@ async def login(
 
     print(f"收到登录数据: username={login_json_data.username}, password={login_json_data.password}")
 
-    user = authenticate_user(db, login_json_data.username, login_json_data.password)
+    user = await authenticate_user(db, login_json_data.username, login_json_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -98,7 +98,7 @@ async def login(
     
     # 更新最后登录时间
     user.update_last_login()
-    db.commit()
+    await db.commit()
     
     return {
         "access_token": access_token,
@@ -109,7 +109,7 @@ async def login(
 @router.post("/login/json", response_model=Token)
 async def login_json(
     user_in: UserLogin,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     用户登录（JSON格式）
@@ -117,7 +117,7 @@ async def login_json(
     - **username**: 用户名
     - **password**: 密码
     """
-    user = authenticate_user(db, user_in.username, user_in.password)
+    user = await authenticate_user(db, user_in.username, user_in.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -142,7 +142,7 @@ async def login_json(
     
     # 更新最后登录时间
     user.update_last_login()
-    db.commit()
+    await db.commit()
     
     return {
         "access_token": access_token,
@@ -153,7 +153,7 @@ async def login_json(
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
     refresh_token: str = Body(..., embed=True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     刷新访问令牌
@@ -169,7 +169,7 @@ async def refresh_token(
         )
     
     # 获取用户
-    user = get_user_by_username(db, token_data.username)
+    user = await get_user_by_username(db, token_data.username)
     if not user or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -195,7 +195,7 @@ async def refresh_token(
 async def change_password(
     password_data: ChangePassword,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     修改密码
@@ -203,7 +203,7 @@ async def change_password(
     - **current_password**: 当前密码
     - **new_password**: 新密码
     """
-    success = crud_change_password(
+    success = await crud_change_password(
         db,
         current_user,
         password_data.current_password,
@@ -238,27 +238,27 @@ async def logout():
 @router.get("/check-username/{username}")
 async def check_username_available(
     username: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     检查用户名是否可用
     
     - **username**: 要检查的用户名
     """
-    user = get_user_by_username(db, username)
+    user = await get_user_by_username(db, username)
     return {"available": user is None}
 
 @router.get("/check-email/{email}")
 async def check_email_available(
     email: str,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     检查邮箱是否可用
     
     - **email**: 要检查的邮箱
     """
-    user = get_user_by_email(db, email)
+    user = await get_user_by_email(db, email)
     return {"available": user is None}
 
 @router.get("/health")
@@ -0,0 +1,83 @@
+"""
+知识点API路由
+只读接口由进程内的知识点树缓存提供，缓存有效期内不查询数据库
+"""
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_read_db
+from app.api.dependencies import get_current_principal
+from app.services.knowledge_tree import knowledge_tree
+from app.core.security import Principal
+
+router = APIRouter()
+
+@router.get("/", response_model=List[Dict[str, Any]])
+async def read_knowledge_tree(
+    root_id: Optional[int] = None,
+    max_depth: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    获取知识点树（嵌套结构）
+    
+    权限：需要登录
+    - **root_id**: 只返回以该知识点为根的子树（默认整棵树）
+    - **max_depth**: 最多展开的层数（默认全部）
+    """
+    tree = await knowledge_tree.snapshot_async(db)
+    if root_id is not None and tree.get(root_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="知识点不存在"
+        )
+    
+    return tree.nested(root_id, max_depth)
+
+@router.get("/{kp_id}", response_model=Dict[str, Any])
+async def read_knowledge_point(
+    kp_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    获取知识点详情（含祖先路径和直接子节点）
+    
+    权限：需要登录
+    """
+    tree = await knowledge_tree.snapshot_async(db)
+    node = tree.get(kp_id)
+    if node is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="知识点不存在"
+        )
+    
+    return {
+        **node,
+        "ancestors": tree.ancestors(kp_id),
+        "children": tree.children(kp_id),
+    }
+
+@router.get("/{kp_id}/descendants", response_model=List[Dict[str, Any]])
+async def read_knowledge_point_descendants(
+    kp_id: int,
+    include_self: bool = False,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    获取知识点的所有后代（先序排列）
+    
+    权限：需要登录
+    """
+    tree = await knowledge_tree.snapshot_async(db)
+    if tree.get(kp_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="知识点不存在"
+        )
+    
+    return tree.descendants(kp_id, include_self=include_self)
@@ -0,0 +1,211 @@
+"""
+练习和答题API路由
+"""
+import asyncio
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db, get_async_read_db, mark_write
+from app.api.dependencies import get_current_principal
+from app.crud import practice as crud
+from app.crud.async_problem import get_answer_key
+from app.schemas.practice import (
+    PracticeSessionCreate, PracticeSessionResponse, AnswerSubmit, AnswerResult, NextQuestionResponse
+)
+from app.services.answer_writer import answer_writer
+from app.services.practice_engine import practice_engine
+from app.core.security import Principal
+
+router = APIRouter()
+
+@router.post("/sessions", response_model=PracticeSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_practice_session(
+    session_create: PracticeSessionCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    创建练习会话
+    
+    权限：需要登录
+    - config.count大于0时按知识点、难度一次预选题单，之后通过 /next 逐题获取
+    """
+    try:
+        return await practice_engine.create_session(db, current_user.id, session_create)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/sessions/{session_id}", response_model=PracticeSessionResponse)
+async def read_practice_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    获取练习会话（只能查看自己的会话）
+    
+    权限：需要登录
+    """
+    db_session = await db.run_sync(crud.get_session, session_id)
+    if db_session is None or db_session.user_id != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="练习会话不存在"
+        )
+    
+    return db_session.to_dict()
+
+async def _get_own_session(session_id: int, user_id: int):
+    """读取进行中的会话题单（只能访问自己的会话）"""
+    payload = await practice_engine.get_session(session_id)
+    if payload is None or payload["user_id"] != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="练习会话不存在或已结束"
+        )
+    return payload
+
+@router.get("/sessions/{session_id}/next", response_model=NextQuestionResponse)
+async def read_next_question(
+    session_id: int,
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    获取下一题（题单做完时question为空）
+    
+    权限：需要登录
+    - 题单和进度从内存或Redis读取，题目为创建会话时预先序列化的JSON，不查询数据库
+    """
+    payload = await _get_own_session(session_id, current_user.id)
+    position = await practice_engine.position(session_id, payload)
+    practice_engine.touch(session_id, position)
+    
+    questions = payload["questions"]
+    question = questions[position] if position < len(questions) else "null"
+    return Response(
+        content=(
+            f'{{"session_id":{session_id},"position":{position},'
+            f'"total_questions":{len(questions)},"question":{question}}}'
+        ),
+        media_type="application/json"
+    )
+
+@router.post("/sessions/{session_id}/complete", response_model=PracticeSessionResponse)
+async def complete_practice_session(
+    session_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    结束练习会话（题单未做完时提前交卷），计算用时和正确率
+    
+    权限：需要登录
+    """
+    payload = await _get_own_session(session_id, current_user.id)
+    position = await practice_engine.position(session_id, payload)
+    db_session = await db.run_sync(crud.complete_session, session_id, current_user.id, position)
+    if db_session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="练习会话不存在或已结束"
+        )
+    
+    await asyncio.to_thread(practice_engine.forget, session_id)
+    return db_session.to_dict()
+
+@router.post("/sessions/{session_id}/answers", response_model=AnswerResult)
+async def submit_answer(
+    session_id: int,
+    answer: AnswerSubmit,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    提交答案
+    
+    权限：需要登录
+    - 按缓存的标准答案判分，写入完整的答题记录并累加会话计数（同一事务）
+    - 并发提交由后台合并为多行插入，响应在所在批次提交后返回
+    - 预选题单的会话按顺序作答：只接受当前题目，每题只接受一次提交，答完最后一题时自动完成会话
+    """
+    payload = await _get_own_session(session_id, current_user.id)
+    problem_ids = payload["problem_ids"]
+    
+    answer_key = await get_answer_key(db, answer.problem_id)
+    if answer_key is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="题目不存在"
+        )
+    
+    # 先占用题单位置再写入，跳题和重复提交不会产生答题记录、也不会累加会话计数
+    claimed = None
+    if problem_ids:
+        try:
+            claimed = await practice_engine.claim(session_id, payload, answer.problem_id)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=str(e)
+            )
+    
+    is_correct = crud.grade_answer(answer_key["correct_answer"], answer.user_answer)
+    pending = None
+    try:
+        pending = answer_writer.enqueue({
+            "session_id": session_id,
+            "problem_id": answer.problem_id,
+            "user_id": current_user.id,
+            "user_answer": answer.user_answer,
+            "is_correct": is_correct,
+            "confidence_level": answer.confidence_level,
+            "time_spent": answer.time_spent,
+            "first_response_time": answer.first_response_time,
+            "steps": answer.steps,
+            "answered_at": datetime.now(timezone.utc),
+            "knowledge_point_ids": answer_key["knowledge_point_ids"],
+        })
+        # 请求被取消时不取消排队中的写入
+        answer_id = await asyncio.shield(pending)
+    except BaseException as e:
+        if claimed is not None:
+            if pending is not None and isinstance(e, asyncio.CancelledError):
+                # 记录已排队，仍会写入：保留占用（否则重试会重复写入、重复计数），写入后由后台推进进度
+                practice_engine.advance_when_written(session_id, payload, claimed, pending)
+            else:
+                # 未写入（排队已满或写入失败）时释放位置，允许重新提交
+                await asyncio.to_thread(practice_engine.release, session_id, claimed)
+        raise
+    if answer_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="练习会话不存在或已结束"
+        )
+    
+    # 答题记录由写入队列的会话提交，本请求的调用者同样视为刚写过数据（读己之写）；
+    # mark_write只设置会话标记，响应发出前由read_your_writes中间件在线程中写入Redis，不阻塞事件循环
+    mark_write(db)
+    
+    # 进度在内存/Redis中推进，由会话引擎定期批量写回；题单答完时完成会话
+    position = None
+    completed = False
+    if claimed is not None:
+        position = await practice_engine.advance(session_id, payload, claimed)
+        if position >= len(problem_ids):
+            completed = await db.run_sync(
+                crud.complete_session, session_id, current_user.id, position
+            ) is not None
+            await asyncio.to_thread(practice_engine.forget, session_id)
+    
+    return {
+        "id": answer_id,
+        "session_id": session_id,
+        "problem_id": answer.problem_id,
+        "is_correct": is_correct,
+        "position": position,
+        "session_completed": completed,
+    }
@@ -2,95 +2,181 @@
 题目管理API路由
 """
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.api.dependencies import get_current_user, get_current_admin_user, get_current_teacher_or_admin
-from app.crud.problem import (
-    get_problem, get_problems, create_problem, update_problem,
+from app.core.database import get_async_db, get_async_read_db
+from app.api.dependencies import get_current_principal, get_current_admin_user, get_current_teacher_or_admin
+from app.crud.async_problem import (
+    get_problem, get_problem_detail_cached, get_problem_rows, create_problem, update_problem,
     delete_problem, publish_problem, get_problem_stats,
-    get_random_problems, search_problems
+    get_random_problems, search_problems, resolve_problem_sort, problem_exists,
+    get_problem_version, get_problem_collection_version, problem_version_tag
 )
+from app.crud.pagination import next_cursor
+from app.api.etag import make_etag, etag_matches, not_modified, set_etag
 from app.schemas.problem import (
     ProblemCreate, ProblemUpdate, ProblemResponse,
-    ProblemDetail, ProblemFilter, ProblemStats, PracticeProblem
+    ProblemDetail, ProblemFilter, ProblemStats, PracticeProblem,
+    ProblemImportResult, problem_list_adapter
 )
-from app.models.user import User
+from app.services.problem_import import import_problems_async, detect_format
+from app.services.attempt_buffer import attempt_buffer
+from app.core.security import Principal
 
 router = APIRouter()
 
+def _list_row(row) -> dict:
+    """列表结果行转字典（去掉仅用于游标的相关度列）"""
+    data = row._asdict()
+    data.pop("relevance", None)
+    return data
+
 @router.get("/", response_model=List[ProblemResponse])
 async def read_problems(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     difficulty: Optional[List[int]] = Query(None),
     source_type: Optional[str] = None,
     knowledge_point_id: Optional[int] = None,
+    knowledge_point_ids: Optional[List[int]] = Query(None),
+    kp_match: str = "any",
+    include_descendants: bool = True,
     search: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    sort_by: Optional[str] = None,
+    sort_order: str = "desc",
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取题目列表
     
     权限：需要登录
-    - **skip**: 跳过多少条记录（分页）
+    - **skip**: 跳过多少条记录（分页，旧方式）
     - **limit**: 返回多少条记录（分页）
+    - **cursor**: 分页游标（取自上一页响应头X-Next-Cursor，传入时忽略skip）
     - **difficulty**: 难度过滤（可以多个）
     - **source_type**: 来源类型过滤
-    - **knowledge_point_id**: 知识点ID过滤
+    - **knowledge_point_id**: 知识点ID过滤（默认包含子知识点）
+    - **knowledge_point_ids**: 多个知识点过滤（可与knowledge_point_id同时使用）
+    - **kp_match**: 多个知识点的匹配方式（any：任一，all：全部）
+    - **include_descendants**: 是否包含子知识点（默认是）
     - **search**: 搜索关键词
+    - **sort_by**: 排序字段（created_at, updated_at, difficulty, total_attempts, title, relevance），
+      默认有搜索词时按相关度，否则按created_at
+    - **sort_order**: 排序方向（asc, desc）
+    
+    支持条件请求：题目集合版本和查询条件都未变化时返回304（弱ETag，答题计数可能滞后）
     """
-    # 构建过滤条件
-    filter_params = ProblemFilter(
-        difficulty=difficulty,
-        source_type=source_type,
-        knowledge_point_id=knowledge_point_id,
-        search=search,
-        is_published=True  # 普通用户只能看到已发布的题目
+    try:
+        # 构建过滤条件
+        filter_params = ProblemFilter(
+            difficulty=difficulty,
+            source_type=source_type,
+            knowledge_point_id=knowledge_point_id,
+            knowledge_point_ids=knowledge_point_ids,
+            knowledge_point_match=kp_match,
+            include_descendants=include_descendants,
+            search=search,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            is_published=True  # 普通用户只能看到已发布的题目
+        )
+        
+        if current_user.is_admin or current_user.is_teacher:
+            # 管理员和老师可以看到所有题目（包括未发布的）
+            filter_params.is_published = None
+        
+        # 集合版本号 + 查询参数 + 可见范围 => ETag
+        collection_version = await get_problem_collection_version(db)
+        etag = None
+        if collection_version is not None:
+            etag = make_etag(
+                "problems",
+                collection_version,
+                filter_params.is_published,
+                sorted(request.query_params.multi_items())
+            )
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        
+        rows = await get_problem_rows(
+            db, skip=skip, limit=limit, filter_params=filter_params, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    # 快速输出：列元组直接序列化，跳过ORM对象和ProblemResponse的构造与校验
+    response = Response(
+        content=problem_list_adapter.dump_json([_list_row(row) for row in rows]),
+        media_type="application/json"
     )
     
-    if current_user.is_admin or current_user.is_teacher:
-        # 管理员和老师可以看到所有题目（包括未发布的）
-        filter_params.is_published = None
+    # 下一页游标通过响应头返回，响应体保持列表格式以兼容旧客户端
+    next_page = next_cursor(rows, limit, *resolve_problem_sort(filter_params))
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
+    if etag:
+        set_etag(response, etag)
     
-    problems = get_problems(db, skip=skip, limit=limit, filter_params=filter_params)
-    return problems
+    return response
 
 @router.get("/{problem_id}", response_model=ProblemDetail)
 async def read_problem(
     problem_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取题目详情
     
     权限：需要登录
     - **problem_id**: 题目ID
+    
+    支持条件请求：If-None-Match与ETag一致时返回304（弱ETag，答题计数可能滞后）
     """
-    problem = get_problem(db, problem_id)
-    if not problem:
+    # 先只读取版本信息，命中ETag时无需加载整行
+    version = await get_problem_version(db, problem_id)
+    if not version:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="题目不存在"
         )
     
     # 检查权限
-    if not problem.is_published and not (current_user.is_admin or current_user.is_teacher):
+    if not version.is_published and not (current_user.is_admin or current_user.is_teacher):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="没有权限查看此题目"
         )
     
+    etag = make_etag("problem", version.id, version.updated_at or version.created_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
+    # 读穿透缓存：缓存中的版本与刚读取的版本一致才使用
+    problem = await get_problem_detail_cached(db, problem_id, problem_version_tag(version))
+    if not problem:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="题目不存在"
+        )
+    
+    set_etag(response, etag)
     return problem
 
 @router.post("/", response_model=ProblemResponse, status_code=status.HTTP_201_CREATED)
 async def create_new_problem(
     problem_in: ProblemCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_teacher_or_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_teacher_or_admin)
 ):
     """
     创建新题目
@@ -98,7 +184,7 @@ async def create_new_problem(
     权限：需要老师或管理员权限
     """
     try:
-        problem = create_problem(db, problem_in, created_by=current_user.id)
+        problem = await create_problem(db, problem_in, created_by=current_user.id)
         return problem
     except ValueError as e:
         raise HTTPException(
@@ -106,12 +192,38 @@ async def create_new_problem(
             detail=str(e)
         )
 
+@router.post("/import", response_model=ProblemImportResult)
+async def import_problem_file(
+    file: UploadFile = File(...),
+    file_format: Optional[str] = Query(None, description="jsonl 或 csv，默认按文件扩展名判断"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_teacher_or_admin)
+):
+    """
+    批量导入题目（整套试卷）
+    
+    权限：需要老师或管理员权限
+    - **file**: JSONL（每行一个题目JSON）或CSV（首行表头，字段同创建题目；
+      选项可用options列JSON或A/B/C/D列，knowledge_point_ids用逗号分隔）
+    - **file_format**: 文件格式
+    
+    每行单独校验，返回成功导入的题目ID和逐行错误报告
+    """
+    try:
+        fmt = file_format or detect_format(file.filename)
+        return await import_problems_async(db, file.file, fmt, created_by=current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.put("/{problem_id}", response_model=ProblemResponse)
 async def update_existing_problem(
     problem_id: int,
     problem_in: ProblemUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_teacher_or_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_teacher_or_admin)
 ):
     """
     更新题目
@@ -119,7 +231,7 @@ async def update_existing_problem(
     权限：需要老师或管理员权限
     - **problem_id**: 题目ID
     """
-    problem = get_problem(db, problem_id)
+    problem = await get_problem(db, problem_id)
     if not problem:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -134,7 +246,7 @@ async def update_existing_problem(
         )
     
     try:
-        updated_problem = update_problem(db, problem, problem_in)
+        updated_problem = await update_problem(db, problem, problem_in)
         return updated_problem
     except ValueError as e:
         raise HTTPException(
@@ -145,8 +257,8 @@ async def update_existing_problem(
 @router.delete("/{problem_id}")
 async def delete_existing_problem(
     problem_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     删除题目
@@ -154,7 +266,7 @@ async def delete_existing_problem(
     权限：需要管理员权限
     - **problem_id**: 题目ID
     """
-    success = delete_problem(db, problem_id)
+    success = await delete_problem(db, problem_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -167,8 +279,8 @@ async def delete_existing_problem(
 async def publish_existing_problem(
     problem_id: int,
     publish: bool = True,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_teacher_or_admin)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_teacher_or_admin)
 ):
     """
     发布或取消发布题目
@@ -177,7 +289,7 @@ async def publish_existing_problem(
     - **problem_id**: 题目ID
     - **publish**: 是否发布（True=发布，False=取消发布）
     """
-    success = publish_problem(db, problem_id, publish)
+    success = await publish_problem(db, problem_id, publish)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -189,15 +301,15 @@ async def publish_existing_problem(
 
 @router.get("/stats/summary", response_model=ProblemStats)
 async def get_problems_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取题目统计信息
     
     权限：需要登录
     """
-    stats = get_problem_stats(db)
+    stats = await get_problem_stats(db)
     return stats
 
 @router.get("/practice/random", response_model=List[PracticeProblem])
@@ -205,8 +317,10 @@ async def get_random_problems_for_practice(
     count: int = Query(default=10, ge=1, le=50),
     difficulty: Optional[List[int]] = Query(None),
     knowledge_point_ids: Optional[List[int]] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    kp_match: str = Query("any", pattern="^(any|all)$"),
+    include_descendants: bool = True,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     获取随机题目用于练习
@@ -214,13 +328,17 @@ async def get_random_problems_for_practice(
     权限：需要登录
     - **count**: 题目数量（1-50）
     - **difficulty**: 难度范围
-    - **knowledge_point_ids**: 知识点ID列表
+    - **knowledge_point_ids**: 知识点ID列表（默认包含子知识点）
+    - **kp_match**: 多个知识点的匹配方式（any：任一，all：全部）
+    - **include_descendants**: 是否包含子知识点（默认是）
     """
-    problems = get_random_problems(
+    problems = await get_random_problems(
         db,
         count=count,
         difficulty_range=difficulty,
-        knowledge_point_ids=knowledge_point_ids
+        knowledge_point_ids=knowledge_point_ids,
+        knowledge_point_match=kp_match,
+        include_descendants=include_descendants
     )
     
     # 转换为练习模式（隐藏答案）
@@ -245,28 +363,42 @@ async def get_random_problems_for_practice(
 @router.get("/search/{keyword}", response_model=List[ProblemResponse])
 async def search_problems_by_keyword(
     keyword: str,
+    response: Response,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     搜索题目
     
     权限：需要登录
     - **keyword**: 搜索关键词
-    - **skip**: 分页跳过
+    - **skip**: 分页跳过（旧方式）
     - **limit**: 分页限制
+    - **cursor**: 分页游标（取自上一页响应头X-Next-Cursor）
     """
-    problems = search_problems(db, keyword, skip=skip, limit=limit)
+    try:
+        problems = await search_problems(db, keyword, skip=skip, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    next_page = next_cursor(problems, limit, "relevance", "desc")
+    if next_page:
+        response.headers["X-Next-Cursor"] = next_page
+    
     return problems
 
 @router.post("/{problem_id}/attempt")
 async def record_problem_attempt(
     problem_id: int,
     is_correct: bool,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     记录题目答题尝试
@@ -274,12 +406,15 @@ async def record_problem_attempt(
     权限：需要登录
     - **problem_id**: 题目ID
     - **is_correct**: 是否正确
+    
+    统计先在内存中聚合，由后台定期批量写回
     """
-    success = increment_attempts(db, problem_id, is_correct)
-    if not success:
+    if not await problem_exists(db, problem_id):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="题目不存在"
         )
     
+    attempt_buffer.record(problem_id, is_correct)
+    
     return {"message": "答题记录已更新"}
\ No newline at end of file
@@ -0,0 +1,333 @@
+"""
+缓存层
+- TTLCache：进程内有界LRU + TTL，带single-flight（同一个键并发未命中时只加载一次，
+  线程中用get_or_load，协程中用get_or_load_async）
+- TwoTierCache：一级进程内LRU + 二级Redis的读穿透缓存，Redis不可用时退化为只用一级缓存
+  （同步方法直接访问Redis，供线程中使用；协程中用get_or_load_async、set_async、delete_async）
+"""
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from app.core.config import settings
+from app.core.logging_config import logger
+
+try:
+    import redis
+except ImportError:  # 未安装redis时只使用进程内缓存
+    redis = None
+
+_MISSING = object()
+
+class _InflightCall:
+    """正在进行中的加载"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.invalidated = False  # 加载期间键被失效
+        self.future: Optional[asyncio.Future] = None  # 协程版本的等待对象
+
+class TTLCache:
+    """有界LRU缓存，条目在ttl秒后过期"""
+
+    def __init__(self, ttl: float, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _InflightCall] = {}
+        self._async_inflight: Dict[Hashable, _InflightCall] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """读取未过期的缓存值"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        with self._lock:
+            self._set_locked(key, value, ttl)
+
+    def _set_locked(self, key: Hashable, value: Any, ttl: Optional[float]) -> None:
+        self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        """删除缓存（进行中的加载结果也不会再写入）"""
+        with self._lock:
+            self._data.pop(key, None)
+            for inflight in (self._inflight, self._async_inflight):
+                call = inflight.get(key)
+                if call is not None:
+                    call.invalidated = True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            for inflight in (self._inflight, self._async_inflight):
+                for call in inflight.values():
+                    call.invalidated = True
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any], ttl: Optional[float] = None) -> Any:
+        """
+        读取缓存，未命中时调用loader加载
+        并发未命中同一个键时只有第一个调用执行loader，其余等待并共享结果
+        loader返回None时不写入缓存
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InflightCall()
+                self._inflight[key] = call
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+            with self._lock:
+                # 加载期间键被失效时，结果只返回给本轮调用方，不写入缓存
+                if not call.invalidated and call.value is not None:
+                    self._set_locked(key, call.value, ttl)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    async def get_or_load_async(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None
+    ) -> Any:
+        """
+        get_or_load的协程版本（loader返回awaitable）
+        等待方await共享的Future而不是阻塞线程，同一事件循环中的并发请求不会互相卡住
+        """
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            call = self._async_inflight.get(key)
+            leader = call is None or call.future.get_loop() is not loop
+            if leader:
+                call = _InflightCall()
+                call.future = loop.create_future()
+                self._async_inflight[key] = call
+
+        if not leader:
+            return await asyncio.shield(call.future)
+
+        try:
+            value = await loader()
+            with self._lock:
+                if not call.invalidated and value is not None:
+                    self._set_locked(key, value, ttl)
+            call.future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            call.future.cancel()
+            raise
+        except BaseException as e:
+            call.future.set_exception(e)
+            call.future.exception()  # 没有等待方时不再报告"异常未被获取"
+            raise
+        finally:
+            with self._lock:
+                if self._async_inflight.get(key) is call:
+                    del self._async_inflight[key]
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的缓存值类型: {type(value).__name__}")
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+def get_redis():
+    """获取共享的Redis客户端（未安装或未启用时返回None）"""
+    global _redis_client
+    if redis is None or not settings.CACHE_REDIS_ENABLED:
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis(
+                    host=settings.REDIS_HOST,
+                    port=settings.REDIS_PORT,
+                    password=settings.REDIS_PASSWORD or None,
+                    db=settings.REDIS_DB,
+                    socket_timeout=settings.CACHE_REDIS_TIMEOUT,
+                    socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT,
+                )
+    return _redis_client
+
+class TwoTierCache:
+    """
+    两级读穿透缓存
+    一级：进程内TTLCache（TTL较短，限制多进程间的不一致窗口）
+    二级：Redis（JSON序列化，多进程共享）
+    Redis出错后在一段时间内跳过二级缓存，避免每个请求都等待超时
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl: float,
+        l1_ttl: Optional[float] = None,
+        l1_maxsize: int = 1024,
+        redis_client_factory: Callable[[], Any] = get_redis,
+        retry_after: float = 30.0,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = TTLCache(ttl=l1_ttl if l1_ttl is not None else ttl, maxsize=l1_maxsize)
+        self._redis_client_factory = redis_client_factory
+        self.retry_after = retry_after
+        self._redis_down_until = 0.0
+        self.l2_hits = 0
+        self.l2_misses = 0
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _redis(self):
+        if time.monotonic() < self._redis_down_until:
+            return None
+        return self._redis_client_factory()
+
+    def _redis_failed(self, e: Exception) -> None:
+        if time.monotonic() >= self._redis_down_until:
+            logger.warning(f"Redis缓存不可用，{self.retry_after:.0f}秒内只使用进程内缓存: {e}")
+        self._redis_down_until = time.monotonic() + self.retry_after
+
+    def _l2_get(self, key: Hashable) -> Any:
+        client = self._redis()
+        if client is None:
+            return _MISSING
+        try:
+            raw = client.get(self._key(key))
+        except Exception as e:
+            self._redis_failed(e)
+            return _MISSING
+        if raw is None:
+            self.l2_misses += 1
+            return _MISSING
+        self.l2_hits += 1
+        return json.loads(raw)
+
+    def _l2_set(self, key: Hashable, value: Any) -> None:
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            client.set(
+                self._key(key),
+                json.dumps(value, default=_json_default, ensure_ascii=False),
+                ex=max(1, int(self.ttl)),
+            )
+        except Exception as e:
+            self._redis_failed(e)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """依次读取一级、二级缓存，都未命中时调用loader（同一键并发只加载一次）"""
+        def load_through():
+            value = self._l2_get(key)
+            if value is not _MISSING:
+                return value
+            value = loader()
+            if value is not None:
+                self._l2_set(key, value)
+            return value
+
+        return self.local.get_or_load(key, load_through)
+
+    async def get_or_load_async(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """get_or_load的协程版本，Redis读写放到线程中执行，不阻塞事件循环"""
+        async def load_through():
+            use_redis = self._redis() is not None
+            if use_redis:
+                value = await asyncio.to_thread(self._l2_get, key)
+                if value is not _MISSING:
+                    return value
+            value = await loader()
+            if value is not None and use_redis:
+                await asyncio.to_thread(self._l2_set, key, value)
+            return value
+
+        return await self.local.get_or_load_async(key, load_through)
+
+    def _l2_delete(self, key: Hashable) -> None:
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            client.delete(self._key(key))
+        except Exception as e:
+            self._redis_failed(e)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """同时写入一级和二级缓存"""
+        self.local.set(key, value)
+        self._l2_set(key, value)
+
+    async def set_async(self, key: Hashable, value: Any) -> None:
+        """set的协程版本，Redis写入放到线程中执行"""
+        self.local.set(key, value)
+        if self._redis() is not None:
+            await asyncio.to_thread(self._l2_set, key, value)
+
+    def delete(self, key: Hashable) -> None:
+        """显式失效（其他进程的一级缓存在l1_ttl内过期）"""
+        self.local.delete(key)
+        self._l2_delete(key)
+
+    async def delete_async(self, key: Hashable) -> None:
+        """delete的协程版本，Redis删除放到线程中执行"""
+        self.local.delete(key)
+        if self._redis() is not None:
+            await asyncio.to_thread(self._l2_delete, key)
+
+    def clear_local(self) -> None:
+        self.local.clear()
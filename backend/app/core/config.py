@@ -1,6 +1,7 @@
 from typing import Optional, List
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn, validator, field_validator
+import os
 import secrets
 from pathlib import Path
 
@@ -51,12 +52,79 @@ class Settings(BaseSettings):
             path=f"{values.get('POSTGRES_DB') or ''}",
         )
     
+    # 初始化脚本目录（create_all时从中读取函数、触发器定义；默认为仓库中的database/init）
+    SQL_INIT_DIR: Optional[str] = None
+    
+    # 只读副本（可选）：配置后列表、统计、随机抽题、搜索等只读接口走副本
+    REPLICA_DATABASE_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5.0  # 用户写入后该时间内的读请求仍走主库（应大于复制延迟）
+    
     # Redis配置
     REDIS_HOST: str = "localhost"
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str = "redis123"
     REDIS_DB: int = 0
     
+    # 练习抽题配置
+    PRACTICE_POOL_REFRESH_SECONDS: int = 300  # 抽题ID池全量刷新间隔（兜底多进程间的发布变化）
+    
+    # 知识点树缓存
+    KNOWLEDGE_TREE_REFRESH_SECONDS: int = 300  # 全量重新加载间隔（其他进程的修改、题目数的最长延迟）
+    
+    # 读缓存（一级进程内LRU + 二级Redis）
+    CACHE_REDIS_ENABLED: bool = True
+    CACHE_REDIS_TIMEOUT: float = 0.2      # Redis超时（秒），超时后退化为只用进程内缓存
+    PROBLEM_CACHE_SECONDS: int = 600      # 题目详情在Redis中的TTL
+    PROBLEM_LOCAL_CACHE_SECONDS: int = 30 # 进程内缓存TTL（多进程间不一致的最长窗口）
+    PROBLEM_LOCAL_CACHE_SIZE: int = 2048
+    
+    # 密码哈希线程池（bcrypt不在事件循环线程中计算）
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64     # 排队超过该值时登录/注册返回503
+    
+    # 调用者缓存（get_current_user不必每次查询用户表）
+    PRINCIPAL_CACHE_SECONDS: int = 30     # 禁用/角色变化在其他进程生效的最长延迟
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    
+    # 题目统计缓存
+    PROBLEM_STATS_CACHE_SECONDS: int = 60
+    
+    # 答题统计写缓冲
+    ATTEMPT_FLUSH_INTERVAL_SECONDS: float = 2.0  # 刷新间隔（也是异常退出时的最大丢失窗口）
+    ATTEMPT_FLUSH_MAX_PENDING: int = 500         # 待刷新题目数达到该值时立即刷新
+    
+    # 答题提交（并发提交合并为多行插入）
+    ANSWER_KEY_CACHE_SECONDS: int = 60          # 标准答案在Redis中的TTL（知识点删除等未显式失效的变化的最长延迟）
+    ANSWER_BATCH_MAX_SIZE: int = 500            # 每批最多写入的答题记录数
+    ANSWER_BATCH_MAX_WAIT_MS: float = 5.0       # 凑批的最长等待时间
+    ANSWER_QUEUE_MAX: int = 20000               # 排队超过该值时返回503
+    ANSWER_WRITER_TASKS: int = 2                # 并行写入的批次数
+
+    # 练习会话引擎（题单预选预序列化，进度在Redis/内存中推进并定期批量写回）
+    PRACTICE_SESSION_CACHE_SECONDS: int = 7200         # 题单在Redis中的TTL
+    PRACTICE_SESSION_LOCAL_CACHE_SIZE: int = 2000      # 进程内缓存的会话题单数
+    PRACTICE_PROGRESS_FLUSH_SECONDS: float = 5.0       # 进度写回间隔（异常退出时的最大丢失窗口）
+    PRACTICE_SESSION_IDLE_MINUTES: int = 60            # 超过该时间未活动的会话标记为abandoned
+    PRACTICE_SWEEP_INTERVAL_SECONDS: float = 300.0     # 放弃会话清理间隔
+
+    # 学生画像增量更新（只合并新增的答题记录）
+    PROFILE_UPDATE_INTERVAL_SECONDS: float = 60.0  # 检查新答题记录的间隔
+    PROFILE_UPDATE_BATCH_SIZE: int = 5000          # 每批（一个事务）合并的答题记录数
+    PROFILE_SETTLE_SECONDS: int = 10               # 只合并写入超过该时间的记录，等待并发事务提交
+    PROFILE_MASTERY_HALF_LIFE_DAYS: float = 30.0   # 掌握度证据的半衰期
+    PROFILE_WEEKS_KEPT: int = 12                   # weekly_progress保留的周数
+    
+    # 知识点题目数增量合并
+    KP_COUNT_FOLD_INTERVAL_SECONDS: float = 5.0  # 合并间隔（problem_count的最大延迟）
+    
+    # SQL统计
+    SQL_SERVER_TIMING: bool = True        # 响应头输出Server-Timing（语句数、数据库耗时、最慢语句）
+    SQL_REPEAT_WARN_THRESHOLD: int = 10   # 同一形状的语句在一次请求中执行超过该次数时告警（疑似N+1）
+    
+    # Prometheus指标（/metrics）
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None   # 配置后须携带 Authorization: Bearer <token>；未配置时只允许本机访问
+    
     # macOS特化配置
     MACOS_DEV_MODE: bool = True
     HOT_RELOAD: bool = True
@@ -2,22 +2,32 @@
 macOS特化的数据库连接管理
 使用SQLAlchemy 2.0+异步API
 """
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy.pool import QueuePool
-from contextlib import contextmanager
+from sqlalchemy.sql.dml import UpdateBase
+from contextlib import asynccontextmanager, contextmanager
 import threading
 import time
-from typing import Generator
+from typing import AsyncGenerator, Generator, Optional
 
+from fastapi import Request
+
+from app.core.cache import TwoTierCache
 from app.core.config import settings
 from app.core.logging_config import logger
+from app.core.query_stats import instrument_engine
+from app.core.security import token_subject
+from app.core.metrics import (
+    TimedQueuePool, TimedAsyncQueuePool, TimedReplicaQueuePool, register_engine
+)
 
 # 创建数据库引擎（macOS特化：使用连接池提高性能）
 engine = create_engine(
     str(settings.SQLALCHEMY_DATABASE_URL),
-    poolclass=QueuePool,  # 连接池
+    poolclass=TimedQueuePool,  # 连接池（QueuePool + 获取连接等待时间指标）
     pool_size=20,         # 连接池大小
     max_overflow=30,      # 最大溢出连接
     pool_pre_ping=True,   # 连接前ping，防止连接失效
@@ -35,6 +45,113 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,  # macOS开发优化
 )
 
+# 异步引擎（asyncpg）：供async def路由使用，查询等待期间不阻塞事件循环
+# 同步引擎保留给后台线程（答题统计写缓冲）、脚本和init_db
+def _create_async_engine(url: str, poolclass):
+    return create_async_engine(
+        make_url(url).set(drivername="postgresql+asyncpg"),
+        poolclass=poolclass,
+        pool_size=20,
+        max_overflow=30,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        echo=False,
+    )
+
+async_engine = _create_async_engine(str(settings.SQLALCHEMY_DATABASE_URL), TimedAsyncQueuePool)
+
+# 只读副本引擎（未配置时为None，所有请求都走主库）
+async_replica_engine = (
+    _create_async_engine(settings.REPLICA_DATABASE_URL, TimedReplicaQueuePool)
+    if settings.REPLICA_DATABASE_URL else None
+)
+
+class RoutingSession(Session):
+    """
+    读写分离会话
+    info["use_replica"]为真时，查询发往副本；写语句、flush以及本会话已经写过之后的查询发往主库
+    """
+    
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if (
+            async_replica_engine is not None
+            and self.info.get("use_replica")
+            and not self.info.get("wrote")
+            and not self._flushing
+            and not isinstance(clause, UpdateBase)
+        ):
+            return async_replica_engine.sync_engine
+        return async_engine.sync_engine
+
+# 用户最近写入的标记：进程内 + Redis（多进程共享），窗口内该用户的读请求走主库
+recent_writers = TwoTierCache(
+    "recent-writer",
+    ttl=settings.READ_YOUR_WRITES_SECONDS,
+    l1_ttl=settings.READ_YOUR_WRITES_SECONDS,
+    l1_maxsize=100_000,
+)
+
+def _mark_write(session: Session) -> None:
+    # 事件监听器中只设置标记（不访问Redis），响应发出前由publish_request_writes发布到recent_writers
+    session.info["wrote"] = True
+
+def mark_write(db: AsyncSession) -> None:
+    """数据由其他会话代为写入时（如批量写入队列），标记本请求的调用者最近写过数据"""
+    _mark_write(db.sync_session)
+
+async def publish_request_writes(request: Request) -> None:
+    """
+    本请求的会话写过数据时，记录调用者最近写过数据（Redis写入在线程中执行）
+    由中间件在处理函数返回之后、响应发出之前调用：yield依赖的收尾在响应发出之后才执行，
+    在那里发布时客户端收到响应后立即发出的读请求可能仍被路由到副本
+    写接口在处理函数内提交，发布时数据已经提交；处理函数失败时多标记几秒只会让读请求走主库
+    """
+    callers = {
+        db.info["caller"]
+        for db in getattr(request.state, "db_sessions", ())
+        if db.info.get("caller") and db.info.get("wrote")
+    }
+    for caller in callers:
+        await recent_writers.set_async(caller, True)
+
+def _track_session(request: Request, db: AsyncSession) -> AsyncSession:
+    """登记本请求的会话，供publish_request_writes检查"""
+    sessions = getattr(request.state, "db_sessions", None)
+    if sessions is None:
+        sessions = request.state.db_sessions = []
+    sessions.append(db)
+    return db
+
+@event.listens_for(RoutingSession, "after_flush")
+def _after_flush(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        _mark_write(session)
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _after_dml(orm_execute_state):
+    # 批量insert/update/delete不经过flush
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _mark_write(orm_execute_state.session)
+
+AsyncSessionLocal = async_sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,  # 提交后仍可访问属性（异步会话不能隐式刷新）
+)
+
+# 按请求统计SQL（语句数、耗时、最慢语句），见app.core.query_stats
+instrument_engine(engine)
+instrument_engine(async_engine)
+
+# 连接池指标（/metrics采集时读取）
+register_engine("sync", engine)
+register_engine("async", async_engine)
+
+if async_replica_engine is not None:
+    instrument_engine(async_replica_engine)
+    register_engine("replica", async_replica_engine)
+
 # 声明基类
 Base = declarative_base()
 
@@ -60,6 +177,58 @@ def get_db() -> Generator[Session, None, None]:
         if elapsed > 1.0:  # 超过1秒的查询
             logger.warning(f"⏰ 慢数据库会话: {elapsed:.2f}秒")
 
+def _caller_key(request: Request) -> Optional[str]:
+    """调用者标识（令牌subject），用于读己之写"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token_subject(token)
+
+async def _no_value():
+    return None
+
+async def get_async_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    获取异步数据库会话（依赖注入，主库）
+    与get_db相同：请求结束时提交，出错时回滚
+    """
+    db = _track_session(request, AsyncSessionLocal(info={"caller": _caller_key(request)}))
+    async with _session_scope(db):
+        yield db
+
+async def get_async_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    获取只读接口的异步会话
+    配置了副本时查询发往副本；调用者在READ_YOUR_WRITES_SECONDS内写过数据时仍走主库
+    """
+    caller = _caller_key(request)
+    use_replica = async_replica_engine is not None
+    if use_replica and caller:
+        use_replica = not await recent_writers.get_or_load_async(caller, _no_value)
+    
+    db = _track_session(request, AsyncSessionLocal(info={"caller": caller, "use_replica": use_replica}))
+    async with _session_scope(db):
+        yield db
+
+@asynccontextmanager
+async def _session_scope(db: AsyncSession) -> AsyncGenerator[AsyncSession, None]:
+    """请求结束时提交，出错时回滚，并记录慢会话"""
+    start_time = time.time()
+    
+    try:
+        yield db
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"数据库操作失败: {e}", exc_info=True)
+        raise
+    finally:
+        await db.close()
+        elapsed = time.time() - start_time
+        if elapsed > 1.0:
+            logger.warning(f"⏰ 慢数据库会话: {elapsed:.2f}秒")
+
 @contextmanager
 def db_context():
     """
@@ -130,8 +299,9 @@ class ConnectionPoolMonitor(threading.Thread):
             try:
                 pool = self.engine.pool
                 logger.debug(
-                    f"连接池状态: 使用中={pool.checkedin()}, "
-                    f"空闲={pool.checkedout()}, "
+                    f"连接池状态: 使用中={pool.checkedout()}, "
+                    f"空闲={pool.checkedin()}, "
+                    f"溢出={max(pool.overflow(), 0)}, "
                     f"总大小={pool.size()}"
                 )
             except Exception as e:
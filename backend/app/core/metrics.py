@@ -0,0 +1,149 @@
+"""
+Prometheus指标
+- 请求：按路由模板的延迟直方图、进行中请求数、每个请求的数据库耗时和语句数
+- 连接池：已借出/溢出/空闲连接数（采集时读取），获取连接的等待时间直方图
+- 缓存：命中/未命中次数和命中率；密码哈希线程池的排队深度
+所有指标只在内存中累加，采集时才汇总，开销很小，生产环境也可以常开
+"""
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+# 请求指标
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "请求处理耗时",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "正在处理的请求数",
+    ["method"],
+)
+REQUEST_DB_TIME = Histogram(
+    "http_request_db_duration_seconds",
+    "每个请求中SQL执行的总耗时",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "每个请求执行的SQL语句数",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+# 连接池指标
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "从连接池获取连接的等待时间",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts_total",
+    "获取连接超时次数",
+    ["engine"],
+)
+
+def observe_request(method: str, route: str, status: int, elapsed: float, stats) -> None:
+    """记录一次请求（stats为app.core.query_stats.QueryStats）"""
+    REQUEST_LATENCY.labels(method, route, str(status)).observe(elapsed)
+    if stats is not None:
+        REQUEST_DB_TIME.labels(method, route).observe(stats.total_ms / 1000)
+        REQUEST_DB_QUERIES.labels(method, route).observe(stats.count)
+
+class _TimedPoolMixin:
+    """记录获取连接的等待时间（包括池满时的排队时间）"""
+
+    metrics_label = "default"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_CHECKOUT_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            POOL_CHECKOUT_WAIT.labels(self.metrics_label).observe(time.perf_counter() - start)
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    metrics_label = "sync"
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "async"
+
+class TimedReplicaQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = "replica"
+
+class _RuntimeCollector:
+    """采集时读取连接池、缓存和线程池的当前状态"""
+
+    def __init__(self):
+        self.engines: Dict[str, object] = {}
+        self.caches: Dict[str, object] = {}
+        self.password_pool = None
+
+    def collect(self) -> Iterable:
+        checked_out = GaugeMetricFamily("db_pool_checked_out", "已借出的连接数", labels=["engine"])
+        checked_in = GaugeMetricFamily("db_pool_checked_in", "池中空闲的连接数", labels=["engine"])
+        overflow = GaugeMetricFamily("db_pool_overflow", "超出pool_size的溢出连接数", labels=["engine"])
+        size = GaugeMetricFamily("db_pool_size", "连接池大小", labels=["engine"])
+        for name, engine in self.engines.items():
+            pool = getattr(engine, "sync_engine", engine).pool
+            checked_out.add_metric([name], pool.checkedout())
+            checked_in.add_metric([name], pool.checkedin())
+            overflow.add_metric([name], max(pool.overflow(), 0))
+            size.add_metric([name], pool.size())
+        yield from (checked_out, checked_in, overflow, size)
+
+        hits = CounterMetricFamily("cache_hits", "缓存命中次数", labels=["cache", "tier"])
+        misses = CounterMetricFamily("cache_misses", "缓存未命中次数", labels=["cache", "tier"])
+        ratio = GaugeMetricFamily("cache_hit_ratio", "缓存命中率（自启动以来）", labels=["cache", "tier"])
+        for name, cache in self.caches.items():
+            for tier, tier_hits, tier_misses in _cache_counters(cache):
+                hits.add_metric([name, tier], tier_hits)
+                misses.add_metric([name, tier], tier_misses)
+                total = tier_hits + tier_misses
+                ratio.add_metric([name, tier], tier_hits / total if total else 0.0)
+        yield from (hits, misses, ratio)
+
+        if self.password_pool is not None:
+            stats = self.password_pool.stats()
+            yield GaugeMetricFamily("password_hash_running", "正在计算的密码哈希数", value=stats["running"])
+            yield GaugeMetricFamily("password_hash_queue_depth", "排队等待的密码哈希数", value=stats["queue_depth"])
+            yield CounterMetricFamily("password_hash_rejected", "排队已满被拒绝的次数", value=stats["rejected"])
+            yield CounterMetricFamily(
+                "password_hash_wait_seconds", "密码哈希累计排队时间", value=stats["wait_seconds_total"]
+            )
+
+def _cache_counters(cache) -> List[Tuple[str, int, int]]:
+    """TTLCache只有一级；TwoTierCache分别报告进程内(l1)和Redis(l2)"""
+    local = getattr(cache, "local", None)
+    if local is not None:
+        return [("l1", local.hits, local.misses), ("l2", cache.l2_hits, cache.l2_misses)]
+    return [("l1", cache.hits, cache.misses)]
+
+_collector = _RuntimeCollector()
+REGISTRY.register(_collector)
+
+def register_engine(name: str, engine) -> None:
+    _collector.engines[name] = engine
+
+def register_cache(name: str, cache) -> None:
+    _collector.caches[name] = cache
+
+def register_password_pool(pool) -> None:
+    _collector.password_pool = pool
+
+def render_metrics() -> Tuple[bytes, str]:
+    """Prometheus文本格式的指标和对应的Content-Type"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
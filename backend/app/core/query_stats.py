@@ -0,0 +1,130 @@
+"""
+按请求统计SQL执行
+通过引擎的before/after_cursor_execute事件记录每条语句的耗时，
+归入当前请求（contextvars）的QueryStats：语句数、数据库总耗时、最慢语句、各语句形状的执行次数
+"""
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+
+# 参数占位符：psycopg2 %(name)s / %s，asyncpg $1
+_PARAM = r"(?:%\(\w+\)s|%s|\$\d+|\?)"
+_PARAM_LIST_PATTERN = re.compile(rf"\(\s*{_PARAM}(?:\s*,\s*{_PARAM})*\s*\)")
+_VALUES_ROWS_PATTERN = re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE)
+_NUMBER_PATTERN = re.compile(r"\b\d+\b")
+_WHITESPACE_PATTERN = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    """
+    语句形状：折叠参数列表、多行VALUES和数字字面量
+    同一条ORM查询在循环中以不同参数执行时得到相同的形状
+    """
+    shape = _WHITESPACE_PATTERN.sub(" ", statement).strip()
+    shape = _PARAM_LIST_PATTERN.sub("(?)", shape)
+    shape = _VALUES_ROWS_PATTERN.sub(r"\1", shape)
+    return _NUMBER_PATTERN.sub("N", shape)
+
+class QueryStats:
+    """一次请求（或一个代码块）内的SQL统计"""
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent  # 外层统计（嵌套的track_queries），语句同时计入外层
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """执行次数超过threshold的语句形状（疑似N+1）"""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+    def server_timing(self) -> str:
+        """Server-Timing响应头的值"""
+        return (
+            f'db;dur={self.total_ms:.2f};desc="{self.count} queries", '
+            f"db-slowest;dur={self.slowest_ms:.2f}"
+        )
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def current_query_stats() -> Optional[QueryStats]:
+    """当前请求的SQL统计（不在统计范围内时为None）"""
+    return _current_stats.get()
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """
+    统计代码块内（含其中启动的异步任务）执行的SQL
+    可以嵌套：内层统计到的语句同时计入外层（如测试中包住一次请求）
+
+    用法：
+        with track_queries() as stats:
+            ...
+        print(stats.count, stats.total_ms)
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+_START_TIMES_KEY = "query_stats_start_times"
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start_times = conn.info.get(_START_TIMES_KEY)
+    if not start_times:
+        return
+    elapsed_ms = (time.perf_counter() - start_times.pop()) * 1000
+    stats = _current_stats.get()
+    while stats is not None:
+        stats.record(statement, elapsed_ms)
+        stats = stats.parent
+
+def _handle_error(exception_context):
+    # 语句执行失败时不会触发after_cursor_execute，丢弃对应的开始时间
+    conn = exception_context.connection
+    start_times = conn.info.get(_START_TIMES_KEY) if conn is not None else None
+    if start_times:
+        start_times.pop()
+
+def instrument_engine(engine) -> None:
+    """为引擎注册统计事件（异步引擎注册在其同步引擎上）"""
+    engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+# 请求结束时的回调（endpoint, stats），供测试插件检查查询预算
+RequestListener = Callable[[str, QueryStats], None]
+_request_listeners: List[RequestListener] = []
+
+def add_request_listener(listener: RequestListener) -> None:
+    _request_listeners.append(listener)
+
+def remove_request_listener(listener: RequestListener) -> None:
+    if listener in _request_listeners:
+        _request_listeners.remove(listener)
+
+def notify_request(endpoint: str, stats: QueryStats) -> None:
+    """请求处理完成后通知所有回调"""
+    for listener in list(_request_listeners):
+        listener(endpoint, stats)
@@ -2,12 +2,18 @@
 macOS特化的安全工具
 密码加密和JWT令牌处理
 """
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Callable, Dict, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
 
+from app.core.cache import TTLCache
 from app.core.config import settings
 from app.schemas.user import TokenData
 
@@ -45,6 +51,92 @@ def get_password_hash(password: str) -> str:
     """生成密码哈希"""
     return pwd_context.hash(password)
 
+class PasswordHashPool:
+    """
+    bcrypt计算线程池
+    bcrypt在计算时释放GIL，线程池即可并行；计算放到池中后事件循环不再被每次约200ms的哈希卡住。
+    max_workers限制同时计算的数量，排队超过max_queue时直接返回503，避免登录高峰无限堆积
+    """
+    
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self.in_flight = 0        # 已提交未完成（排队 + 计算中）
+        self.running = 0          # 计算中
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0   # 累计排队时间
+        self.run_seconds = 0.0    # 累计计算时间
+    
+    @property
+    def queue_depth(self) -> int:
+        """排队等待计算的任务数"""
+        return self.in_flight - self.running
+    
+    def _run(self, submitted_at: float, func: Callable[..., Any], *args) -> Any:
+        started_at = time.perf_counter()
+        with self._lock:
+            self.running += 1
+            self.wait_seconds += started_at - submitted_at
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.run_seconds += time.perf_counter() - started_at
+    
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """在线程池中执行func并等待结果"""
+        with self._lock:
+            if self.in_flight - self.running >= self.max_queue:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="登录请求过多，请稍后重试",
+                    headers={"Retry-After": "1"},
+                )
+            self.in_flight += 1
+        
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._executor, self._run, time.perf_counter(), func, *args
+            )
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """线程池指标（供监控使用）"""
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self.running,
+                "queue_depth": self.in_flight - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "wait_seconds_total": self.wait_seconds,
+                "run_seconds_total": self.run_seconds,
+            }
+
+# 全局密码哈希线程池
+password_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """在线程池中验证密码（用于async路由）"""
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """在线程池中生成密码哈希（用于async路由）"""
+    return await password_pool.run(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """创建JWT访问令牌"""
     to_encode = data.copy()
@@ -97,6 +189,45 @@ def verify_token(token: str) -> Optional[TokenData]:
     except JWTError:
         raise credentials_exception
 
+@dataclass(frozen=True)
+class Principal:
+    """
+    已认证的调用者（只含鉴权需要的字段）
+    只检查角色的路由使用它，不必加载完整的User对象
+    """
+    id: int
+    username: str
+    role: str
+    is_active: bool
+    
+    @property
+    def is_admin(self):
+        return self.role == "admin"
+    
+    @property
+    def is_student(self):
+        return self.role == "student"
+    
+    @property
+    def is_teacher(self):
+        return self.role == "teacher"
+
+# 调用者缓存：令牌subject(用户名) -> Principal
+# 禁用、删除、角色变化时显式失效；其他进程的缓存最多在TTL内过期
+principal_cache = TTLCache(ttl=settings.PRINCIPAL_CACHE_SECONDS, maxsize=settings.PRINCIPAL_CACHE_SIZE)
+
+def invalidate_principal(username: str) -> None:
+    """用户被禁用、删除或角色变化后使调用者缓存失效"""
+    principal_cache.delete(username)
+
+def token_subject(token: str) -> Optional[str]:
+    """解析令牌的subject（用户名），无效时返回None，不抛出异常"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
 def generate_password_reset_token(email: str) -> str:
     """生成密码重置令牌"""
     expires_delta = timedelta(hours=24)  # 24小时有效
@@ -0,0 +1,82 @@
+"""
+数据库初始化脚本（database/init/*.sql）中的函数、触发器等对象
+脚本是这些对象的唯一定义：用 "-- @ddl 名称" 与 "-- @end" 标出的片段，
+在create_all建表时按名称读取并执行，模型中不再复制SQL
+同名片段可分布在多个脚本中（如表在02、触发器在03），按文件名和出现顺序拼接
+"""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+# backend/app/core/sql_init.py -> 仓库根目录/database/init
+DEFAULT_SQL_INIT_DIR = Path(__file__).resolve().parents[3] / "database" / "init"
+
+_BLOCK_PATTERN = re.compile(r"^-- @ddl (\S+)[^\n]*\n(.*?)^-- @end\b", re.MULTILINE | re.DOTALL)
+_DOLLAR_QUOTE = re.compile(r"\$[A-Za-z_]*\$")
+
+def split_statements(sql: str) -> List[str]:
+    """按分号拆分SQL语句（忽略单引号字符串、$$函数体和--注释中的分号），去掉只含注释的片段"""
+    statements = []
+    start = 0
+    i = 0
+    while i < len(sql):
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end
+            continue
+        char = sql[i]
+        quote = None
+        if char == "'":
+            quote = "'"
+        elif char == "$":
+            match = _DOLLAR_QUOTE.match(sql, i)
+            quote = match.group() if match else None
+        if quote is not None:
+            end = sql.find(quote, i + len(quote))
+            i = len(sql) if end == -1 else end + len(quote)
+            continue
+        if char == ";":
+            statements.append(sql[start:i])
+            start = i + 1
+        i += 1
+    statements.append(sql[start:])
+
+    result = []
+    for statement in statements:
+        lines = statement.strip().splitlines()
+        while lines and (not lines[0].strip() or lines[0].lstrip().startswith("--")):
+            lines.pop(0)
+        if lines:
+            result.append("\n".join(lines).strip())
+    return result
+
+@lru_cache(maxsize=1)
+def _load_blocks() -> Dict[str, List[str]]:
+    """读取初始化脚本中所有标记的片段：名称 -> 语句列表"""
+    directory = Path(settings.SQL_INIT_DIR) if settings.SQL_INIT_DIR else DEFAULT_SQL_INIT_DIR
+    blocks: Dict[str, List[str]] = {}
+    for path in sorted(directory.glob("*.sql")):
+        for name, body in _BLOCK_PATTERN.findall(path.read_text(encoding="utf-8")):
+            blocks.setdefault(name, []).extend(split_statements(body))
+    return blocks
+
+def ddl_statements(name: str) -> List[str]:
+    """按名称读取初始化脚本中的语句（名称不存在时报错，避免静默漏建对象）"""
+    blocks = _load_blocks()
+    if name not in blocks:
+        raise LookupError(f"初始化脚本中没有名为 {name} 的 @ddl 片段")
+    return blocks[name]
+
+def attach_ddl(table, name: str, when: str = "after_create") -> None:
+    """create_all创建table时（默认建表后）执行初始化脚本中名为name的片段"""
+    def execute(target, connection, **kw):
+        for statement in ddl_statements(name):
+            # 不做参数替换：函数体中的 % 原样发送
+            connection.exec_driver_sql(statement, execution_options={"no_parameters": True})
+
+    event.listen(table, when, execute)
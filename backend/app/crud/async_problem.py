@@ -0,0 +1,147 @@
+"""
+题目CRUD操作（异步版本）
+通过AsyncSession.run_sync复用app.crud.problem中的查询逻辑：
+同步代码在greenlet中执行，数据库IO由asyncpg完成，等待期间不阻塞事件循环
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud import problem as crud
+from app.crud.problem import (
+    PROBLEM_STATS_KEY, answer_key_cache, problem_cache, stats_cache,
+    problem_version_tag, resolve_problem_sort
+)
+from app.models.problem import Problem
+from app.schemas.problem import ProblemCreate, ProblemUpdate, ProblemFilter
+
+async def get_problem(db: AsyncSession, problem_id: int) -> Optional[Problem]:
+    """根据ID获取题目"""
+    return await db.run_sync(crud.get_problem, problem_id)
+
+async def get_problem_version(db: AsyncSession, problem_id: int):
+    """只读取题目的版本信息，用于条件请求"""
+    return await db.run_sync(crud.get_problem_version, problem_id)
+
+async def get_problem_collection_version(db: AsyncSession) -> Optional[int]:
+    """题目集合版本号"""
+    return await db.run_sync(crud.get_problem_collection_version)
+
+async def get_problem_detail_cached(
+    db: AsyncSession,
+    problem_id: int,
+    version: str
+) -> Optional[Dict[str, Any]]:
+    """读穿透获取题目详情字典（缓存中的版本与version不一致时重新加载）"""
+    async def load():
+        problem = await db.run_sync(crud.get_problem_detail, problem_id)
+        return crud._problem_detail_dict(problem) if problem else None
+
+    data = await problem_cache.get_or_load_async(problem_id, load)
+    if data is not None and data["version"] != version:
+        await problem_cache.delete_async(problem_id)
+        data = await problem_cache.get_or_load_async(problem_id, load)
+    return data
+
+async def invalidate_problem_cache(problem_id: int) -> None:
+    """题目或其知识点关联变化后使详情缓存失效（invalidate_problem_cache的协程版本）"""
+    await problem_cache.delete_async(problem_id)
+    await answer_key_cache.delete_async(problem_id)
+
+async def get_answer_key(db: AsyncSession, problem_id: int) -> Optional[Dict[str, Any]]:
+    """判分所需的题目字段（两级缓存，并发未命中只查询一次）"""
+    return await answer_key_cache.get_or_load_async(
+        problem_id, lambda: db.run_sync(crud.load_answer_key, problem_id)
+    )
+
+async def get_problem_rows(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    filter_params: Optional[ProblemFilter] = None,
+    cursor: Optional[str] = None
+) -> list:
+    """获取题目列表的列元组"""
+    return await db.run_sync(
+        crud.get_problem_rows, skip=skip, limit=limit, filter_params=filter_params, cursor=cursor
+    )
+
+async def create_problem(
+    db: AsyncSession,
+    problem_create: ProblemCreate,
+    created_by: int
+) -> Problem:
+    """创建新题目"""
+    return await db.run_sync(crud.create_problem, problem_create, created_by)
+
+async def update_problem(
+    db: AsyncSession,
+    db_problem: Problem,
+    problem_update: ProblemUpdate
+) -> Problem:
+    """更新题目（返回的对象已重新读取，可直接序列化）"""
+    db_problem = await db.run_sync(_update_problem_and_refresh, db_problem, problem_update)
+    await invalidate_problem_cache(db_problem.id)
+    return db_problem
+
+def _update_problem_and_refresh(session: Session, db_problem: Problem, problem_update: ProblemUpdate) -> Problem:
+    # 提交后updated_at（onupdate/func.now()、触发器）已过期，在同步上下文中重新读取，
+    # 否则响应序列化时在greenlet之外懒加载会抛出MissingGreenlet
+    db_problem = crud.update_problem(session, db_problem, problem_update, invalidate_cache=False)
+    session.refresh(db_problem)
+    return db_problem
+
+async def delete_problem(db: AsyncSession, problem_id: int) -> bool:
+    """删除题目（软删除）"""
+    deleted = await db.run_sync(crud.delete_problem, problem_id, invalidate_cache=False)
+    if deleted:
+        await invalidate_problem_cache(problem_id)
+    return deleted
+
+async def publish_problem(db: AsyncSession, problem_id: int, publish: bool = True) -> bool:
+    """发布或取消发布题目"""
+    updated = await db.run_sync(crud.publish_problem, problem_id, publish, invalidate_cache=False)
+    if updated:
+        await invalidate_problem_cache(problem_id)
+    return updated
+
+async def get_problem_stats(db: AsyncSession) -> Dict[str, Any]:
+    """获取题目统计信息（TTL缓存，并发未命中只查询一次）"""
+    return await stats_cache.get_or_load_async(
+        PROBLEM_STATS_KEY, lambda: db.run_sync(crud._compute_problem_stats)
+    )
+
+async def get_random_problems(
+    db: AsyncSession,
+    count: int = 10,
+    difficulty_range: Optional[List[int]] = None,
+    knowledge_point_ids: Optional[List[int]] = None,
+    knowledge_point_match: str = "any",
+    include_descendants: bool = True
+) -> List[Problem]:
+    """获取随机题目"""
+    return await db.run_sync(
+        crud.get_random_problems,
+        count=count,
+        difficulty_range=difficulty_range,
+        knowledge_point_ids=knowledge_point_ids,
+        knowledge_point_match=knowledge_point_match,
+        include_descendants=include_descendants,
+    )
+
+async def problem_exists(db: AsyncSession, problem_id: int) -> bool:
+    """题目是否存在且未删除"""
+    return await db.run_sync(crud.problem_exists, problem_id)
+
+async def search_problems(
+    db: AsyncSession,
+    keyword: str,
+    skip: int = 0,
+    limit: int = 50,
+    cursor: Optional[str] = None
+) -> List[Problem]:
+    """搜索题目（按相关度排序）"""
+    return await db.run_sync(
+        crud.search_problems, keyword, skip=skip, limit=limit, cursor=cursor
+    )
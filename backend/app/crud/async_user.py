@@ -0,0 +1,68 @@
+"""
+用户CRUD操作（异步版本）
+通过AsyncSession.run_sync复用app.crud.user中的逻辑；
+bcrypt计算在password_pool线程池中执行，不占用事件循环
+"""
+from typing import Optional
+
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.security import verify_password_async, get_password_hash_async
+from app.crud import user as crud
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    """根据用户名获取用户"""
+    return (await db.execute(select(User).where(User.username == username))).scalars().first()
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """根据邮箱获取用户"""
+    return (await db.execute(select(User).where(User.email == email))).scalars().first()
+
+async def create_user(db: AsyncSession, user_create: UserCreate) -> User:
+    """
+    创建新用户
+    先检查用户名/邮箱是否重复（一次查询），重复的注册请求不占用密码哈希线程池；
+    写入前crud.create_user仍会在同一事务中再次检查
+    """
+    conditions = [User.username == user_create.username]
+    if user_create.email:
+        conditions.append(User.email == user_create.email)
+    existing = (await db.execute(
+        select(User.username, User.email).where(or_(*conditions)).limit(2)
+    )).all()
+    if any(row.username == user_create.username for row in existing):
+        raise ValueError("用户名已存在")
+    if existing:
+        raise ValueError("邮箱已存在")
+    
+    hashed_password = await get_password_hash_async(user_create.password)
+    return await db.run_sync(crud.create_user, user_create, hashed_password)
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """用户认证"""
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    
+    return user
+
+async def change_password(
+    db: AsyncSession,
+    user: User,
+    current_password: str,
+    new_password: str
+) -> bool:
+    """修改密码"""
+    if not await verify_password_async(current_password, user.hashed_password):
+        return False
+    
+    user.hashed_password = await get_password_hash_async(new_password)
+    await db.commit()
+    
+    return True
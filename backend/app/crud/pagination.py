@@ -0,0 +1,86 @@
+"""
+游标（Keyset）分页工具
+用排序键 + 主键生成不透明游标，避免OFFSET扫描丢弃行
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional, Tuple
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+# 允许作为游标排序键的列（列排序键均有(列, id)复合索引，见03-indexes.sql）
+KEYSET_SORT_COLUMNS = {
+    "created_at": datetime,
+    "updated_at": datetime,
+    "difficulty": int,
+    "total_attempts": int,
+    "title": str,
+    "relevance": float,  # 搜索相关度（ts_rank_cd），只在搜索结果集内排序
+}
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, last_id: int) -> str:
+    """根据最后一行的排序键生成游标"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"s": sort_by, "o": sort_order, "v": value, "id": last_id}
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def next_cursor(rows: list, limit: int, sort_by: str, sort_order: str) -> Optional[str]:
+    """本页已满时，用最后一行生成下一页游标；否则返回None"""
+    if not rows or len(rows) < limit:
+        return None
+    last = rows[-1]
+    value = getattr(last, sort_by)
+    if value is None:
+        return None
+    return encode_cursor(sort_by, sort_order, value, last.id)
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """解析游标，返回(排序键值, id)"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        value, last_id = payload["v"], int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("无效的分页游标")
+
+    # 游标必须与当前排序方式一致
+    if payload.get("s") != sort_by or payload.get("o") != sort_order:
+        raise ValueError("分页游标与排序条件不匹配")
+
+    value_type = KEYSET_SORT_COLUMNS.get(sort_by)
+    if value_type is None or value is None:
+        raise ValueError("无效的分页游标")
+
+    try:
+        if value_type is datetime:
+            value = datetime.fromisoformat(value)
+        else:
+            value = value_type(value)
+    except (ValueError, TypeError):
+        raise ValueError("无效的分页游标")
+
+    return value, last_id
+
+def apply_keyset(
+    query: Query,
+    sort_column,
+    id_column,
+    sort_order: str,
+    cursor: Optional[Tuple[Any, int]]
+) -> Query:
+    """
+    按(排序键, id)排序，并从游标位置继续
+    行比较 (a, b) < (x, y) 可直接走复合索引，深页与首页代价相同
+    """
+    if sort_order == "desc":
+        if cursor is not None:
+            query = query.filter(tuple_(sort_column, id_column) < tuple_(*cursor))
+        return query.order_by(sort_column.desc(), id_column.desc())
+
+    if cursor is not None:
+        query = query.filter(tuple_(sort_column, id_column) > tuple_(*cursor))
+    return query.order_by(sort_column.asc(), id_column.asc())
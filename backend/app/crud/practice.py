@@ -0,0 +1,240 @@
+"""
+练习会话和答题记录CRUD操作
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Integer, column, func, insert, text, update, values
+from sqlalchemy.orm import Session
+
+from app.crud.problem import LIST_LOAD_OPTIONS, get_knowledge_point_map, get_random_problems
+from app.models.practice import AnswerRecord, PracticeSession
+from app.models.problem import Problem
+from app.schemas.practice import PracticeConfig, PracticeSessionCreate
+
+def select_session_problems(db: Session, config: PracticeConfig) -> List[Problem]:
+    """按练习配置预选题单（内存ID池抽样，顺序即作答顺序）；count为0时不预选"""
+    if not config.count:
+        return []
+    return get_random_problems(
+        db,
+        count=config.count,
+        difficulty_range=config.difficulty or None,
+        knowledge_point_ids=config.knowledge_points or None,
+        knowledge_point_match=config.knowledge_point_match,
+        include_descendants=config.include_descendants,
+    )
+
+def create_session(
+    db: Session,
+    user_id: int,
+    session_create: PracticeSessionCreate,
+    problem_ids: Optional[List[int]] = None
+) -> PracticeSession:
+    """创建练习会话；problem_ids为预选题单，总题数即题单长度"""
+    db_session = PracticeSession(
+        user_id=user_id,
+        session_type=session_create.session_type,
+        config=session_create.config.model_dump(),
+        total_questions=len(problem_ids) if problem_ids else session_create.total_questions,
+        problem_ids=problem_ids or None,
+    )
+    db.add(db_session)
+    db.commit()
+    db.refresh(db_session)
+    return db_session
+
+def get_session(db: Session, session_id: int) -> Optional[PracticeSession]:
+    """获取练习会话"""
+    return db.get(PracticeSession, session_id)
+
+def get_session_problems(db: Session, session_id: int) -> Tuple[Optional[PracticeSession], List[Problem]]:
+    """
+    获取进行中的会话及其题单中的题目（按题单顺序，两次查询）
+    会话不存在或已结束时返回 (None, [])，自由练习返回 (会话, [])；题单中已被物理删除的题目跳过
+    """
+    db_session = db.query(PracticeSession).filter(
+        PracticeSession.id == session_id,
+        PracticeSession.status == "in_progress"
+    ).first()
+    if db_session is None or not db_session.problem_ids:
+        return db_session, []
+    
+    problems = db.query(Problem).options(*LIST_LOAD_OPTIONS).filter(
+        Problem.id.in_(db_session.problem_ids)
+    ).all()
+    by_id = {problem.id: problem for problem in problems}
+    return db_session, [by_id[pid] for pid in db_session.problem_ids if pid in by_id]
+
+def complete_session(
+    db: Session,
+    session_id: int,
+    user_id: int,
+    position: Optional[int] = None
+) -> Optional[PracticeSession]:
+    """
+    完成练习会话并计算用时、正确率（提交事务）
+    行锁与答题批次写入互斥；会话不存在、不属于该用户或已结束时返回None
+    """
+    db_session = db.query(PracticeSession).filter(
+        PracticeSession.id == session_id,
+        PracticeSession.user_id == user_id,
+        PracticeSession.status == "in_progress"
+    ).with_for_update().first()
+    if db_session is None:
+        return None
+    
+    if position is not None:
+        db_session.current_index = max(db_session.current_index or 0, position)
+    db_session.last_activity_at = datetime.now(timezone.utc)
+    db_session.complete_session()
+    db.commit()
+    return db_session
+
+def save_session_progress(db: Session, positions: Dict[int, int]) -> int:
+    """
+    批量写回会话进度（不提交事务）：一条 UPDATE ... FROM (VALUES ...)，同时刷新最近活动时间
+    进度只前进不后退；已结束的会话不更新
+    """
+    if not positions:
+        return 0
+    
+    progress = values(
+        column("session_id", Integer),
+        column("position", Integer),
+        name="v"
+    ).data(sorted(positions.items()))
+    return db.execute(
+        update(PracticeSession)
+        .where(
+            PracticeSession.id == progress.c.session_id,
+            PracticeSession.status == "in_progress"
+        )
+        .values(
+            current_index=func.greatest(func.coalesce(PracticeSession.current_index, 0), progress.c.position),
+            last_activity_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+def abandon_idle_sessions(db: Session, idle_minutes: int, limit: int = 1000) -> List[int]:
+    """
+    将超过idle_minutes未活动的进行中会话标记为abandoned（不提交事务），返回会话ID
+    由 (last_activity_at) WHERE status = 'in_progress' 部分索引定位；SKIP LOCKED不等待正在写入的会话
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(minutes=idle_minutes)
+    idle = db.query(PracticeSession.id).filter(
+        PracticeSession.status == "in_progress",
+        PracticeSession.last_activity_at < cutoff
+    ).order_by(PracticeSession.last_activity_at).limit(limit).with_for_update(skip_locked=True)
+    
+    return db.execute(
+        update(PracticeSession)
+        .where(PracticeSession.id.in_(idle.scalar_subquery()))
+        .values(status="abandoned", completed_at=func.now())
+        .returning(PracticeSession.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+
+def grade_answer(correct_answer: Optional[str], user_answer: Optional[str]) -> bool:
+    """判分：忽略首尾空白和大小写（选择题答案如 'A'、'a '）"""
+    if correct_answer is None or user_answer is None:
+        return False
+    return user_answer.strip().upper() == correct_answer.strip().upper()
+
+def insert_answer_batch(db: Session, rows: List[Dict[str, Any]]) -> List[Optional[int]]:
+    """
+    批量写入答题记录并累加会话计数（不提交事务）
+    rows为answer_records的列字典，返回与rows对应的答题记录ID；
+    会话不存在、不属于该用户或已结束的行不写入，对应位置为None
+    未带knowledge_point_ids的行由一次get_knowledge_point_map查询补齐，插入时触发器不再逐行查询
+    
+    会话行按ID顺序加锁，与完成/放弃会话互斥，多个批次同时写同一会话时不会死锁
+    """
+    session_ids = sorted({row["session_id"] for row in rows})
+    open_sessions = dict(
+        db.query(PracticeSession.id, PracticeSession.user_id).filter(
+            PracticeSession.id.in_(session_ids),
+            PracticeSession.status == "in_progress"
+        ).order_by(PracticeSession.id).with_for_update().all()
+    )
+    
+    accepted = [
+        index for index, row in enumerate(rows)
+        if open_sessions.get(row["session_id"]) == row["user_id"]
+    ]
+    result: List[Optional[int]] = [None] * len(rows)
+    if not accepted:
+        return result
+    
+    records = [dict(rows[index]) for index in accepted]
+    missing = [record for record in records if record.get("knowledge_point_ids") is None]
+    if missing:
+        kp_map = get_knowledge_point_map(db, {record["problem_id"] for record in missing})
+        for record in missing:
+            record["knowledge_point_ids"] = kp_map.get(record["problem_id"], [])
+    
+    # 多行INSERT ... RETURNING，按参数顺序返回ID
+    ids = db.execute(
+        insert(AnswerRecord).returning(AnswerRecord.id, sort_by_parameter_order=True),
+        records
+    ).scalars().all()
+    for index, answer_id in zip(accepted, ids):
+        result[index] = answer_id
+    
+    # 会话计数：每个会话一行增量，一条 UPDATE ... FROM (VALUES ...)
+    deltas: Dict[int, List[int]] = {}
+    for index in accepted:
+        delta = deltas.setdefault(rows[index]["session_id"], [0, 0])
+        delta[0] += 1
+        if rows[index]["is_correct"]:
+            delta[1] += 1
+    
+    delta_values = values(
+        column("session_id", Integer),
+        column("answered", Integer),
+        column("correct", Integer),
+        name="v"
+    ).data([
+        (session_id, answered, correct)
+        for session_id, (answered, correct) in sorted(deltas.items())
+    ])
+    db.execute(
+        update(PracticeSession)
+        .where(PracticeSession.id == delta_values.c.session_id)
+        .values(
+            completed_questions=func.coalesce(PracticeSession.completed_questions, 0) + delta_values.c.answered,
+            correct_questions=func.coalesce(PracticeSession.correct_questions, 0) + delta_values.c.correct,
+            last_activity_at=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result
+
+# 一批未填充知识点的答题记录：SKIP LOCKED让多个回填进程互不等待，也不阻塞正在写入的事务
+_BACKFILL_KNOWLEDGE_POINTS_SQL = text("""
+WITH batch AS (
+    SELECT id, problem_id
+    FROM answer_records
+    WHERE knowledge_point_ids IS NULL
+    ORDER BY id
+    LIMIT :batch_size
+    FOR UPDATE SKIP LOCKED
+), kp AS (
+    SELECT problem_id, array_agg(knowledge_point_id ORDER BY knowledge_point_id) AS ids
+    FROM problem_knowledge_points
+    WHERE problem_id IN (SELECT problem_id FROM batch)
+    GROUP BY problem_id
+)
+UPDATE answer_records a
+SET knowledge_point_ids = COALESCE(kp.ids, '{}')
+FROM batch LEFT JOIN kp ON kp.problem_id = batch.problem_id
+WHERE a.id = batch.id
+""")
+
+def backfill_answer_knowledge_points(db: Session, batch_size: int = 5000) -> int:
+    """
+    回填一批knowledge_point_ids为NULL的答题记录（不提交事务），返回更新的行数
+    每个题目的知识点只聚合一次；没有知识点的题目填空数组，不会被重复选中
+    """
+    return db.execute(_BACKFILL_KNOWLEDGE_POINTS_SQL, {"batch_size": batch_size}).rowcount
@@ -1,26 +1,280 @@
 """
 题目CRUD操作
 """
-from typing import Optional, List, Dict, Any
-from sqlalchemy.orm import Session
-from sqlalchemy import func, or_, and_
+import re
+from typing import Optional, List, Dict, Any, Tuple
+from sqlalchemy.orm import Session, selectinload, joinedload
+from sqlalchemy import func, or_, and_, cast, exists, insert, update, values, column, text, Integer, Float, REAL
+from sqlalchemy.dialects.postgresql import ARRAY, array
 
 from app.models.problem import Problem, ProblemKnowledgePoint
 from app.models.knowledge_point import KnowledgePoint
+from app.models.user import User  # noqa: F401  下方的加载选项在导入时配置映射，Problem的关系引用User
 from app.schemas.problem import ProblemCreate, ProblemUpdate, ProblemFilter
+from app.crud.pagination import decode_cursor, apply_keyset
+from app.services.problem_sampler import problem_sampler
+from app.services.knowledge_tree import knowledge_tree
+from app.core.cache import TTLCache, TwoTierCache
+from app.core.config import settings
+
+# 题目统计缓存
+stats_cache = TTLCache(ttl=settings.PROBLEM_STATS_CACHE_SECONDS, maxsize=8)
+PROBLEM_STATS_KEY = "problem_stats"
+
+# 题目详情读缓存（进程内LRU + Redis），缓存值带版本号，与数据库版本不一致时重新加载
+problem_cache = TwoTierCache(
+    "problem",
+    ttl=settings.PROBLEM_CACHE_SECONDS,
+    l1_ttl=settings.PROBLEM_LOCAL_CACHE_SECONDS,
+    l1_maxsize=settings.PROBLEM_LOCAL_CACHE_SIZE,
+)
+
+# 全文检索配置（须与problems.search_vector的生成表达式一致）
+SEARCH_CONFIG = "english"
+# ts_rank_cd权重 {D, C, B, A}：标题(A) > 内容(B) > 解析(C)
+SEARCH_RANK_WEIGHTS = [0.1, 0.2, 0.4, 1.0]
+
+# CJK字符范围（须与数据库函数cjk_segment一致）
+CJK_PATTERN = re.compile(r"[\u3400-\u9fff]+")
+CJK_SPLIT_PATTERN = re.compile(r"[\u3400-\u9fff]+|[^\u3400-\u9fff]+")
+
+def _quote_lexeme(token: str) -> str:
+    """转义为to_tsquery中的带引号词素"""
+    return "'" + token.replace("\\", "\\\\").replace("'", "''") + "'"
+
+def _cjk_tsquery(keyword: str) -> str:
+    """
+    把含中文的关键词转换为to_tsquery语法，分词方式与cjk_segment一致：
+    - 多字片段：相邻二元组按短语连接，如 三角形 -> '三角' <-> '角形'
+    - 单字：前缀匹配，如 圆 -> '圆':*
+    - 其他文本：普通词素
+    各部分之间为AND关系
+    """
+    clauses = []
+    for term in keyword.split():
+        for part in CJK_SPLIT_PATTERN.findall(term):
+            if not CJK_PATTERN.fullmatch(part):
+                clauses.append(_quote_lexeme(part))
+            elif len(part) == 1:
+                clauses.append(f"{_quote_lexeme(part)}:*")
+            else:
+                bigrams = [_quote_lexeme(part[i:i + 2]) for i in range(len(part) - 1)]
+                clauses.append("(" + " <-> ".join(bigrams) + ")")
+    return " & ".join(clauses)
+
+def _text_search(keyword: str):
+    """
+    构建全文检索条件和相关度表达式
+    关键词含中文时使用search_vector_cjk（idx_problems_search_cjk），
+    否则使用英文配置的search_vector（idx_problems_search）
+    """
+    if CJK_PATTERN.search(keyword):
+        vector = Problem.search_vector_cjk
+        ts_query = func.to_tsquery("simple", _cjk_tsquery(keyword))
+    else:
+        vector = Problem.search_vector
+        ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, keyword)
+    
+    condition = vector.bool_op("@@")(ts_query)
+    rank = func.ts_rank_cd(
+        cast(array(SEARCH_RANK_WEIGHTS), ARRAY(REAL)),
+        vector,
+        ts_query
+    )
+    return condition, rank
+
+def _with_relevance(rows) -> List[Problem]:
+    """把(题目, 相关度)结果展开为题目列表，相关度挂在relevance属性上供游标使用"""
+    problems = []
+    for problem, relevance in rows:
+        problem.relevance = relevance
+        problems.append(problem)
+    return problems
+
+def resolve_problem_sort(filter_params: Optional[ProblemFilter]) -> Tuple[str, str]:
+    """确定实际排序方式：有搜索词时默认按相关度，否则按创建时间"""
+    if filter_params is None:
+        return "created_at", "desc"
+    
+    sort_by = filter_params.sort_by
+    if sort_by is None:
+        sort_by = "relevance" if filter_params.search else "created_at"
+    elif sort_by == "relevance" and not filter_params.search:
+        sort_by = "created_at"
+    
+    return sort_by, filter_params.sort_order
+
+# 关系加载方案（按端点选择，避免逐行懒加载的N+1查询）
+# 列表：selectinload，每个关系固定一次 IN 查询，不放大主查询的行数
+LIST_LOAD_OPTIONS = (
+    selectinload(Problem.knowledge_points),
+)
+# 详情：joinedload，单行结果一次JOIN取回所有关系
+DETAIL_LOAD_OPTIONS = (
+    joinedload(Problem.knowledge_points),
+    joinedload(Problem.creator),
+    joinedload(Problem.reviewer),
+)
 
 def get_problem(db: Session, problem_id: int) -> Optional[Problem]:
     """根据ID获取题目"""
     return db.query(Problem).filter(Problem.id == problem_id).first()
 
-def get_problems(
+def get_problem_detail(db: Session, problem_id: int) -> Optional[Problem]:
+    """根据ID获取题目详情（一次查询带回知识点、创建者和审核者）"""
+    return db.query(Problem).options(*DETAIL_LOAD_OPTIONS).filter(
+        Problem.id == problem_id
+    ).first()
+
+def get_problem_version(db: Session, problem_id: int):
+    """只读取题目的版本信息(updated_at, is_published)，用于条件请求，不加载整行"""
+    return db.query(
+        Problem.id, Problem.updated_at, Problem.created_at, Problem.is_published
+    ).filter(Problem.id == problem_id).first()
+
+def problem_version_tag(version) -> str:
+    """题目版本标识（updated_at在题目内容或知识点关联变化时刷新，答题计数变化不刷新）"""
+    return (version.updated_at or version.created_at).isoformat()
+
+def _problem_detail_dict(problem: Problem) -> Dict[str, Any]:
+    """题目详情的可缓存表示（与ProblemDetail字段一致，只含JSON可序列化的值）"""
+    data = problem.to_dict(include_solution=True, include_creator=True)
+    data.update({
+        "solution": problem.solution,
+        "solution_type": problem.solution_type,
+        "source_detail": problem.source_detail,
+        "created_by": problem.created_by,
+        "knowledge_points": data.get("knowledge_points", []),
+        "version": problem_version_tag(problem),
+    })
+    return data
+
+def get_problem_detail_cached(db: Session, problem_id: int, version: str) -> Optional[Dict[str, Any]]:
+    """
+    读穿透获取题目详情字典
+    version为get_problem_version得到的当前版本，缓存中的版本不一致时丢弃并重新加载
+    """
+    def load():
+        problem = get_problem_detail(db, problem_id)
+        return _problem_detail_dict(problem) if problem else None
+    
+    data = problem_cache.get_or_load(problem_id, load)
+    if data is not None and data["version"] != version:
+        problem_cache.delete(problem_id)
+        data = problem_cache.get_or_load(problem_id, load)
+    return data
+
+def invalidate_problem_cache(problem_id: int) -> None:
+    """题目或其知识点关联变化后使详情缓存失效"""
+    problem_cache.delete(problem_id)
+    answer_key_cache.delete(problem_id)
+
+# 判分用的标准答案和知识点缓存（进程内LRU + Redis），提交答案时不必每次查询题目和知识点关联
+# 修改题目时与详情缓存一同失效：Redis中的副本立即删除，其他进程的一级缓存在l1_ttl内过期
+answer_key_cache = TwoTierCache(
+    "answer_key",
+    ttl=settings.ANSWER_KEY_CACHE_SECONDS,
+    l1_ttl=settings.PROBLEM_LOCAL_CACHE_SECONDS,
+    l1_maxsize=settings.PROBLEM_LOCAL_CACHE_SIZE,
+)
+
+def load_answer_key(db: Session, problem_id: int) -> Optional[Dict[str, Any]]:
+    """
+    读取判分和写答题记录所需的字段（题目不存在或已删除时返回None）
+    knowledge_point_ids直接写入answer_records，插入时不再由触发器逐行查询
+    """
+    row = db.query(Problem.correct_answer).filter(
+        Problem.id == problem_id,
+        Problem.is_deleted == False
+    ).first()
+    if row is None:
+        return None
+    
+    return {
+        "correct_answer": row.correct_answer,
+        "knowledge_point_ids": get_knowledge_point_map(db, [problem_id]).get(problem_id, []),
+    }
+
+def get_knowledge_point_map(db: Session, problem_ids) -> Dict[int, List[int]]:
+    """题目ID -> 知识点ID列表（升序，与fill_answer_knowledge_points一致），一次查询"""
+    problem_ids = list(set(problem_ids))
+    if not problem_ids:
+        return {}
+    
+    rows = db.query(
+        ProblemKnowledgePoint.problem_id, ProblemKnowledgePoint.knowledge_point_id
+    ).filter(
+        ProblemKnowledgePoint.problem_id.in_(problem_ids)
+    ).order_by(ProblemKnowledgePoint.problem_id, ProblemKnowledgePoint.knowledge_point_id).all()
+    
+    mapping: Dict[int, List[int]] = {}
+    for problem_id, kp_id in rows:
+        mapping.setdefault(problem_id, []).append(kp_id)
+    return mapping
+
+def get_problem_collection_version(db: Session) -> Optional[int]:
+    """题目集合版本号（problems或知识点关联任意写入后由触发器递增）"""
+    return db.execute(
+        text("SELECT version FROM collection_versions WHERE name = 'problems'")
+    ).scalar()
+
+# 列表快速输出路径读取的列（与ProblemListRow一致），正确率在SQL中计算
+PROBLEM_LIST_COLUMNS = (
+    Problem.id, Problem.title, Problem.content, Problem.content_type,
+    Problem.options, Problem.correct_answer, Problem.solution, Problem.solution_type,
+    Problem.difficulty, Problem.source_type, Problem.source_year, Problem.source_detail,
+    Problem.estimated_time, Problem.is_published, Problem.review_status,
+    Problem.total_attempts, Problem.correct_attempts,
+    cast(func.coalesce(
+        Problem.correct_attempts * 100.0 / func.nullif(Problem.total_attempts, 0), 0
+    ), Float).label("accuracy_rate"),
+    Problem.created_by, Problem.created_at, Problem.updated_at,
+)
+
+def expand_knowledge_points(
     db: Session,
-    skip: int = 0,
-    limit: int = 100,
-    filter_params: Optional[ProblemFilter] = None
-) -> List[Problem]:
-    """获取题目列表（带过滤）"""
-    query = db.query(Problem)
+    kp_ids: List[int],
+    include_descendants: bool = True
+) -> List[set]:
+    """
+    每个知识点展开为其子树（含自身）的ID集合，从内存中的知识点树读取
+    树中还没有的ID（其他进程刚创建）按自身处理
+    """
+    kp_ids = list(dict.fromkeys(kp_ids))
+    if not include_descendants:
+        return [{kp_id} for kp_id in kp_ids]
+    
+    tree = knowledge_tree.snapshot(db)
+    return [tree.subtree_ids(kp_id) or {kp_id} for kp_id in kp_ids]
+
+def knowledge_point_condition(groups: List[set], match_all: bool = False):
+    """
+    知识点过滤条件：EXISTS (problem_knowledge_points ...)
+    match_all=False：命中任一组即可，合并为一个EXISTS；
+    match_all=True：每组各一个EXISTS，须全部命中
+    均可由 (problem_id, knowledge_point_id) 主键或 (knowledge_point_id, problem_id) 索引直接回答，不回表
+    """
+    def has_any(kp_ids):
+        return exists().where(
+            ProblemKnowledgePoint.problem_id == Problem.id,
+            ProblemKnowledgePoint.knowledge_point_id.in_(sorted(kp_ids))
+        )
+    
+    if match_all:
+        return and_(*(has_any(group) for group in groups))
+    return has_any(set().union(*groups))
+
+def _query_problem_list(
+    db: Session,
+    query,
+    skip: int,
+    limit: int,
+    filter_params: Optional[ProblemFilter],
+    cursor: Optional[str]
+):
+    """在query上应用过滤、排序和分页，返回(结果行, 排序字段)"""
+    sort_by, sort_order = resolve_problem_sort(filter_params)
+    rank = None
     
     if filter_params:
         # 难度过滤
@@ -34,45 +288,86 @@ def get_problems(
         if filter_params.source_year:
             query = query.filter(Problem.source_year == filter_params.source_year)
         
-        # 知识点过滤
+        # 知识点过滤（含子知识点，EXISTS半连接，不产生重复行）
+        kp_ids = list(filter_params.knowledge_point_ids or [])
         if filter_params.knowledge_point_id:
-            query = query.join(Problem.knowledge_points).filter(
-                KnowledgePoint.id == filter_params.knowledge_point_id
+            kp_ids.insert(0, filter_params.knowledge_point_id)
+        if kp_ids:
+            groups = expand_knowledge_points(db, kp_ids, filter_params.include_descendants)
+            query = query.filter(
+                knowledge_point_condition(groups, filter_params.knowledge_point_match == "all")
             )
         
         # 发布状态过滤
         if filter_params.is_published is not None:
             query = query.filter(Problem.is_published == filter_params.is_published)
         
-        # 搜索
+        # 搜索（全文检索）
         if filter_params.search:
-            search_term = f"%{filter_params.search}%"
-            query = query.filter(
-                or_(
-                    Problem.title.ilike(search_term),
-                    Problem.content.ilike(search_term),
-                    Problem.solution.ilike(search_term)
-                )
-            )
-        
-        # 排序
-        sort_column = getattr(Problem, filter_params.sort_by, Problem.created_at)
-        if filter_params.sort_order == "desc":
-            query = query.order_by(sort_column.desc())
-        else:
-            query = query.order_by(sort_column.asc())
+            condition, rank = _text_search(filter_params.search)
+            query = query.filter(condition)
     
     # 排除已删除的题目
     query = query.filter(Problem.is_deleted == False)
     
-    return query.offset(skip).limit(limit).all()
+    # 排序（id作为次级排序键，保证游标稳定）
+    if sort_by == "relevance":
+        sort_column = rank
+        query = query.add_columns(rank.label("relevance"))
+    else:
+        sort_column = getattr(Problem, sort_by)
+    
+    keyset = decode_cursor(cursor, sort_by, sort_order) if cursor else None
+    query = apply_keyset(query, sort_column, Problem.id, sort_order, keyset)
+    
+    if keyset is None and skip:
+        query = query.offset(skip)
+    
+    return query.limit(limit).all(), sort_by
+
+def get_problems(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    filter_params: Optional[ProblemFilter] = None,
+    cursor: Optional[str] = None
+) -> List[Problem]:
+    """
+    获取题目列表（带过滤）
+    传入cursor时使用游标分页（忽略skip），否则沿用skip/limit
+    """
+    rows, sort_by = _query_problem_list(db, db.query(Problem), skip, limit, filter_params, cursor)
+    if sort_by == "relevance":
+        return _with_relevance(rows)
+    return rows
+
+def get_problem_rows(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    filter_params: Optional[ProblemFilter] = None,
+    cursor: Optional[str] = None
+) -> list:
+    """
+    获取题目列表的列元组（过滤、排序、分页与get_problems相同）
+    不构造ORM对象，结果行可直接交给problem_list_adapter序列化；
+    行对象支持按属性取排序字段，可用于next_cursor
+    """
+    rows, _ = _query_problem_list(
+        db, db.query(*PROBLEM_LIST_COLUMNS), skip, limit, filter_params, cursor
+    )
+    return rows
 
 def create_problem(
     db: Session,
     problem_create: ProblemCreate,
     created_by: int
 ) -> Problem:
-    """创建新题目"""
+    """创建新题目（单次flush、单次提交）"""
+    # 一次IN查询校验知识点
+    kp_ids = list(dict.fromkeys(problem_create.knowledge_point_ids))
+    _validate_knowledge_point_ids(db, kp_ids)
+    
     # 创建题目对象
     db_problem = Problem(
         title=problem_create.title,
@@ -90,86 +385,179 @@ def create_problem(
         is_published=problem_create.is_published,
         created_by=created_by,
     )
-    
     db.add(db_problem)
+    
+    # 关联知识点（第一个为主要知识点），与题目在同一次flush中插入
+    for index, kp_id in enumerate(kp_ids):
+        db.add(ProblemKnowledgePoint(
+            problem=db_problem,
+            knowledge_point_id=kp_id,
+            is_primary=index == 0
+        ))
+    
     db.commit()
-    db.refresh(db_problem)
-    
-    # 关联知识点
-    if problem_create.knowledge_point_ids:
-        for kp_id in problem_create.knowledge_point_ids:
-            # 验证知识点是否存在
-            knowledge_point = db.query(KnowledgePoint).filter(
-                KnowledgePoint.id == kp_id
-            ).first()
-            
-            if knowledge_point:
-                association = ProblemKnowledgePoint(
-                    problem_id=db_problem.id,
-                    knowledge_point_id=kp_id,
-                    is_primary=True if kp_id == problem_create.knowledge_point_ids[0] else False
-                )
-                db.add(association)
-        
-        db.commit()
-        db.refresh(db_problem)
+    invalidate_problem_stats()
+    
+    if db_problem.is_published:
+        problem_sampler.refresh_problem(db_problem.id, True, db_problem.difficulty, kp_ids)
     
     return db_problem
 
+def get_existing_knowledge_point_ids(db: Session, kp_ids) -> set:
+    """一次IN查询返回其中真实存在的知识点ID"""
+    kp_ids = set(kp_ids)
+    if not kp_ids:
+        return set()
+    rows = db.query(KnowledgePoint.id).filter(KnowledgePoint.id.in_(kp_ids)).all()
+    return {row.id for row in rows}
+
+def _validate_knowledge_point_ids(db: Session, kp_ids: List[int]) -> None:
+    """校验知识点全部存在，否则抛出ValueError"""
+    missing = set(kp_ids) - get_existing_knowledge_point_ids(db, kp_ids)
+    if missing:
+        raise ValueError(f"知识点不存在: {', '.join(str(kp_id) for kp_id in sorted(missing))}")
+
+def bulk_create_problems(
+    db: Session,
+    problems: List[ProblemCreate],
+    created_by: int
+) -> List[int]:
+    """
+    批量创建题目（不提交事务）
+    题目用一条多行 INSERT ... RETURNING 写入，知识点关联同样批量插入；
+    调用方需保证知识点ID已校验存在
+    """
+    if not problems:
+        return []
+    
+    rows = [
+        {**problem.model_dump(exclude={"knowledge_point_ids"}), "created_by": created_by}
+        for problem in problems
+    ]
+    result = db.execute(
+        insert(Problem).returning(Problem.id, sort_by_parameter_order=True),
+        rows
+    )
+    problem_ids = [row.id for row in result]
+    
+    links = []
+    for problem_id, problem in zip(problem_ids, problems):
+        # 去重并保持顺序，第一个为主要知识点
+        for index, kp_id in enumerate(dict.fromkeys(problem.knowledge_point_ids)):
+            links.append({
+                "problem_id": problem_id,
+                "knowledge_point_id": kp_id,
+                "is_primary": index == 0,
+            })
+    if links:
+        db.execute(insert(ProblemKnowledgePoint), links)
+    
+    return problem_ids
+
 def update_problem(
     db: Session,
     db_problem: Problem,
-    problem_update: ProblemUpdate
+    problem_update: ProblemUpdate,
+    invalidate_cache: bool = True
 ) -> Problem:
-    """更新题目"""
+    """
+    更新题目（单次提交）
+    知识点只增删有变化的关联，未变化的关联不会触发update_kp_count触发器
+    invalidate_cache为False时由调用者在提交后使详情缓存失效（异步调用者在线程中访问Redis）
+    """
     update_data = problem_update.model_dump(exclude_unset=True)
     
     # 处理知识点更新
     knowledge_point_ids = update_data.pop("knowledge_point_ids", None)
+    if knowledge_point_ids is not None:
+        knowledge_point_ids = list(dict.fromkeys(knowledge_point_ids))
+        _validate_knowledge_point_ids(db, knowledge_point_ids)
+    
+    # 抽题ID池只关心发布状态、难度和知识点
+    affects_sampler = knowledge_point_ids is not None or any(
+        field in update_data for field in ("is_published", "difficulty")
+    )
     
     # 更新其他字段
     for field, value in update_data.items():
         setattr(db_problem, field, value)
     
-    # 更新知识点关联
+    # 更新知识点关联（只处理差异）
     if knowledge_point_ids is not None:
-        # 删除现有关联
-        db.query(ProblemKnowledgePoint).filter(
-            ProblemKnowledgePoint.problem_id == db_problem.id
-        ).delete()
+        current = {
+            link.knowledge_point_id: link
+            for link in db.query(ProblemKnowledgePoint).filter(
+                ProblemKnowledgePoint.problem_id == db_problem.id
+            )
+        }
+        
+        removed = set(current) - set(knowledge_point_ids)
+        links_changed = bool(removed)
+        if removed:
+            db.query(ProblemKnowledgePoint).filter(
+                ProblemKnowledgePoint.problem_id == db_problem.id,
+                ProblemKnowledgePoint.knowledge_point_id.in_(removed)
+            ).delete(synchronize_session=False)
         
-        # 添加新关联
-        for kp_id in knowledge_point_ids:
-            knowledge_point = db.query(KnowledgePoint).filter(
-                KnowledgePoint.id == kp_id
-            ).first()
-            
-            if knowledge_point:
-                association = ProblemKnowledgePoint(
+        for index, kp_id in enumerate(knowledge_point_ids):
+            is_primary = index == 0
+            link = current.get(kp_id)
+            if link is None:
+                db.add(ProblemKnowledgePoint(
                     problem_id=db_problem.id,
                     knowledge_point_id=kp_id,
-                    is_primary=True if kp_id == knowledge_point_ids[0] else False
-                )
-                db.add(association)
+                    is_primary=is_primary
+                ))
+                links_changed = True
+            elif link.is_primary != is_primary:
+                link.is_primary = is_primary
+                links_changed = True
+        
+        if links_changed:
+            # 关联属于详情内容：刷新updated_at，使详情ETag和缓存版本随之变化
+            db_problem.updated_at = func.now()
+        
+        # 关联已变化，下次访问时重新加载
+        db.expire(db_problem, ["knowledge_points"])
     
     db.commit()
-    db.refresh(db_problem)
+    if invalidate_cache:
+        invalidate_problem_cache(db_problem.id)
+    
+    if any(field in update_data for field in ("is_published", "difficulty", "source_type")):
+        invalidate_problem_stats()
+    
+    if affects_sampler:
+        if knowledge_point_ids is None:
+            problem_sampler.refresh_from(db_problem)
+        else:
+            problem_sampler.refresh_problem(
+                db_problem.id,
+                bool(db_problem.is_published and not db_problem.is_deleted),
+                db_problem.difficulty,
+                knowledge_point_ids,
+            )
     
     return db_problem
 
-def delete_problem(db: Session, problem_id: int) -> bool:
-    """删除题目（软删除）"""
+def delete_problem(db: Session, problem_id: int, invalidate_cache: bool = True) -> bool:
+    """删除题目（软删除）；invalidate_cache同update_problem"""
     problem = get_problem(db, problem_id)
     if not problem:
         return False
     
     problem.is_deleted = True
     db.commit()
+    invalidate_problem_stats()
+    if invalidate_cache:
+        invalidate_problem_cache(problem_id)
+    
+    problem_sampler.discard([problem_id])
     
     return True
 
-def publish_problem(db: Session, problem_id: int, publish: bool = True) -> bool:
-    """发布或取消发布题目"""
+def publish_problem(db: Session, problem_id: int, publish: bool = True, invalidate_cache: bool = True) -> bool:
+    """发布或取消发布题目；invalidate_cache同update_problem"""
     problem = get_problem(db, problem_id)
     if not problem:
         return False
@@ -181,123 +569,169 @@ def publish_problem(db: Session, problem_id: int, publish: bool = True) -> bool:
         problem.reviewed_at = func.now()
     
     db.commit()
+    invalidate_problem_stats()
+    if invalidate_cache:
+        invalidate_problem_cache(problem_id)
+    
+    problem_sampler.refresh_from(problem)
     return True
 
-def get_problem_stats(db: Session) -> Dict[str, Any]:
-    """获取题目统计信息"""
-    # 总数
-    total = db.query(func.count(Problem.id)).filter(
-        Problem.is_deleted == False
-    ).scalar()
-    
-    # 已发布数量
-    published = db.query(func.count(Problem.id)).filter(
-        Problem.is_deleted == False,
-        Problem.is_published == True
-    ).scalar()
-    
-    # 按难度统计
-    difficulty_stats = db.query(
-        Problem.difficulty,
-        func.count(Problem.id).label("count")
-    ).filter(
-        Problem.is_deleted == False,
-        Problem.is_published == True
-    ).group_by(
-        Problem.difficulty
-    ).all()
-    
-    difficulty_dict = {row.difficulty: row.count for row in difficulty_stats}
-    
-    # 按来源统计
-    source_stats = db.query(
-        Problem.source_type,
-        func.count(Problem.id).label("count")
-    ).filter(
-        Problem.is_deleted == False,
-        Problem.is_published == True,
-        Problem.source_type.isnot(None)
-    ).group_by(
-        Problem.source_type
-    ).all()
+# 题目统计：一次扫描，GROUPING SETS同时得到总计/按难度/按来源三组结果
+PROBLEM_STATS_SQL = text("""
+    SELECT
+        difficulty,
+        source_type,
+        GROUPING(difficulty) AS by_difficulty,
+        GROUPING(source_type) AS by_source,
+        COUNT(*) AS total,
+        COUNT(*) FILTER (WHERE is_published) AS published,
+        AVG(correct_attempts::float / NULLIF(total_attempts, 0)::float)
+            FILTER (WHERE total_attempts > 0) AS avg_accuracy
+    FROM problems
+    WHERE is_deleted = FALSE
+    GROUP BY GROUPING SETS ((), (difficulty), (source_type))
+""")
+
+def _compute_problem_stats(db: Session) -> Dict[str, Any]:
+    """单次扫描计算题目统计"""
+    total, published, avg_accuracy = 0, 0, None
+    difficulty_dict: Dict[int, int] = {}
+    source_dict: Dict[str, int] = {}
     
-    source_dict = {row.source_type: row.count for row in source_stats}
-    
-    # 平均正确率
-    avg_accuracy = db.query(
-        func.avg(
-            func.cast(Problem.correct_attempts, func.FLOAT) /
-            func.nullif(func.cast(Problem.total_attempts, func.FLOAT), 0)
-        ).label("avg_accuracy")
-    ).filter(
-        Problem.is_deleted == False,
-        Problem.total_attempts > 0
-    ).scalar() or 0.0
+    for row in db.execute(PROBLEM_STATS_SQL):
+        if row.by_difficulty and row.by_source:
+            # 总计行
+            total, published, avg_accuracy = row.total, row.published, row.avg_accuracy
+        elif not row.by_difficulty:
+            # 按难度统计（只统计已发布）
+            if row.published:
+                difficulty_dict[row.difficulty] = row.published
+        elif row.source_type is not None and row.published:
+            # 按来源统计（只统计已发布）
+            source_dict[row.source_type] = row.published
     
     return {
         "total_problems": total or 0,
         "published_problems": published or 0,
         "by_difficulty": difficulty_dict,
         "by_source": source_dict,
-        "avg_accuracy": round(avg_accuracy * 100, 2),
+        "avg_accuracy": round((avg_accuracy or 0.0) * 100, 2),
     }
 
+def get_problem_stats(db: Session) -> Dict[str, Any]:
+    """获取题目统计信息（TTL缓存，并发未命中只查询一次）"""
+    return stats_cache.get_or_load(PROBLEM_STATS_KEY, lambda: _compute_problem_stats(db))
+
+def invalidate_problem_stats() -> None:
+    """题目创建、发布、删除后使统计缓存失效"""
+    stats_cache.delete(PROBLEM_STATS_KEY)
+
 def get_random_problems(
     db: Session,
     count: int = 10,
     difficulty_range: Optional[List[int]] = None,
-    knowledge_point_ids: Optional[List[int]] = None
+    knowledge_point_ids: Optional[List[int]] = None,
+    knowledge_point_match: str = "any",
+    include_descendants: bool = True
 ) -> List[Problem]:
-    """获取随机题目"""
-    query = db.query(Problem).filter(
+    """
+    获取随机题目
+    从内存ID池均匀抽取题目ID，再按主键取回，避免ORDER BY random()
+    知识点默认包含其子知识点；knowledge_point_match为"all"时须命中每一个知识点
+    """
+    groups = None
+    if knowledge_point_ids:
+        groups = expand_knowledge_points(db, knowledge_point_ids, include_descendants)
+    
+    problem_ids = problem_sampler.sample_ids(
+        db, count, difficulty_range=difficulty_range,
+        knowledge_point_groups=groups, match_all=knowledge_point_match == "all"
+    )
+    if not problem_ids:
+        return []
+    
+    # 按主键取回，同时复核状态（其他进程可能刚刚取消发布或删除）
+    problems = db.query(Problem).options(*LIST_LOAD_OPTIONS).filter(
+        Problem.id.in_(problem_ids),
         Problem.is_deleted == False,
         Problem.is_published == True
-    )
+    ).all()
     
-    # 难度过滤
-    if difficulty_range:
-        query = query.filter(Problem.difficulty.in_(difficulty_range))
+    if len(problems) < len(problem_ids):
+        found = {problem.id for problem in problems}
+        problem_sampler.discard(pid for pid in problem_ids if pid not in found)
     
-    # 知识点过滤
-    if knowledge_point_ids:
-        query = query.join(Problem.knowledge_points).filter(
-            KnowledgePoint.id.in_(knowledge_point_ids)
-        )
+    # 保持抽样顺序
+    position = {pid: index for index, pid in enumerate(problem_ids)}
+    problems.sort(key=lambda problem: position[problem.id])
     
-    # 随机排序并限制数量
-    query = query.order_by(func.random()).limit(count)
+    return problems
+
+def problem_exists(db: Session, problem_id: int) -> bool:
+    """题目是否存在且未删除（只查主键，不加载整行）"""
+    return db.query(Problem.id).filter(
+        Problem.id == problem_id,
+        Problem.is_deleted == False
+    ).first() is not None
+
+def apply_attempt_deltas(db: Session, deltas: Dict[int, Tuple[int, int]]) -> int:
+    """
+    批量累加答题统计（不提交事务）
+    deltas: 题目ID -> (答题次数增量, 正确次数增量)
+    一条 UPDATE ... FROM (VALUES ...) 原子累加，并发提交不会丢失更新；
+    按题目ID排序，多个进程同时刷新时加锁顺序一致，避免死锁
+    """
+    if not deltas:
+        return 0
     
-    return query.all()
+    delta_values = values(
+        column("problem_id", Integer),
+        column("total_delta", Integer),
+        column("correct_delta", Integer),
+        name="v"
+    ).data([
+        (problem_id, total, correct)
+        for problem_id, (total, correct) in sorted(deltas.items())
+    ])
+    
+    result = db.execute(
+        update(Problem)
+        .where(Problem.id == delta_values.c.problem_id)
+        .values(
+            total_attempts=func.coalesce(Problem.total_attempts, 0) + delta_values.c.total_delta,
+            correct_attempts=func.coalesce(Problem.correct_attempts, 0) + delta_values.c.correct_delta,
+            # 保持原值，避免onupdate刷新updated_at（计数不属于题目内容版本）
+            updated_at=Problem.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
 
 def increment_attempts(db: Session, problem_id: int, is_correct: bool) -> bool:
-    """增加题目答题统计"""
-    problem = get_problem(db, problem_id)
-    if not problem:
-        return False
-    
-    problem.increment_attempts(is_correct)
+    """立即增加单个题目的答题统计（无需先读取题目）"""
+    updated = apply_attempt_deltas(db, {problem_id: (1, 1 if is_correct else 0)})
     db.commit()
-    
-    return True
+    return updated > 0
 
 def search_problems(
     db: Session,
     keyword: str,
     skip: int = 0,
-    limit: int = 50
+    limit: int = 50,
+    cursor: Optional[str] = None
 ) -> List[Problem]:
-    """搜索题目"""
-    search_term = f"%{keyword}%"
+    """搜索题目（全文检索，按相关度排序，支持游标分页）"""
+    condition, rank = _text_search(keyword)
     
-    query = db.query(Problem).filter(
+    query = db.query(Problem, rank.label("relevance")).filter(
         Problem.is_deleted == False,
         Problem.is_published == True
-    ).filter(
-        or_(
-            Problem.title.ilike(search_term),
-            Problem.content.ilike(search_term),
-            Problem.solution.ilike(search_term)
-        )
-    )
+    ).filter(condition)
+    
+    keyset = decode_cursor(cursor, "relevance", "desc") if cursor else None
+    query = apply_keyset(query, rank, Problem.id, "desc", keyset)
+    
+    if keyset is None and skip:
+        query = query.offset(skip)
     
-    return query.order_by(Problem.created_at.desc()).offset(skip).limit(limit).all()
+    return _with_relevance(query.limit(limit).all())
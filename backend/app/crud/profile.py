@@ -0,0 +1,94 @@
+"""
+学生画像CRUD操作
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.practice import AnswerRecord
+from app.models.problem import Problem
+from app.models.user import StudentProfile
+
+PROFILE_CURSOR = "student_profiles"
+
+# 画像增量更新写回的列
+PROFILE_STATE_COLUMNS = (
+    "total_practice_time", "total_problems_attempted", "total_correct", "overall_accuracy",
+    "knowledge_mastery", "difficulty_performance", "weekly_progress", "last_calculated_at",
+)
+
+def get_profile(db: Session, user_id: int) -> Optional[StudentProfile]:
+    """获取学生画像"""
+    return db.query(StudentProfile).filter(StudentProfile.user_id == user_id).first()
+
+def lock_profile_cursor(db: Session) -> Optional[int]:
+    """
+    锁定画像更新游标并返回已合并到的answer_records.id（锁持续到事务结束）
+    其他进程正在处理时返回None（SKIP LOCKED，不等待）
+    """
+    return db.execute(
+        text("SELECT position FROM job_cursors WHERE name = :name FOR UPDATE SKIP LOCKED"),
+        {"name": PROFILE_CURSOR}
+    ).scalar()
+
+def advance_profile_cursor(db: Session, position: int) -> None:
+    """推进画像更新游标（不提交事务）"""
+    db.execute(
+        text("UPDATE job_cursors SET position = :position, updated_at = now() WHERE name = :name"),
+        {"name": PROFILE_CURSOR, "position": position}
+    )
+
+def get_answers_after(db: Session, after_id: int, settle_seconds: int, limit: int):
+    """
+    按ID顺序读取游标之后的一批答题记录（主键范围扫描，只取画像需要的列和题目难度）
+    只返回写入超过settle_seconds的连续前缀：ID在事务开始时分配，提交顺序可能与ID顺序不同，
+    遇到第一条未稳定的记录即停止（而不是跳过它继续读取），游标不会越过较小ID的记录
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settle_seconds)
+    rows = db.query(
+        AnswerRecord.id, AnswerRecord.user_id, AnswerRecord.is_correct, AnswerRecord.time_spent,
+        AnswerRecord.answered_at, AnswerRecord.created_at, AnswerRecord.knowledge_point_ids,
+        Problem.difficulty
+    ).join(
+        Problem, Problem.id == AnswerRecord.problem_id
+    ).filter(
+        AnswerRecord.id > after_id
+    ).order_by(AnswerRecord.id).limit(limit).all()
+    
+    for index, row in enumerate(rows):
+        if row.created_at is not None and row.created_at >= cutoff:
+            return rows[:index]
+    return rows
+
+def get_profile_states(db: Session, user_ids) -> Dict[int, Dict[str, Any]]:
+    """用户ID -> 画像当前状态（PROFILE_STATE_COLUMNS），一次查询；没有画像的用户不在结果中"""
+    user_ids = list(set(user_ids))
+    if not user_ids:
+        return {}
+    
+    columns = [getattr(StudentProfile, name) for name in PROFILE_STATE_COLUMNS]
+    rows = db.query(StudentProfile.user_id, *columns).filter(
+        StudentProfile.user_id.in_(user_ids)
+    ).all()
+    return {row.user_id: row._asdict() for row in rows}
+
+def save_profile_states(db: Session, states: List[Dict[str, Any]]) -> int:
+    """
+    批量写回画像（不提交事务）：一条多行 INSERT ... ON CONFLICT (user_id) DO UPDATE
+    states中每项为user_id加PROFILE_STATE_COLUMNS，没有画像的用户新建
+    """
+    if not states:
+        return 0
+    
+    statement = insert(StudentProfile).values([
+        {"user_id": state["user_id"], **{name: state[name] for name in PROFILE_STATE_COLUMNS}}
+        for state in sorted(states, key=lambda state: state["user_id"])
+    ])
+    statement = statement.on_conflict_do_update(
+        index_elements=[StudentProfile.user_id],
+        set_={name: statement.excluded[name] for name in PROFILE_STATE_COLUMNS}
+    )
+    return db.execute(statement).rowcount
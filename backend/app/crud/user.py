@@ -7,7 +7,7 @@ from sqlalchemy import func
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash, verify_password, invalidate_principal
 
 def get_user(db: Session, user_id: int) -> Optional[User]:
     """根据ID获取用户"""
@@ -39,8 +39,15 @@ def get_users(
     
     return query.order_by(User.created_at.desc()).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user_create: UserCreate) -> User:
-    """创建新用户"""
+def create_user(
+    db: Session,
+    user_create: UserCreate,
+    hashed_password: Optional[str] = None
+) -> User:
+    """
+    创建新用户
+    hashed_password：调用方已计算好的密码哈希（异步路由在线程池中预先计算）
+    """
     # 检查用户名是否已存在
     existing_user = get_user_by_username(db, user_create.username)
     if existing_user:
@@ -56,7 +63,7 @@ def create_user(db: Session, user_create: UserCreate) -> User:
     db_user = User(
         username=user_create.username,
         email=user_create.email,
-        hashed_password=get_password_hash(user_create.password),
+        hashed_password=hashed_password or get_password_hash(user_create.password),
         full_name=user_create.full_name,
         role=user_create.role,
         grade=user_create.grade,
@@ -92,6 +99,10 @@ def update_user(
     db.commit()
     db.refresh(db_user)
     
+    # 禁用或角色变化：已缓存的调用者信息失效
+    if "is_active" in update_data or "role" in update_data:
+        invalidate_principal(db_user.username)
+    
     return db_user
 
 def delete_user(db: Session, user_id: int) -> bool:
@@ -102,6 +113,7 @@ def delete_user(db: Session, user_id: int) -> bool:
     
     user.is_active = False
     db.commit()
+    invalidate_principal(user.username)
     
     return True
 
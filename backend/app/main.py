@@ -5,14 +5,27 @@ from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
+import secrets
 import time
 
 from app.core.config import settings
 from app.core.logging_config import logger
-from app.core.database import init_db
-from app.api.routes import auth, problems
+from app.core.database import init_db, async_engine, publish_request_writes
+from app.core.query_stats import track_queries, notify_request
+from app.core.metrics import (
+    REQUESTS_IN_PROGRESS, UNMATCHED_ROUTE, observe_request, render_metrics,
+    register_cache, register_password_pool
+)
+from app.core.security import password_pool, principal_cache
+from app.api.routes import auth, problems, knowledge_points, practice
+from app.crud.problem import answer_key_cache, problem_cache, stats_cache  # 在路由之后导入，此时所有模型已注册
+from app.services.attempt_buffer import attempt_buffer
+from app.services.knowledge_point_counts import kp_count_folder
+from app.services.answer_writer import answer_writer
+from app.services.practice_engine import practice_engine, session_cache
+from app.services.student_profiles import profile_updater
 
 # 应用生命周期管理
 @asynccontextmanager
@@ -33,6 +46,17 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ 数据库初始化失败: {e}")
         raise
     
+    # 启动答题统计写缓冲和知识点题目数合并任务
+    attempt_buffer.start()
+    kp_count_folder.start()
+    
+    # 启动学生画像增量更新（只合并新增的答题记录）
+    profile_updater.start()
+    
+    # 启动答题记录批量写入和练习会话引擎（进度写回、放弃会话清理）
+    answer_writer.start()
+    practice_engine.start()
+    
     # macOS特化：开发环境信息
     if settings.MACOS_DEV_MODE:
         import platform
@@ -45,7 +69,14 @@ async def lifespan(app: FastAPI):
     
     yield
     
-    # 关闭时
+    # 关闭时：写完排队的答题记录并写回练习进度，刷新尚未写回的答题统计，合并剩余的知识点题目数增量
+    await answer_writer.stop()
+    await practice_engine.stop()
+    attempt_buffer.stop()
+    kp_count_folder.stop()
+    profile_updater.stop()
+    await async_engine.dispose()
+    
     shutdown_time = time.time()
     uptime = shutdown_time - startup_time
     logger.info(f"🛑 应用关闭，运行时间: {uptime:.2f}秒")
@@ -105,6 +136,90 @@ async def health_check():
         }
     }
 
+# 缓存和密码哈希线程池指标（/metrics采集时读取）
+register_cache("problem_detail", problem_cache)
+register_cache("problem_stats", stats_cache)
+register_cache("answer_key", answer_key_cache)
+register_cache("principal", principal_cache)
+register_cache("practice_session", session_cache)
+register_password_pool(password_pool)
+
+# 请求指标（所有环境）：延迟直方图、进行中请求数、SQL统计、Server-Timing、N+1告警
+# macOS开发模式下同时记录请求日志并输出X-Process-Time
+@app.middleware("http")
+async def request_instrumentation(request: Request, call_next):
+    """统计本次请求的耗时和执行的SQL"""
+    method = request.method
+    in_progress = REQUESTS_IN_PROGRESS.labels(method)
+    in_progress.inc()
+    start_time = time.perf_counter()
+    status_code = 500
+    stats = None
+    if settings.MACOS_DEV_MODE:
+        logger.info(f"🌐 {method} {request.url.path} - 开始")
+    try:
+        with track_queries() as stats:
+            response = await call_next(request)
+        status_code = response.status_code
+    except Exception as e:
+        if settings.MACOS_DEV_MODE:
+            logger.error(f"❌ 请求处理失败: {e}", exc_info=True)
+        raise
+    finally:
+        in_progress.dec()
+        elapsed = time.perf_counter() - start_time
+        # 按路由模板聚合（未匹配的路径归为一类，避免标签无限增长）
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", UNMATCHED_ROUTE)
+        observe_request(method, route_path, status_code, elapsed, stats)
+    
+    endpoint = f"{method} {route_path}"
+    
+    if settings.MACOS_DEV_MODE:
+        response.headers["X-Process-Time"] = str(elapsed)
+        logger.info(
+            f"✅ {method} {request.url.path} - "
+            f"状态: {status_code} - "
+            f"耗时: {elapsed:.3f}秒"
+        )
+    
+    if stats.count and settings.SQL_SERVER_TIMING:
+        response.headers["Server-Timing"] = stats.server_timing()
+    
+    for shape, count in stats.repeated(settings.SQL_REPEAT_WARN_THRESHOLD):
+        logger.warning(
+            f"🔁 疑似N+1查询: endpoint={endpoint} repeat={count} "
+            f"queries={stats.count} db_ms={stats.total_ms:.1f} statement={shape[:200]}"
+        )
+    
+    notify_request(endpoint, stats)
+    return response
+
+# 读己之写：处理函数返回后、响应发出前发布写入标记（yield依赖的收尾在响应发出之后才执行）
+@app.middleware("http")
+async def read_your_writes(request: Request, call_next):
+    """本请求写过数据时，在响应发出前标记调用者最近写过数据"""
+    response = await call_next(request)
+    await publish_request_writes(request)
+    return response
+
+def _metrics_allowed(request: Request) -> bool:
+    """配置了METRICS_TOKEN时校验Bearer令牌，否则只允许本机（同机的采集器或反向代理）访问"""
+    if settings.METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        return scheme.lower() == "bearer" and secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+    client_host = request.client.host if request.client else None
+    return client_host in ("127.0.0.1", "::1", "localhost")
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics(request: Request):
+        """Prometheus指标（见_metrics_allowed）"""
+        if not _metrics_allowed(request):
+            return JSONResponse(status_code=403, content={"message": "没有权限访问指标"})
+        content, content_type = render_metrics()
+        return Response(content=content, media_type=content_type)
+
 # 注册API路由
 app.include_router(
     auth.router,
@@ -117,6 +232,18 @@ app.include_router(
     prefix="/api/v1/problems",
     tags=["题目管理"]
 )
+
+app.include_router(
+    knowledge_points.router,
+    prefix="/api/v1/knowledge-points",
+    tags=["知识点"]
+)
+
+app.include_router(
+    practice.router,
+    prefix="/api/v1/practice",
+    tags=["练习"]
+)
 #全局异常处理器
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc : RequestValidationError):
@@ -179,38 +306,6 @@ async def internal_exception_handler(request, exc):
         content={"message": "服务器内部错误"},
     )
 
-# macOS开发模式特化中间件
-if settings.MACOS_DEV_MODE:
-    from fastapi import Request
-    from fastapi.responses import JSONResponse
-    
-    @app.middleware("http")
-    async def log_requests(request: Request, call_next):
-        """记录请求日志（开发环境）"""
-        start_time = time.time()
-        
-        # 记录请求
-        logger.info(f"🌐 {request.method} {request.url.path} - 开始")
-        
-        try:
-            response = await call_next(request)
-        except Exception as e:
-            logger.error(f"❌ 请求处理失败: {e}", exc_info=True)
-            raise
-        
-        # 计算处理时间
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        
-        # 记录响应
-        logger.info(
-            f"✅ {request.method} {request.url.path} - "
-            f"状态: {response.status_code} - "
-            f"耗时: {process_time:.3f}秒"
-        )
-        
-        return response
-
 # 启动信息
 logger.info(f"🎉 {settings.PROJECT_NAME} 应用创建完成")
 logger.info(f"📚 API文档: http://localhost:8000/api/docs")
@@ -1,13 +1,16 @@
 """
 知识点模型
 对应Day 2的knowledge_points表设计
-支持树形结构
+支持树形结构（物化路径：path按ID、full_path按编码，由数据库触发器维护）
 """
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, func, ForeignKey
-from sqlalchemy.orm import relationship, validates
-from sqlalchemy.ext.hybrid import hybrid_property
+from typing import List, Tuple
+
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime, func, ForeignKey, Index, text
+from sqlalchemy import FetchedValue
+from sqlalchemy.orm import relationship, validates, object_session
 
 from app.core.database import Base
+from app.core.sql_init import attach_ddl
 
 class KnowledgePoint(Base):
     """知识点表模型（树形结构）"""
@@ -22,7 +25,13 @@ class KnowledgePoint(Base):
     
     # 树形结构
     parent_id = Column(Integer, ForeignKey("knowledge_points.id", ondelete="CASCADE"), nullable=True)
-    level = Column(Integer, default=1, nullable=False)  # 层级
+    level = Column(Integer, server_default=text("1"), server_onupdate=FetchedValue(), nullable=False)  # 层级（触发器按路径深度维护）
+    
+    # 物化路径（触发器在插入、移动、改编码时维护，并同步到整个子树）
+    # path: 祖先ID链，如 '/2/11/'，子树查询为 [path, subtree_upper_bound(path)) 的索引范围扫描
+    # full_path: 祖先编码依次用'.'连接，如 algebra.equation.quadratic
+    path = Column(Text(collation="C"), nullable=False, server_default="", server_onupdate=FetchedValue())
+    full_path = Column(Text, nullable=False, server_default="", server_onupdate=FetchedValue())
     
     # 描述和排序
     description = Column(Text, nullable=True)
@@ -44,6 +53,10 @@ class KnowledgePoint(Base):
         lazy="select",
     )
     
+    __table_args__ = (
+        Index('idx_knowledge_points_path', 'path'),
+    )
+    
     def __repr__(self):
         return f"<KnowledgePoint(id={self.id}, code={self.code}, name={self.name})>"
     
@@ -54,12 +67,10 @@ class KnowledgePoint(Base):
             raise ValueError("知识点编码只能包含字母、数字、点和下划线")
         return code
     
-    @hybrid_property
-    def full_path(self):
-        """获取完整路径（如：algebra.equation.quadratic）"""
-        if self.parent:
-            return f"{self.parent.full_path}.{self.code}"
-        return self.code
+    @property
+    def ancestor_ids(self) -> List[int]:
+        """祖先节点ID（从根到父节点），直接从path解析，不查询数据库"""
+        return [int(part) for part in self.path.strip("/").split("/")[:-1] if part]
     
     def to_dict(self, include_children=False, max_depth=2):
         """转换为字典"""
@@ -85,23 +96,38 @@ class KnowledgePoint(Base):
         return data
     
     def get_ancestors(self):
-        """获取所有祖先节点"""
-        ancestors = []
-        current = self.parent
-        while current:
-            ancestors.insert(0, current.to_dict())
-            current = current.parent
-        return ancestors
+        """获取所有祖先节点（按主键一次查询）"""
+        ids = self.ancestor_ids
+        if not ids:
+            return []
+        
+        ancestors = object_session(self).query(KnowledgePoint).filter(
+            KnowledgePoint.id.in_(ids)
+        ).order_by(KnowledgePoint.level).all()
+        return [ancestor.to_dict() for ancestor in ancestors]
     
     def get_descendants(self, include_self=False):
-        """获取所有后代节点"""
-        descendants = []
+        """获取所有后代节点（path索引范围扫描一次查询，按先序排列）"""
+        lower, upper = subtree_range(self.path)
+        query = object_session(self).query(KnowledgePoint).filter(
+            KnowledgePoint.path >= lower,
+            KnowledgePoint.path < upper
+        )
+        if not include_self:
+            query = query.filter(KnowledgePoint.id != self.id)
         
-        if include_self:
-            descendants.append(self.to_dict())
-        
-        for child in self.children:
-            descendants.append(child.to_dict(include_children=False))
-            descendants.extend(child.get_descendants())
-        
-        return descendants
\ No newline at end of file
+        return [node.to_dict() for node in query.order_by(KnowledgePoint.path).all()]
+
+def subtree_upper_bound(path: str) -> str:
+    """
+    子树路径范围的上界（不含）
+    path以'/'结尾，子树中所有路径都以它为前缀；C排序规则下把末尾的'/'换成下一个字符'0'即得上界
+    """
+    return path[:-1] + "0"
+
+def subtree_range(path: str) -> Tuple[str, str]:
+    """子树（含自身）的path范围 [lower, upper)"""
+    return path, subtree_upper_bound(path)
+
+# create_all建表后创建物化路径维护的函数和触发器（定义见03-indexes.sql）
+attach_ddl(KnowledgePoint.__table__, "knowledge_point_path")
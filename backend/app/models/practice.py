@@ -2,12 +2,13 @@
 练习和答题模型
 对应Day 2的practice_sessions, answer_records等表设计
 """
-from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, JSON, ForeignKey, func, ARRAY
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, JSON, ForeignKey, func, ARRAY, Index, text
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.dialects.postgresql import INET
 from datetime import datetime, timezone
 
 from app.core.database import Base
+from app.core.sql_init import attach_ddl
 
 class PracticeSession(Base):
     """练习会话表模型"""
@@ -29,8 +30,13 @@ class PracticeSession(Base):
     completed_questions = Column(Integer, default=0)
     correct_questions = Column(Integer, default=0)
     
+    # 题单和进度（创建时按配置预选题目；进度由会话引擎定期批量写回）
+    problem_ids = Column(ARRAY(Integer), nullable=True)
+    current_index = Column(Integer, default=0, server_default="0")
+    
     # 时间跟踪
     started_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_activity_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
     total_duration = Column(Integer, nullable=True)  # 秒
     
@@ -46,6 +52,10 @@ class PracticeSession(Base):
     user = relationship("User", backref="practice_sessions", lazy="select")
     answer_records = relationship("AnswerRecord", backref="session", cascade="all, delete-orphan", lazy="select")
     
+    __table_args__ = (
+        Index('idx_sessions_in_progress_activity', 'last_activity_at', postgresql_where=text("status = 'in_progress'")),
+    )
+    
     def __repr__(self):
         return f"<PracticeSession(id={self.id}, user={self.user_id}, status={self.status})>"
     
@@ -90,6 +100,7 @@ class PracticeSession(Base):
             "completed_questions": self.completed_questions,
             "correct_questions": self.correct_questions,
             "completion_rate": round(self.completion_rate, 2),
+            "current_index": self.current_index or 0,
             "started_at": self.started_at.isoformat() if self.started_at else None,
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "total_duration": self.total_duration,
@@ -135,13 +146,17 @@ class AnswerRecord(Base):
     answered_at = Column(DateTime(timezone=True), server_default=func.now())
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    # 知识点数组（优化查询）
-    knowledge_point_ids = Column(ARRAY(Integer), default=[], server_default="{}")
+    # 知识点数组（优化查询）：写入时由应用提供；为NULL时由fill_knowledge_points触发器按题目填充
+    knowledge_point_ids = Column(ARRAY(Integer), nullable=True)
     
     # 关系
     problem = relationship("Problem", backref="answer_records", lazy="select")
     user = relationship("User", backref="answer_records", lazy="select")
     
+    __table_args__ = (
+        Index('idx_answers_missing_knowledge_points', 'id', postgresql_where=text('knowledge_point_ids IS NULL')),
+    )
+    
     def __repr__(self):
         return f"<AnswerRecord(id={self.id}, session={self.session_id}, correct={self.is_correct})>"
     
@@ -174,4 +189,7 @@ class AnswerRecord(Base):
         
         return data
 
-# 错题本模型（后面创建）
\ No newline at end of file
+# create_all建表后创建知识点数组填充触发器（定义见03-indexes.sql）
+attach_ddl(AnswerRecord.__table__, "answer_knowledge_points")
+
+# 错题本模型（后面创建）
@@ -2,12 +2,14 @@
 题目模型
 对应Day 2的problems表设计
 """
-from sqlalchemy import Column, Integer, String, Text, Boolean, Float, DateTime, JSON, ForeignKey, func, Index
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy import Column, Integer, String, Text, Boolean, Float, DateTime, JSON, ForeignKey, func, Index, text, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship, validates
 from sqlalchemy.sql import expression
 import json
 
 from app.core.database import Base
+from app.core.sql_init import attach_ddl
 
 class Problem(Base):
     """题目表模型"""
@@ -57,6 +59,28 @@ class Problem(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
+    # 全文搜索向量（数据库生成列，权重：标题A、内容B、解析C）
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(content, '')), 'B') || "
+            "setweight(to_tsvector('english', coalesce(solution, '')), 'C')",
+            persisted=True,
+        ),
+    ))
+    
+    # 中文全文搜索向量（cjk_segment二元组分词，见02-tables.sql）
+    search_vector_cjk = deferred(Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('simple', cjk_segment(title)), 'A') || "
+            "setweight(to_tsvector('simple', cjk_segment(content)), 'B') || "
+            "setweight(to_tsvector('simple', cjk_segment(solution)), 'C')",
+            persisted=True,
+        ),
+    ))
+    
     # 关系
     creator = relationship("User", foreign_keys=[created_by], lazy="select")
     reviewer = relationship("User", foreign_keys=[reviewed_by], lazy="select")
@@ -69,7 +93,13 @@ class Problem(Base):
     
     # 全文搜索索引（在数据库层面实现）
     __table_args__ = (
-        Index('ix_problems_search', 'title', 'content', postgresql_using='gin'),
+        Index('idx_problems_search', 'search_vector', postgresql_using='gin'),
+        Index('idx_problems_search_cjk', 'search_vector_cjk', postgresql_using='gin'),
+        # 游标分页索引（排序键, id）
+        *(
+            Index(f'idx_problems_keyset_{column}', column, 'id', postgresql_where=text('is_deleted = false'))
+            for column in ('created_at', 'updated_at', 'difficulty', 'total_attempts', 'title')
+        ),
     )
     
     def __repr__(self):
@@ -155,6 +185,9 @@ class Problem(Base):
         if is_correct:
             self.correct_attempts += 1
 
+# create_all建表前创建中文分词函数（定义见02-tables.sql）
+attach_ddl(Problem.__table__, "cjk_segment", "before_create")
+
 # 题目-知识点关联表（多对多）
 class ProblemKnowledgePoint(Base):
     """题目-知识点关联表"""
@@ -167,9 +200,20 @@ class ProblemKnowledgePoint(Base):
     weight = Column(Float, default=1.0)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # 按知识点找题目的覆盖索引（主键(problem_id, knowledge_point_id)负责反方向）
+        Index('idx_pkp_knowledge_point_problem', 'knowledge_point_id', 'problem_id'),
+    )
+    
     # 关系
     problem = relationship("Problem", backref="problem_knowledge_associations", lazy="select")
     knowledge_point = relationship("KnowledgePoint", backref="knowledge_point_problem_associations", lazy="select")
     
     def __repr__(self):
         return f"<ProblemKnowledgePoint(problem={self.problem_id}, knowledge={self.knowledge_point_id})>"
+
+# create_all建表后创建题目集合版本号表和触发器（定义见02-tables.sql、03-indexes.sql）
+attach_ddl(ProblemKnowledgePoint.__table__, "problem_collection_version")
+
+# create_all建表后创建知识点题目数的增量表、触发器和合并函数（定义见02-tables.sql、03-indexes.sql）
+attach_ddl(ProblemKnowledgePoint.__table__, "knowledge_point_count")
@@ -2,12 +2,14 @@
 用户模型
 对应Day 2的users表设计
 """
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, Text, func
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, JSON, Text, Float, ForeignKey, ARRAY, func
+from sqlalchemy.orm import relationship, backref
 from sqlalchemy.sql import expression
 from datetime import datetime, timezone
 import uuid
 
 from app.core.database import Base
+from app.core.sql_init import attach_ddl
 
 class User(Base):
     """用户表模型"""
@@ -79,4 +81,60 @@ class User(Base):
         if include_sensitive:
             data["metadata"] = self.user_metadata
             
-        return data
\ No newline at end of file
+        return data
+
+class StudentProfile(Base):
+    """学生能力画像表模型（由后台任务按新增答题记录增量更新）"""
+    
+    __tablename__ = "student_profiles"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False)
+    
+    # 总体统计
+    total_practice_time = Column(Integer, default=0)  # 秒
+    total_problems_attempted = Column(Integer, default=0)
+    total_correct = Column(Integer, nullable=True)  # 答对总数（增量合并按整数累加，早期画像为空）
+    overall_accuracy = Column(Float, default=0)  # 百分比
+    
+    # 知识点掌握度、难度表现
+    knowledge_mastery = Column(JSON, default=dict, server_default="{}")
+    difficulty_performance = Column(JSON, default=dict, server_default="{}")
+    
+    # 学习习惯
+    preferred_practice_time = Column(String(20), nullable=True)
+    average_session_duration = Column(Integer, nullable=True)
+    
+    # 趋势数据
+    weekly_progress = Column(JSON, default=dict, server_default="{}")
+    monthly_trend = Column(JSON, default=dict, server_default="{}")
+    
+    # 推荐系统相关
+    recommended_problems = Column(ARRAY(Integer), nullable=True)
+    
+    # 时间戳
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    last_calculated_at = Column(DateTime(timezone=True), nullable=True)
+    
+    # 关系
+    user = relationship("User", backref=backref("profile", uselist=False), lazy="select")
+    
+    def __repr__(self):
+        return f"<StudentProfile(user={self.user_id}, attempted={self.total_problems_attempted})>"
+    
+    def to_dict(self):
+        """转换为字典"""
+        return {
+            "user_id": self.user_id,
+            "total_practice_time": self.total_practice_time,
+            "total_problems_attempted": self.total_problems_attempted,
+            "overall_accuracy": round(self.overall_accuracy or 0.0, 2),
+            "knowledge_mastery": self.knowledge_mastery,
+            "difficulty_performance": self.difficulty_performance,
+            "weekly_progress": self.weekly_progress,
+            "last_calculated_at": self.last_calculated_at.isoformat() if self.last_calculated_at else None,
+        }
+
+# create_all建表后创建后台任务游标表（定义见02-tables.sql）
+attach_ddl(StudentProfile.__table__, "job_cursors")
@@ -0,0 +1,96 @@
+"""
+练习和答题相关的Pydantic模式
+"""
+from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, validator
+from datetime import datetime
+
+# 练习会话
+class PracticeConfig(BaseModel):
+    """练习配置：count大于0时创建会话即按条件预选题单，否则为自由练习"""
+    knowledge_points: List[int] = Field(default=[], max_length=50, description="知识点ID")
+    difficulty: List[int] = Field(default=[], description="难度等级: 1-5")
+    count: int = Field(default=0, ge=0, le=200, description="题数")
+    knowledge_point_match: str = "any"  # any：命中任一知识点；all：命中全部知识点
+    include_descendants: bool = True    # 知识点包含其所有子知识点
+    
+    @validator('difficulty')
+    def validate_difficulty(cls, v):
+        if any(level < 1 or level > 5 for level in v):
+            raise ValueError("难度等级必须在1-5之间")
+        return v
+    
+    @validator('knowledge_point_match')
+    def validate_knowledge_point_match(cls, v):
+        if v not in ['any', 'all']:
+            raise ValueError("知识点匹配方式必须是 any 或 all")
+        return v
+
+class PracticeSessionCreate(BaseModel):
+    """创建练习会话模式"""
+    session_type: str = Field(default="random", description="会话类型: random, knowledge_point, difficulty, exam")
+    config: PracticeConfig = Field(default_factory=PracticeConfig, description="练习配置：如知识点、题数、难度")
+    total_questions: int = Field(default=0, ge=0, le=200, description="自由练习的计划题数（预选题单时为题单长度）")
+    
+    @validator('session_type')
+    def validate_session_type(cls, v):
+        allowed = ['random', 'knowledge_point', 'difficulty', 'exam']
+        if v not in allowed:
+            raise ValueError(f"会话类型必须是: {', '.join(allowed)}")
+        return v
+
+class PracticeSessionResponse(BaseModel):
+    """练习会话响应模式"""
+    id: int
+    user_id: int
+    session_type: str
+    status: str
+    total_questions: int
+    completed_questions: int
+    correct_questions: int
+    completion_rate: float
+    current_index: int = 0
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    total_duration: Optional[int] = None
+    average_time_per_question: Optional[float] = None
+    accuracy_rate: Optional[float] = None
+    config: Optional[Dict[str, Any]] = None
+
+# 答题提交
+class AnswerSubmit(BaseModel):
+    """提交答案模式"""
+    problem_id: int
+    user_answer: Optional[str] = Field(None, max_length=10, description="用户答案，未作答时为空")
+    time_spent: int = Field(..., ge=0, le=86400, description="用时（秒）")
+    first_response_time: Optional[int] = Field(None, ge=0, description="第一次响应时间（秒）")
+    confidence_level: Optional[int] = Field(None, ge=1, le=5, description="自信程度: 1-5")
+    steps: List[Dict[str, Any]] = Field(default=[], max_length=200, description="解题步骤记录")
+
+class AnswerResult(BaseModel):
+    """答题结果模式"""
+    id: int
+    session_id: int
+    problem_id: int
+    is_correct: bool
+    position: Optional[int] = None    # 预选题单的会话：答完本题后的进度
+    session_completed: bool = False   # 题单全部答完，会话已完成
+
+# 会话取题
+class PracticeQuestion(BaseModel):
+    """会话中的题目（不含答案和解析）"""
+    id: int
+    title: str
+    content: str
+    content_type: Optional[str] = None
+    options: Optional[Any] = None
+    difficulty: int
+    estimated_time: Optional[int] = None
+    knowledge_points: List[Dict[str, Any]] = []
+
+class NextQuestionResponse(BaseModel):
+    """下一题响应模式：题单做完时question为空"""
+    session_id: int
+    position: int
+    total_questions: int
+    question: Optional[PracticeQuestion] = None
@@ -2,7 +2,8 @@
 题目相关的Pydantic模式
 """
 from typing import Optional, List, Dict, Any
-from pydantic import BaseModel, Field, validator
+from typing_extensions import TypedDict
+from pydantic import BaseModel, Field, TypeAdapter, validator
 from datetime import datetime
 
 # 题目基础模式
@@ -79,6 +80,37 @@ class ProblemResponse(ProblemBase):
     class Config:
         from_attributes = True
 
+# 题目列表行（只用于序列化输出，字段与ProblemResponse一致）
+class ProblemListRow(TypedDict):
+    """
+    题目列表的快速输出结构
+    数据来自数据库列，写入时已经校验过，输出时不再构造模型、不再执行validator
+    """
+    id: int
+    title: str
+    content: str
+    content_type: str
+    options: Dict[str, str]
+    correct_answer: str
+    solution: Optional[str]
+    solution_type: str
+    difficulty: int
+    source_type: Optional[str]
+    source_year: Optional[int]
+    source_detail: Optional[str]
+    estimated_time: Optional[int]
+    is_published: bool
+    review_status: str
+    total_attempts: int
+    correct_attempts: int
+    accuracy_rate: float
+    created_by: int
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+# 预先构建的序列化器（dump_json只做序列化，不做校验）
+problem_list_adapter = TypeAdapter(List[ProblemListRow])
+
 # 题目详情
 class ProblemDetail(ProblemResponse):
     """题目详情模式"""
@@ -92,10 +124,33 @@ class ProblemFilter(BaseModel):
     source_type: Optional[str] = None
     source_year: Optional[int] = None
     knowledge_point_id: Optional[int] = None
+    knowledge_point_ids: Optional[List[int]] = None  # 与knowledge_point_id合并
+    knowledge_point_match: str = "any"  # any：命中任一知识点；all：命中全部知识点
+    include_descendants: bool = True    # 知识点包含其所有子知识点
     is_published: Optional[bool] = True
     search: Optional[str] = None
-    sort_by: str = "created_at"
+    sort_by: Optional[str] = None  # 默认：有搜索词时按相关度，否则按created_at
     sort_order: str = "desc"
+    
+    @validator('knowledge_point_match')
+    def validate_knowledge_point_match(cls, v):
+        if v not in ['any', 'all']:
+            raise ValueError("知识点匹配方式必须是 any 或 all")
+        return v
+    
+    @validator('sort_by')
+    def validate_sort_by(cls, v):
+        """排序字段必须有对应的(列, id)复合索引，才能使用游标分页"""
+        allowed = ['created_at', 'updated_at', 'difficulty', 'total_attempts', 'title', 'relevance']
+        if v is not None and v not in allowed:
+            raise ValueError(f"排序字段必须是: {', '.join(allowed)}")
+        return v
+    
+    @validator('sort_order')
+    def validate_sort_order(cls, v):
+        if v not in ('asc', 'desc'):
+            raise ValueError("排序方向必须是: asc, desc")
+        return v
 
 # 题目统计
 class ProblemStats(BaseModel):
@@ -106,6 +161,20 @@ class ProblemStats(BaseModel):
     by_source: Dict[str, int]
     avg_accuracy: float
 
+# 批量导入
+class ProblemImportError(BaseModel):
+    """批量导入的单行错误"""
+    row: int = Field(..., description="行号（JSONL为文件行号，CSV为含表头的文件行号）")
+    error: str
+
+class ProblemImportResult(BaseModel):
+    """批量导入结果"""
+    total_rows: int
+    imported: int
+    failed: int
+    problem_ids: List[int] = []
+    errors: List[ProblemImportError] = []
+
 # 练习题目（不包含答案）
 class PracticeProblem(BaseModel):
     """练习用题目模式（隐藏答案）"""
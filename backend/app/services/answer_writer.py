@@ -0,0 +1,167 @@
+"""
+答题记录批量写入
+并发提交的答案先进入队列，写入任务在ANSWER_BATCH_MAX_WAIT_MS内凑批，
+一个事务内多行插入answer_records并累加各会话计数，再把每条记录的结果交还给对应的请求。
+全校考试时数千个并发提交只产生几十个事务，而不是数千个单行事务
+"""
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging_config import logger
+from app.crud.practice import insert_answer_batch
+from app.services.attempt_buffer import attempt_buffer
+
+Pending = Tuple[Dict[str, Any], asyncio.Future]
+
+class AnswerBatchWriter:
+    """答题记录写入队列（事件循环内的后台任务）"""
+
+    def __init__(self, max_batch: int = 500, max_wait: float = 0.005, max_queue: int = 20000, workers: int = 2):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.batches = 0
+        self.written = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        """在事件循环中启动写入任务（应用启动时调用）"""
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [
+            asyncio.create_task(self._run(self._queue), name=f"answer-writer-{index}")
+            for index in range(self.workers)
+        ]
+        logger.info(f"✍️ 答题记录批量写入已启动（{self.workers}个写入任务）")
+
+    async def stop(self) -> None:
+        """写完队列中剩余的提交后停止（应用关闭时调用）"""
+        queue, tasks = self._queue, self._tasks
+        if queue is None:
+            return
+        # 之后的提交直接单独写入，不再排到停止信号后面
+        self._queue, self._tasks = None, []
+        for _ in tasks:
+            await queue.put(None)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        logger.info("✍️ 答题记录批量写入已停止")
+
+    async def submit(self, row: Dict[str, Any]) -> Optional[int]:
+        """
+        提交一条答题记录（answer_records的列字典），等待所在批次提交后返回记录ID
+        会话不存在、不属于该用户或已结束时返回None
+        """
+        return await self.enqueue(row)
+
+    def enqueue(self, row: Dict[str, Any]) -> asyncio.Future:
+        """
+        把一条答题记录排入写入队列，返回所在批次提交后得到记录ID的future
+        排队已满时抛出503；返回之后即使调用者被取消，记录仍会写入（等待时可用asyncio.shield）
+        """
+        if self._queue is None:
+            # 未启动（脚本、测试）：直接单独写入
+            return asyncio.ensure_future(self._write_one(row))
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((row, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="提交过多，请稍后重试",
+                headers={"Retry-After": "1"},
+            )
+        return future
+
+    async def _write_one(self, row: Dict[str, Any]) -> Optional[int]:
+        return (await self._write([row]))[0]
+
+    async def _collect(self, queue: asyncio.Queue, first: Pending) -> Tuple[List[Pending], bool]:
+        """从第一条开始凑批：凑满max_batch或等待max_wait后返回；第二个值表示收到了停止信号"""
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch:
+            try:
+                item = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            first = await queue.get()
+            if first is None:
+                return
+            batch, stopping = await self._collect(queue, first)
+            await self._flush(batch)
+            if stopping:
+                return
+
+    async def _flush(self, batch: List[Pending]) -> None:
+        """写入一批并唤醒对应的请求"""
+        try:
+            ids = await self._write([row for row, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                # 整批失败时逐条重试，只让出错的那一条失败
+                logger.warning(f"答题记录批量写入失败，逐条重试 {len(batch)} 条: {e}")
+                for item in batch:
+                    await self._flush([item])
+                return
+            logger.error(f"答题记录写入失败: {e}")
+            _, future = batch[0]
+            if not future.done():
+                future.set_exception(e)
+            return
+
+        for (_, future), answer_id in zip(batch, ids):
+            if not future.done():  # 客户端已断开时future已被取消
+                future.set_result(answer_id)
+
+    async def _write(self, rows: List[Dict[str, Any]]) -> List[Optional[int]]:
+        """一个事务内写入rows，返回对应的记录ID"""
+        async with AsyncSessionLocal() as db:
+            ids = await db.run_sync(insert_answer_batch, rows)
+            await db.commit()
+
+        self.batches += 1
+        for row, answer_id in zip(rows, ids):
+            if answer_id is not None:
+                self.written += 1
+                # 题目答题统计沿用内存聚合缓冲
+                attempt_buffer.record(row["problem_id"], row["is_correct"])
+        return ids
+
+    def stats(self) -> Dict[str, Any]:
+        """写入队列指标（供监控使用）"""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "written": self.written,
+            "rejected": self.rejected,
+        }
+
+# 全局答题记录写入队列（在应用生命周期中启动/停止）
+answer_writer = AnswerBatchWriter(
+    max_batch=settings.ANSWER_BATCH_MAX_SIZE,
+    max_wait=settings.ANSWER_BATCH_MAX_WAIT_MS / 1000,
+    max_queue=settings.ANSWER_QUEUE_MAX,
+    workers=settings.ANSWER_WRITER_TASKS,
+)
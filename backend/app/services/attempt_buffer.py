@@ -0,0 +1,91 @@
+"""
+答题统计写缓冲
+在进程内聚合各题目的 (答题次数, 正确次数) 增量，
+按时间间隔或待刷新题目数阈值批量写回数据库，避免每次点击都读写并锁住热点题目行
+"""
+import threading
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import db_context
+from app.core.logging_config import logger
+from app.crud.problem import apply_attempt_deltas
+
+class AttemptCounterBuffer(threading.Thread):
+    """
+    答题统计聚合缓冲（后台线程定期刷新）
+
+    数据丢失上界：进程异常退出时，最多丢失最近flush_interval秒内、
+    且不超过max_pending个题目的未刷新增量；正常关闭时stop()会刷新剩余数据
+    """
+
+    def __init__(self, flush_interval: float = 2.0, max_pending: int = 500):
+        super().__init__(daemon=True, name="attempt-counter-buffer")
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Dict[int, List[int]] = {}  # 题目ID -> [答题次数增量, 正确次数增量]
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def record(self, problem_id: int, is_correct: bool) -> None:
+        """记录一次答题（只写内存）"""
+        with self._lock:
+            delta = self._pending.setdefault(problem_id, [0, 0])
+            delta[0] += 1
+            if is_correct:
+                delta[1] += 1
+            pending = len(self._pending)
+
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    @property
+    def pending_count(self) -> int:
+        """待刷新的题目数"""
+        return len(self._pending)
+
+    def flush(self) -> int:
+        """把当前聚合的增量一次性写回数据库，返回更新的题目数"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+
+            deltas = {problem_id: tuple(delta) for problem_id, delta in pending.items()}
+            try:
+                with db_context() as db:
+                    return apply_attempt_deltas(db, deltas)
+            except Exception as e:
+                # 写回失败：把增量合并回缓冲，下次刷新重试
+                logger.error(f"答题统计刷新失败，{len(deltas)}个题目的增量将重试: {e}")
+                with self._lock:
+                    for problem_id, (total, correct) in deltas.items():
+                        delta = self._pending.setdefault(problem_id, [0, 0])
+                        delta[0] += total
+                        delta[1] += correct
+                return 0
+
+    def run(self):
+        logger.info("📝 答题统计写缓冲已启动")
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """停止后台线程并刷新剩余增量（应用关闭时调用）"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+        self.flush()
+        logger.info("📝 答题统计写缓冲已停止，剩余数据已刷新")
+
+# 全局答题统计缓冲（在应用生命周期中启动/停止）
+attempt_buffer = AttemptCounterBuffer(
+    flush_interval=settings.ATTEMPT_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.ATTEMPT_FLUSH_MAX_PENDING,
+)
@@ -0,0 +1,64 @@
+"""
+知识点题目数合并任务
+题目与知识点关联的写入只向knowledge_point_count_deltas追加增量（见03-indexes.sql），
+本任务定期调用fold_knowledge_point_counts()把增量按知识点合并进knowledge_points.problem_count
+多个进程同时运行时互不重复计数；problem_count的延迟上界为fold_interval
+"""
+import threading
+from typing import Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import db_context
+from app.core.logging_config import logger
+
+class KnowledgePointCountFolder(threading.Thread):
+    """知识点题目数增量合并（后台线程定期执行）"""
+
+    def __init__(self, fold_interval: float = 5.0):
+        super().__init__(daemon=True, name="kp-count-folder")
+        self.fold_interval = fold_interval
+        self._fold_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def fold(self) -> int:
+        """合并当前所有增量，返回更新的知识点数"""
+        with self._fold_lock:
+            try:
+                with db_context() as db:
+                    return db.execute(text("SELECT fold_knowledge_point_counts()")).scalar() or 0
+            except Exception as e:
+                # 合并失败时增量仍留在表中，下次重试
+                logger.error(f"知识点题目数合并失败: {e}")
+                return 0
+
+    def recount(self) -> int:
+        """全量重算（修复漂移），返回有变化的知识点数"""
+        with self._fold_lock:
+            with db_context() as db:
+                return db.execute(text("SELECT recount_knowledge_point_problems()")).scalar() or 0
+
+    def request_fold(self) -> None:
+        """尽快合并一次（批量导入结束后调用，不等下一个周期）"""
+        self._wakeup.set()
+
+    def run(self):
+        logger.info("🧮 知识点题目数合并任务已启动")
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.fold_interval)
+            self._wakeup.clear()
+            self.fold()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """停止后台线程并合并剩余增量（应用关闭时调用）"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self.is_alive():
+            self.join(timeout)
+        self.fold()
+        logger.info("🧮 知识点题目数合并任务已停止")
+
+# 全局合并任务（在应用生命周期中启动/停止）
+kp_count_folder = KnowledgePointCountFolder(fold_interval=settings.KP_COUNT_FOLD_INTERVAL_SECONDS)
@@ -0,0 +1,126 @@
+"""
+知识点树缓存
+知识点表很小且很少修改：整棵树一次查询载入内存，祖先、子树、完整路径和嵌套树都直接从内存读取
+其他进程对知识点的修改在refresh_interval内生效；本进程的修改调用invalidate()立即生效
+"""
+import threading
+import time
+from typing import Dict, List, Optional, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.models.knowledge_point import KnowledgePoint
+
+class KnowledgeTreeSnapshot:
+    """某一时刻的整棵知识点树（只读）"""
+
+    def __init__(self, nodes: List[dict]):
+        # nodes按path排序，即先序遍历顺序
+        self.nodes: Dict[int, dict] = {node["id"]: node for node in nodes}
+        self._order: Dict[int, int] = {node["id"]: index for index, node in enumerate(nodes)}
+        self._preorder = nodes
+        self._children: Dict[Optional[int], List[int]] = {}
+        for node in sorted(nodes, key=lambda n: (n["sort_order"] or 0, n["id"])):
+            self._children.setdefault(node["parent_id"], []).append(node["id"])
+
+    def get(self, kp_id: int) -> Optional[dict]:
+        return self.nodes.get(kp_id)
+
+    def ancestors(self, kp_id: int) -> List[dict]:
+        """祖先节点（从根到父节点）"""
+        node = self.nodes.get(kp_id)
+        if node is None:
+            return []
+        return [self.nodes[ancestor_id] for ancestor_id in node["ancestor_ids"] if ancestor_id in self.nodes]
+
+    def descendants(self, kp_id: int, include_self: bool = False) -> List[dict]:
+        """子树中的节点（先序）"""
+        node = self.nodes.get(kp_id)
+        if node is None:
+            return []
+        start = self._order[kp_id]
+        prefix = node["path"]
+        result = [node] if include_self else []
+        for other in self._preorder[start + 1:]:
+            if not other["path"].startswith(prefix):
+                break
+            result.append(other)
+        return result
+
+    def subtree_ids(self, kp_id: int) -> Set[int]:
+        """子树（含自身）的知识点ID，未知ID返回空集合"""
+        return {node["id"] for node in self.descendants(kp_id, include_self=True)}
+
+    def children(self, kp_id: Optional[int]) -> List[dict]:
+        """直接子节点（kp_id为None时返回根节点），按sort_order排序"""
+        return [self.nodes[child_id] for child_id in self._children.get(kp_id, [])]
+
+    def nested(self, root_id: Optional[int] = None, max_depth: Optional[int] = None) -> List[dict]:
+        """嵌套结构：root_id为None时返回整片森林，否则返回以root_id为根的子树"""
+        if root_id is not None:
+            node = self.nodes.get(root_id)
+            return [self._nest(node, max_depth)] if node else []
+        return [self._nest(node, max_depth) for node in self.children(None)]
+
+    def _nest(self, node: dict, max_depth: Optional[int]) -> dict:
+        data = dict(node)
+        if max_depth is None or max_depth > 0:
+            next_depth = None if max_depth is None else max_depth - 1
+            data["children"] = [self._nest(child, next_depth) for child in self.children(node["id"])]
+        return data
+
+class KnowledgeTree:
+    """知识点树缓存（进程内）"""
+
+    def __init__(self, refresh_interval: int = 300):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[KnowledgeTreeSnapshot] = None
+        self._loaded_at: Optional[float] = None
+
+    def load(self, db: Session) -> KnowledgeTreeSnapshot:
+        """从数据库全量加载（一次查询）"""
+        rows = db.query(KnowledgePoint).order_by(KnowledgePoint.path).all()
+        nodes = []
+        for kp in rows:
+            node = kp.to_dict()
+            node["path"] = kp.path
+            node["sort_order"] = kp.sort_order
+            node["ancestor_ids"] = kp.ancestor_ids
+            nodes.append(node)
+
+        snapshot = KnowledgeTreeSnapshot(nodes)
+        with self._lock:
+            self._snapshot = snapshot
+            self._loaded_at = time.monotonic()
+
+        logger.debug(f"🌳 知识点树已加载: {len(nodes)} 个节点")
+        return snapshot
+
+    def _fresh_snapshot(self) -> Optional[KnowledgeTreeSnapshot]:
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            return None
+        return self._snapshot
+
+    def snapshot(self, db: Session) -> KnowledgeTreeSnapshot:
+        """当前的树（首次使用或超过刷新间隔时重新加载）"""
+        return self._fresh_snapshot() or self.load(db)
+
+    async def snapshot_async(self, db: AsyncSession) -> KnowledgeTreeSnapshot:
+        """snapshot()的异步版本，未过期时不进入数据库会话"""
+        snapshot = self._fresh_snapshot()
+        if snapshot is None:
+            snapshot = await db.run_sync(self.load)
+        return snapshot
+
+    def invalidate(self) -> None:
+        """标记过期，下次读取时重新加载"""
+        with self._lock:
+            self._loaded_at = None
+
+# 全局知识点树
+knowledge_tree = KnowledgeTree(refresh_interval=settings.KNOWLEDGE_TREE_REFRESH_SECONDS)
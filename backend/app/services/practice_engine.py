@@ -0,0 +1,315 @@
+"""
+练习会话引擎
+- 创建会话时按配置一次预选题单，题目（不含答案）逐题序列化为JSON后放入两级缓存，
+  取"下一题"时直接拼接响应，不再查询题目、构造ORM对象或校验模型
+- 作答进度保存在Redis（多进程共享），Redis不可用时保存在进程内；
+  后台任务定期把有变化的进度用一条UPDATE批量写回practice_sessions，而不是每答一题写一次
+- 同一后台任务定期把长时间未活动的会话标记为abandoned
+"""
+import asyncio
+import json
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.cache import TTLCache, TwoTierCache, get_redis
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging_config import logger
+from app.crud import practice as crud
+from app.models.problem import Problem
+from app.schemas.practice import PracticeSessionCreate
+
+# 会话题单（创建后不再变化；一级缓存TTL较短，其他进程结束的会话在该时间内失效）
+session_cache = TwoTierCache(
+    "practice_session",
+    ttl=settings.PRACTICE_SESSION_CACHE_SECONDS,
+    l1_ttl=settings.PROBLEM_LOCAL_CACHE_SECONDS,
+    l1_maxsize=settings.PRACTICE_SESSION_LOCAL_CACHE_SIZE,
+)
+
+def serialize_question(problem: Problem) -> str:
+    """题目的作答视图（与PracticeQuestion字段一致，不含答案和解析），序列化为JSON"""
+    return json.dumps({
+        "id": problem.id,
+        "title": problem.title,
+        "content": problem.content,
+        "content_type": problem.content_type,
+        "options": problem.options,
+        "difficulty": problem.difficulty,
+        "estimated_time": problem.estimated_time,
+        "knowledge_points": [
+            {"id": kp.id, "name": kp.name, "code": kp.code}
+            for kp in problem.knowledge_points
+        ],
+    }, ensure_ascii=False)
+
+def _session_payload(db_session, problems: List[Problem]) -> Dict[str, Any]:
+    """会话题单的缓存表示（自由练习的题单为空）"""
+    return {
+        "user_id": db_session.user_id,
+        "problem_ids": [problem.id for problem in problems],
+        "questions": [serialize_question(problem) for problem in problems],
+        "position": db_session.current_index or 0,  # 加载时数据库中的进度，无更新的进度时使用
+    }
+
+class PracticeSessionEngine:
+    """练习会话引擎（进度写回和放弃清理在事件循环内的后台任务中执行）"""
+
+    def __init__(self, flush_interval: float = 5.0, sweep_interval: float = 300.0, idle_minutes: int = 60):
+        self.flush_interval = flush_interval
+        self.sweep_interval = sweep_interval
+        self.idle_minutes = idle_minutes
+        # 会话ID -> 下一题位置（进程内，Redis不可用时使用；其他进程清理掉的会话在未活动超时后过期）
+        self._positions = TTLCache(ttl=idle_minutes * 60, maxsize=settings.PRACTICE_SESSION_LOCAL_CACHE_SIZE)
+        # (会话ID, 位置) -> 已被某次提交占用（Redis不可用时的进程内兜底）
+        self._claims = TTLCache(ttl=idle_minutes * 60, maxsize=settings.PRACTICE_SESSION_LOCAL_CACHE_SIZE)
+        self._dirty: Dict[int, int] = {}      # 待写回的进度
+        self._task: Optional[asyncio.Task] = None
+        self._pending_advances: Set[asyncio.Task] = set()  # 请求已取消、等待记录写入后推进进度的任务
+        self._redis_down_until = 0.0
+        self.flushes = 0
+        self.abandoned = 0
+
+    def start(self) -> None:
+        """在事件循环中启动后台任务（应用启动时调用）"""
+        self._task = asyncio.create_task(self._run(), name="practice-session-engine")
+        logger.info("🧭 练习会话引擎已启动")
+
+    async def stop(self) -> None:
+        """停止后台任务并写回剩余进度（应用关闭时调用）"""
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await self.flush()
+        logger.info("🧭 练习会话引擎已停止")
+
+    async def _run(self) -> None:
+        last_sweep = time.monotonic()
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+                if time.monotonic() - last_sweep >= self.sweep_interval:
+                    last_sweep = time.monotonic()
+                    await self.sweep()
+            except Exception as e:
+                logger.error(f"练习会话后台任务失败: {e}")
+
+    # 会话题单
+
+    async def create_session(self, db, user_id: int, session_create: PracticeSessionCreate) -> Dict[str, Any]:
+        """
+        创建会话：预选题单、逐题序列化并写入缓存，返回会话字典
+        配置了题数但没有符合条件的题目时抛出ValueError
+        """
+        def create(sync_db) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+            problems = crud.select_session_problems(sync_db, session_create.config)
+            if session_create.config.count and not problems:
+                raise ValueError("没有符合条件的题目")
+            db_session = crud.create_session(
+                sync_db, user_id, session_create, [problem.id for problem in problems]
+            )
+            return db_session.to_dict(), _session_payload(db_session, problems)
+
+        session_data, payload = await db.run_sync(create)
+        await session_cache.set_async(session_data["id"], payload)
+        return session_data
+
+    async def get_session(self, session_id: int) -> Optional[Dict[str, Any]]:
+        """读取会话题单（进程内 -> Redis -> 数据库）；会话不存在或已结束时返回None"""
+        async def load():
+            async with AsyncSessionLocal() as db:
+                def load_payload(sync_db):
+                    db_session, problems = crud.get_session_problems(sync_db, session_id)
+                    if db_session is None:
+                        return None
+                    return _session_payload(db_session, problems)
+                return await db.run_sync(load_payload)
+
+        return await session_cache.get_or_load_async(session_id, load)
+
+    def forget(self, session_id: int) -> None:
+        """会话结束后丢弃题单和进度（访问Redis，在协程中通过asyncio.to_thread调用）"""
+        session_cache.delete(session_id)
+        self._positions.delete(session_id)
+        self._dirty.pop(session_id, None)
+        client = self._redis()
+        if client is not None:
+            try:
+                client.delete(self._progress_key(session_id))
+            except Exception as e:
+                self._redis_failed(e)
+
+    # 作答进度
+
+    def _progress_key(self, session_id: int) -> str:
+        return f"practice_progress:{session_id}"
+
+    def _claim_key(self, session_id: int, position: int) -> str:
+        return f"practice_claim:{session_id}:{position}"
+
+    def _redis(self):
+        if time.monotonic() < self._redis_down_until:
+            return None
+        return get_redis()
+
+    def _redis_failed(self, e: Exception) -> None:
+        if time.monotonic() >= self._redis_down_until:
+            logger.warning(f"Redis不可用，30秒内练习进度只保存在进程内: {e}")
+        self._redis_down_until = time.monotonic() + 30.0
+
+    def _read_shared(self, session_id: int) -> Optional[int]:
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            raw = client.get(self._progress_key(session_id))
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        return int(raw) if raw is not None else None
+
+    def _write_shared(self, session_id: int, position: int) -> None:
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            client.set(self._progress_key(session_id), position, ex=settings.PRACTICE_SESSION_CACHE_SECONDS)
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def position(self, session_id: int, payload: Dict[str, Any]) -> int:
+        """当前进度：取Redis中的共享进度、进程内进度和加载题单时数据库中的进度的最大值"""
+        shared = await asyncio.to_thread(self._read_shared, session_id)
+        local = self._positions.get(session_id)
+        return max(value for value in (shared, local, payload["position"]) if value is not None)
+
+    def _claim_shared(self, session_id: int, position: int) -> Optional[bool]:
+        """在Redis中占用题单位置（SET NX，多进程间只有一次提交成功）；Redis不可用时返回None"""
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            return bool(client.set(
+                self._claim_key(session_id, position), 1,
+                nx=True, ex=settings.PRACTICE_SESSION_CACHE_SECONDS
+            ))
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+
+    async def claim(self, session_id: int, payload: Dict[str, Any], problem_id: int) -> int:
+        """
+        占用当前题目的位置并返回它（提交答案前调用）
+        只接受题单中当前位置的题目，每个位置只接受一次提交：
+        跳题、回答已答过的题或重复提交时抛出ValueError，不写入答题记录也不推进进度
+        """
+        position = await self.position(session_id, payload)
+        problem_ids = payload["problem_ids"]
+        if position >= len(problem_ids) or problem_ids[position] != problem_id:
+            raise ValueError("只能提交题单中当前题目的答案")
+
+        claimed = await asyncio.to_thread(self._claim_shared, session_id, position)
+        if claimed is None:
+            claimed = self._claims.get((session_id, position)) is None
+        if not claimed:
+            raise ValueError("该题的答案已提交")
+        self._claims.set((session_id, position), True)
+        return position
+
+    def release(self, session_id: int, position: int) -> None:
+        """写入失败时释放占用的位置，允许重新提交（访问Redis，在协程中通过asyncio.to_thread调用）"""
+        self._claims.delete((session_id, position))
+        client = self._redis()
+        if client is not None:
+            try:
+                client.delete(self._claim_key(session_id, position))
+            except Exception as e:
+                self._redis_failed(e)
+
+    def advance_when_written(
+        self,
+        session_id: int,
+        payload: Dict[str, Any],
+        position: int,
+        pending: asyncio.Future
+    ) -> None:
+        """
+        提交请求在答题记录排队之后被取消：记录仍会写入，保留占用，不允许重新提交；
+        在后台等待写入完成后推进进度，写入失败时释放占用
+        """
+        async def finish():
+            try:
+                answer_id = await pending
+            except Exception:
+                await asyncio.to_thread(self.release, session_id, position)
+                return
+            if answer_id is not None:
+                await self.advance(session_id, payload, position)
+
+        task = asyncio.get_running_loop().create_task(finish())
+        self._pending_advances.add(task)
+        task.add_done_callback(self._pending_advances.discard)
+
+    async def advance(self, session_id: int, payload: Dict[str, Any], position: int) -> int:
+        """答完claim占用的position后推进进度（只前进不后退），返回新的进度"""
+        current = await self.position(session_id, payload)
+        position = max(current, position + 1)
+        self._positions.set(session_id, position)
+        self._dirty[session_id] = position
+        if position != current:
+            await asyncio.to_thread(self._write_shared, session_id, position)
+        return position
+
+    def touch(self, session_id: int, position: int) -> None:
+        """取题也算活动：下次写回时刷新last_activity_at，避免正在读题的会话被当作放弃"""
+        self._dirty.setdefault(session_id, position)
+
+    async def flush(self) -> int:
+        """把有变化的进度批量写回数据库（一条UPDATE），返回更新的会话数"""
+        if not self._dirty:
+            return 0
+
+        positions, self._dirty = self._dirty, {}
+        try:
+            async with AsyncSessionLocal() as db:
+                updated = await db.run_sync(crud.save_session_progress, positions)
+                await db.commit()
+        except Exception:
+            # 写回失败时放回，下次重试（期间的新进度优先）
+            for session_id, position in positions.items():
+                self._dirty.setdefault(session_id, position)
+            raise
+
+        self.flushes += 1
+        return updated
+
+    async def sweep(self) -> int:
+        """把超时未活动的会话标记为abandoned并丢弃其题单和进度，返回处理的会话数"""
+        async with AsyncSessionLocal() as db:
+            session_ids = await db.run_sync(crud.abandon_idle_sessions, self.idle_minutes)
+            await db.commit()
+
+        for session_id in session_ids:
+            await asyncio.to_thread(self.forget, session_id)
+        if session_ids:
+            self.abandoned += len(session_ids)
+            logger.info(f"🧹 {len(session_ids)} 个练习会话超时未活动，已标记为放弃")
+        return len(session_ids)
+
+    def stats(self) -> Dict[str, Any]:
+        """会话引擎指标（供监控使用）"""
+        return {
+            "pending_progress": len(self._dirty),
+            "flushes": self.flushes,
+            "abandoned": self.abandoned,
+        }
+
+# 全局练习会话引擎（在应用生命周期中启动/停止）
+practice_engine = PracticeSessionEngine(
+    flush_interval=settings.PRACTICE_PROGRESS_FLUSH_SECONDS,
+    sweep_interval=settings.PRACTICE_SWEEP_INTERVAL_SECONDS,
+    idle_minutes=settings.PRACTICE_SESSION_IDLE_MINUTES,
+)
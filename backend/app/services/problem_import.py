@@ -0,0 +1,263 @@
+"""
+题目批量导入
+逐行流式解析JSONL/CSV上传文件，用ProblemCreate校验，
+按批次多行插入题目和知识点关联，返回逐行错误报告
+"""
+import asyncio
+import csv
+import io
+import json
+import re
+from typing import Any, BinaryIO, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.logging_config import logger
+from app.crud.problem import (
+    bulk_create_problems, get_existing_knowledge_point_ids, invalidate_problem_stats
+)
+from app.schemas.problem import ProblemCreate
+from app.services.problem_sampler import problem_sampler
+from app.services.knowledge_point_counts import kp_count_folder
+
+SUPPORTED_FORMATS = ("jsonl", "csv")
+IMPORT_BATCH_SIZE = 1000
+
+# CSV中可作为选项列的列名
+OPTION_COLUMNS = ("A", "B", "C", "D", "E", "F")
+
+def detect_format(filename: str) -> str:
+    """根据文件扩展名判断格式"""
+    suffix = (filename or "").rsplit(".", 1)[-1].lower()
+    if suffix in ("jsonl", "ndjson"):
+        return "jsonl"
+    if suffix == "csv":
+        return "csv"
+    raise ValueError(f"无法识别的文件格式，支持: {', '.join(SUPPORTED_FORMATS)}")
+
+def _iter_jsonl(stream: io.TextIOBase) -> Iterator[Tuple[int, Any]]:
+    """逐行解析JSONL，产出(行号, 记录或错误信息)"""
+    for line_no, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, ValueError(f"JSON格式错误: {e.msg}")
+
+def _parse_kp_ids(value: str) -> List[int]:
+    """知识点ID列：JSON数组，或以逗号/分号/竖线分隔"""
+    value = value.strip()
+    if value.startswith("["):
+        return json.loads(value)
+    return [int(part) for part in re.split(r"[,;|]", value) if part.strip()]
+
+def _csv_record(row: Dict[str, str]) -> Dict[str, Any]:
+    """把CSV行转换为ProblemCreate可接受的字典（空单元格视为未提供）"""
+    record: Dict[str, Any] = {
+        key.strip(): value for key, value in row.items()
+        if key and value not in (None, "") and key.strip() not in OPTION_COLUMNS
+    }
+
+    if "options" in record:
+        record["options"] = json.loads(record["options"])
+    else:
+        options = {
+            key.strip(): value for key, value in row.items()
+            if key and key.strip() in OPTION_COLUMNS and value not in (None, "")
+        }
+        if options:
+            record["options"] = options
+
+    if "knowledge_point_ids" in record:
+        record["knowledge_point_ids"] = _parse_kp_ids(record["knowledge_point_ids"])
+
+    return record
+
+def _iter_csv(stream: io.TextIOBase) -> Iterator[Tuple[int, Any]]:
+    """逐行解析CSV（首行为表头），产出(行号, 记录或错误信息)"""
+    reader = csv.DictReader(stream)
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # CSV结构损坏后无法可靠继续
+            yield reader.line_num, ValueError(f"CSV格式错误: {e}")
+            return
+
+        try:
+            yield reader.line_num, _csv_record(row)
+        except (ValueError, TypeError) as e:
+            yield reader.line_num, ValueError(f"字段格式错误: {e}")
+
+def _format_validation_error(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(loc) for loc in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    )
+
+class _ImportReport:
+    """累计导入结果"""
+
+    def __init__(self):
+        self.total_rows = 0
+        self.problem_ids: List[int] = []
+        self.errors: List[Dict[str, Any]] = []
+
+    def fail(self, row: int, message: str) -> None:
+        self.errors.append({"row": row, "error": message})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total_rows": self.total_rows,
+            "imported": len(self.problem_ids),
+            "failed": len(self.errors),
+            "problem_ids": self.problem_ids,
+            "errors": self.errors,
+        }
+
+def _flush_batch(
+    db: Session,
+    batch: List[Tuple[int, ProblemCreate]],
+    created_by: int,
+    report: _ImportReport
+) -> None:
+    """校验知识点并写入一批题目；整批失败时逐行重试以定位出错行"""
+    existing = get_existing_knowledge_point_ids(
+        db, (kp_id for _, problem in batch for kp_id in problem.knowledge_point_ids)
+    )
+
+    valid = []
+    for row, problem in batch:
+        missing = set(problem.knowledge_point_ids) - existing
+        if missing:
+            report.fail(row, f"知识点不存在: {', '.join(str(kp_id) for kp_id in sorted(missing))}")
+        else:
+            valid.append((row, problem))
+
+    if not valid:
+        return
+
+    try:
+        report.problem_ids.extend(
+            bulk_create_problems(db, [problem for _, problem in valid], created_by)
+        )
+        db.commit()
+        return
+    except SQLAlchemyError as e:
+        db.rollback()
+        logger.warning(f"批量导入批次写入失败，逐行重试: {e}")
+
+    for row, problem in valid:
+        try:
+            with db.begin_nested():
+                report.problem_ids.extend(bulk_create_problems(db, [problem], created_by))
+        except SQLAlchemyError as e:
+            report.fail(row, f"数据库写入失败: {getattr(e, 'orig', None) or e}")
+    db.commit()
+
+def _read_batch(
+    records: Iterator[Tuple[int, Any]],
+    report: _ImportReport,
+    batch_size: int
+) -> Tuple[List[Tuple[int, ProblemCreate]], bool]:
+    """
+    解析并校验下一批（最多batch_size个有效行），无效行记入report
+    第二个值表示文件已读完
+    """
+    batch: List[Tuple[int, ProblemCreate]] = []
+    try:
+        for row, record in records:
+            report.total_rows += 1
+            if isinstance(record, Exception):
+                report.fail(row, str(record))
+                continue
+
+            try:
+                batch.append((row, ProblemCreate.model_validate(record)))
+            except ValidationError as e:
+                report.fail(row, _format_validation_error(e))
+                continue
+
+            if len(batch) >= batch_size:
+                return batch, False
+    except UnicodeDecodeError:
+        report.fail(report.total_rows + 1, "文件编码错误，请使用UTF-8")
+    return batch, True
+
+def _open_records(file: BinaryIO, file_format: str) -> Tuple[io.TextIOWrapper, Iterator[Tuple[int, Any]]]:
+    if file_format not in SUPPORTED_FORMATS:
+        raise ValueError(f"不支持的文件格式，支持: {', '.join(SUPPORTED_FORMATS)}")
+
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    records = _iter_jsonl(stream) if file_format == "jsonl" else _iter_csv(stream)
+    return stream, records
+
+def _finish_import(report: _ImportReport) -> Dict[str, Any]:
+    if report.problem_ids:
+        # 可能导入了已发布题目，抽题ID池下次使用时重新加载
+        problem_sampler.invalidate()
+        invalidate_problem_stats()
+        kp_count_folder.request_fold()
+
+    logger.info(
+        f"📥 批量导入完成: 共{report.total_rows}行, "
+        f"成功{len(report.problem_ids)}, 失败{len(report.errors)}"
+    )
+    return report.to_dict()
+
+def import_problems(
+    db: Session,
+    file: BinaryIO,
+    file_format: str,
+    created_by: int,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """
+    流式导入题目文件
+    每批batch_size行提交一次，已提交的批次不受后续错误影响
+    """
+    stream, records = _open_records(file, file_format)
+    report = _ImportReport()
+
+    try:
+        done = False
+        while not done:
+            batch, done = _read_batch(records, report, batch_size)
+            if batch:
+                _flush_batch(db, batch, created_by, report)
+    finally:
+        stream.detach()
+
+    return _finish_import(report)
+
+async def import_problems_async(
+    db: AsyncSession,
+    file: BinaryIO,
+    file_format: str,
+    created_by: int,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> Dict[str, Any]:
+    """
+    import_problems的协程版本（供async路由使用）
+    读文件、解析和校验在线程中逐批进行，事件循环上只执行每批的数据库写入，大文件不会阻塞其他请求
+    """
+    stream, records = _open_records(file, file_format)
+    report = _ImportReport()
+
+    try:
+        done = False
+        while not done:
+            batch, done = await asyncio.to_thread(_read_batch, records, report, batch_size)
+            if batch:
+                await db.run_sync(_flush_batch, batch, created_by, report)
+    finally:
+        stream.detach()
+
+    return _finish_import(report)
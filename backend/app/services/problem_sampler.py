@@ -0,0 +1,217 @@
+"""
+练习抽题引擎
+在内存中按难度、知识点维护已发布题目的ID池，
+抽题时直接从ID池均匀抽样，再按主键取回题目，避免 ORDER BY random() 全量排序
+只按难度抽题时按下标从各难度的ID列表中抽样，开销与抽取数量成正比，与题库大小无关
+"""
+import random
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging_config import logger
+from app.models.problem import Problem, ProblemKnowledgePoint
+
+class _IdPool:
+    """ID列表 + ID->下标：O(1)增删（删除时用末尾元素填补空位），可按下标随机抽样"""
+
+    def __init__(self, ids: Iterable[int] = ()):
+        self._ids: List[int] = list(dict.fromkeys(ids))
+        self._index: Dict[int, int] = {problem_id: i for i, problem_id in enumerate(self._ids)}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __getitem__(self, position: int) -> int:
+        return self._ids[position]
+
+    def add(self, problem_id: int) -> None:
+        if problem_id not in self._index:
+            self._index[problem_id] = len(self._ids)
+            self._ids.append(problem_id)
+
+    def discard(self, problem_id: int) -> None:
+        position = self._index.pop(problem_id, None)
+        if position is None:
+            return
+        last = self._ids.pop()
+        if last != problem_id:
+            self._ids[position] = last
+            self._index[last] = position
+
+class ProblemSampler:
+    """已发布题目的ID池（进程内）"""
+
+    def __init__(self, refresh_interval: int = 300):
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._difficulty: Dict[int, int] = {}            # 题目ID -> 难度
+        self._knowledge_points: Dict[int, Set[int]] = {}  # 题目ID -> 知识点ID集合
+        self._by_difficulty: Dict[int, _IdPool] = {}      # 难度 -> 题目ID列表
+        self._by_knowledge_point: Dict[int, Set[int]] = {}  # 知识点ID -> 题目ID集合
+
+    def load(self, db: Session) -> None:
+        """从数据库全量加载ID池（两次只取ID的查询）"""
+        rows = db.query(Problem.id, Problem.difficulty).filter(
+            Problem.is_deleted == False,
+            Problem.is_published == True
+        ).all()
+
+        links = db.query(
+            ProblemKnowledgePoint.problem_id,
+            ProblemKnowledgePoint.knowledge_point_id
+        ).join(
+            Problem, Problem.id == ProblemKnowledgePoint.problem_id
+        ).filter(
+            Problem.is_deleted == False,
+            Problem.is_published == True
+        ).all()
+
+        difficulty = {row.id: row.difficulty for row in rows}
+        knowledge_points: Dict[int, Set[int]] = {}
+        for problem_id, kp_id in links:
+            knowledge_points.setdefault(problem_id, set()).add(kp_id)
+
+        by_difficulty: Dict[int, _IdPool] = {}
+        for problem_id, level in difficulty.items():
+            by_difficulty.setdefault(level, _IdPool()).add(problem_id)
+
+        by_knowledge_point: Dict[int, Set[int]] = {}
+        for problem_id, kp_ids in knowledge_points.items():
+            for kp_id in kp_ids:
+                by_knowledge_point.setdefault(kp_id, set()).add(problem_id)
+
+        with self._lock:
+            self._difficulty = difficulty
+            self._knowledge_points = knowledge_points
+            self._by_difficulty = by_difficulty
+            self._by_knowledge_point = by_knowledge_point
+            self._loaded_at = time.monotonic()
+
+        logger.debug(f"🎲 抽题ID池已加载: {len(difficulty)} 道已发布题目")
+
+    def _ensure_loaded(self, db: Session) -> None:
+        """首次使用或超过刷新间隔时重新加载（兜底其他进程的发布/取消发布）"""
+        loaded_at = self._loaded_at
+        if loaded_at is None or time.monotonic() - loaded_at > self.refresh_interval:
+            self.load(db)
+
+    def invalidate(self) -> None:
+        """标记ID池过期，下次抽题时重新加载"""
+        with self._lock:
+            self._loaded_at = None
+
+    def _discard_locked(self, problem_id: int) -> None:
+        level = self._difficulty.pop(problem_id, None)
+        if level is not None and level in self._by_difficulty:
+            self._by_difficulty[level].discard(problem_id)
+        for kp_id in self._knowledge_points.pop(problem_id, set()):
+            self._by_knowledge_point.get(kp_id, set()).discard(problem_id)
+
+    def discard(self, problem_ids: Iterable[int]) -> None:
+        """从ID池移除题目"""
+        with self._lock:
+            for problem_id in problem_ids:
+                self._discard_locked(problem_id)
+
+    def refresh_problem(
+        self,
+        problem_id: int,
+        is_available: bool,
+        difficulty: Optional[int] = None,
+        knowledge_point_ids: Iterable[int] = ()
+    ) -> None:
+        """
+        题目发布状态、难度或知识点变化后更新ID池
+        is_available=False（取消发布/删除）时移除
+        """
+        if self._loaded_at is None:
+            return  # 尚未加载，首次抽题时会全量加载
+
+        with self._lock:
+            self._discard_locked(problem_id)
+            if not is_available:
+                return
+
+            kp_ids = set(knowledge_point_ids)
+            self._difficulty[problem_id] = difficulty
+            self._knowledge_points[problem_id] = kp_ids
+            self._by_difficulty.setdefault(difficulty, _IdPool()).add(problem_id)
+            for kp_id in kp_ids:
+                self._by_knowledge_point.setdefault(kp_id, set()).add(problem_id)
+
+    def refresh_from(self, problem: Problem) -> None:
+        """根据题目对象的当前状态更新ID池"""
+        self.refresh_problem(
+            problem.id,
+            bool(problem.is_published and not problem.is_deleted),
+            problem.difficulty,
+            (kp.id for kp in problem.knowledge_points),
+        )
+
+    def sample_ids(
+        self,
+        db: Session,
+        count: int,
+        difficulty_range: Optional[List[int]] = None,
+        knowledge_point_groups: Optional[List[Set[int]]] = None,
+        match_all: bool = False
+    ) -> List[int]:
+        """
+        从符合条件的ID池中无放回均匀抽取count个题目ID（ID池是集合，不会重复）
+        knowledge_point_groups：每组为一个知识点展开后的ID集合（含子知识点），题目关联组内任一知识点即命中该组；
+        match_all为True时须命中每一组，否则命中任一组即可
+        """
+        self._ensure_loaded(db)
+
+        with self._lock:
+            if not knowledge_point_groups:
+                levels = dict.fromkeys(difficulty_range) if difficulty_range else self._by_difficulty
+                pools = [self._by_difficulty[level] for level in levels if level in self._by_difficulty]
+                return self._sample_pools_locked(pools, count)
+
+            group_candidates = []
+            for group in knowledge_point_groups:
+                matched: Set[int] = set()
+                for kp_id in group:
+                    matched |= self._by_knowledge_point.get(kp_id, set())
+                group_candidates.append(matched)
+            if match_all:
+                candidates = group_candidates[0].intersection(*group_candidates[1:])
+            else:
+                candidates = set().union(*group_candidates)
+
+            # 知识点命中的题目通常远少于全部题目，在命中集合上按难度过滤
+            if difficulty_range:
+                levels = set(difficulty_range)
+                candidates = {
+                    problem_id for problem_id in candidates
+                    if self._difficulty.get(problem_id) in levels
+                }
+
+        if len(candidates) <= count:
+            ids = list(candidates)
+            random.shuffle(ids)
+            return ids
+
+        return random.sample(list(candidates), count)
+
+    @staticmethod
+    def _sample_pools_locked(pools: List[_IdPool], count: int) -> List[int]:
+        """从若干ID列表的并集中无放回抽取count个（按全局下标抽样，结果顺序随机）"""
+        total = sum(len(pool) for pool in pools)
+        ids = []
+        for position in random.sample(range(total), min(count, total)):
+            for pool in pools:
+                if position < len(pool):
+                    ids.append(pool[position])
+                    break
+                position -= len(pool)
+        return ids
+
+# 全局抽题引擎
+problem_sampler = ProblemSampler(refresh_interval=settings.PRACTICE_POOL_REFRESH_SECONDS)
@@ -0,0 +1,198 @@
+"""
+学生画像增量更新
+按answer_records.id顺序消费新增的答题记录（位置保存在job_cursors），每批在一个事务内：
+锁定游标 -> 读取一批记录 -> 按学生合并进画像 -> 一条多行UPSERT写回 -> 推进游标
+每次刷新的开销只与新增记录数成正比，与学生的历史答题总量无关；
+多个进程同时运行时，游标行锁（SKIP LOCKED）保证同一批不会被重复合并
+
+知识点掌握度采用按时间指数衰减的加权正确率：
+  weight = weight * 0.5 ** (间隔天数 / 半衰期) + 1
+  correct_weight = correct_weight * 同一衰减 + (答对 ? 1 : 0)
+  score = correct_weight / weight
+越近的作答权重越大，weight同时反映证据量（很久没练的知识点weight会变小）
+"""
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.core.database import db_context
+from app.core.logging_config import logger
+from app.crud import profile as crud
+
+def _parse_time(value: Optional[str]) -> Optional[datetime]:
+    """解析last_practiced（早期格式只有日期，按UTC处理）"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def fold_mastery(entry: Optional[Dict[str, Any]], is_correct: bool, answered_at: datetime, half_life_days: float) -> Dict[str, Any]:
+    """把一次作答合并进某个知识点的掌握度（返回新的条目，不修改entry）"""
+    entry = dict(entry or {})
+    weight = entry.get("weight", 0.0)
+    correct_weight = entry.get("score", 0.0) * weight
+    last_practiced = _parse_time(entry.get("last_practiced"))
+
+    if last_practiced is not None:
+        # 批内记录按ID而非时间排序，时间稍有倒序时不衰减
+        elapsed_days = max((answered_at - last_practiced).total_seconds(), 0) / 86400
+        decay = 0.5 ** (elapsed_days / half_life_days)
+        weight *= decay
+        correct_weight *= decay
+
+    weight += 1
+    correct_weight += 1 if is_correct else 0
+    entry.update({
+        "score": round(correct_weight / weight, 4),
+        "weight": round(weight, 4),
+        "attempts": entry.get("attempts", 0) + 1,
+        "correct": entry.get("correct", 0) + (1 if is_correct else 0),
+        "last_practiced": max(answered_at, last_practiced or answered_at).isoformat(),
+    })
+    return entry
+
+def fold_answers(
+    state: Optional[Dict[str, Any]],
+    answers: List[Any],
+    half_life_days: float = 30.0,
+    weeks_kept: int = 12
+) -> Dict[str, Any]:
+    """
+    把一个学生的一批新答题记录合并进画像状态（PROFILE_STATE_COLUMNS），返回新的状态
+    answers按ID顺序，每项有is_correct、time_spent、answered_at、knowledge_point_ids、difficulty
+    """
+    state = state or {}
+    attempted = state.get("total_problems_attempted") or 0
+    correct_total = state.get("total_correct")
+    if correct_total is None:
+        # 早期画像没有答对总数，只能由四舍五入后的正确率推算一次，之后按整数累加
+        correct_total = round((state.get("overall_accuracy") or 0.0) * attempted / 100)
+    practice_time = state.get("total_practice_time") or 0
+    mastery = dict(state.get("knowledge_mastery") or {})
+    by_difficulty = dict(state.get("difficulty_performance") or {})
+    weekly = dict(state.get("weekly_progress") or {})
+
+    for answer in answers:
+        is_correct = bool(answer.is_correct)
+        answered_at = answer.answered_at or datetime.now(timezone.utc)
+        attempted += 1
+        correct_total += is_correct
+        practice_time += answer.time_spent or 0
+
+        for kp_id in answer.knowledge_point_ids or ():
+            key = str(kp_id)
+            mastery[key] = fold_mastery(mastery.get(key), is_correct, answered_at, half_life_days)
+
+        if answer.difficulty is not None:
+            level = dict(by_difficulty.get(str(answer.difficulty)) or {"attempts": 0, "correct": 0})
+            level["attempts"] += 1
+            level["correct"] += is_correct
+            level["accuracy"] = round(level["correct"] / level["attempts"] * 100, 2)
+            by_difficulty[str(answer.difficulty)] = level
+
+        week = answered_at.strftime("%G-W%V")
+        progress = dict(weekly.get(week) or {"attempts": 0, "correct": 0, "time_spent": 0})
+        progress["attempts"] += 1
+        progress["correct"] += is_correct
+        progress["time_spent"] += answer.time_spent or 0
+        weekly[week] = progress
+
+    # ISO周字符串按字典序即时间顺序，只保留最近weeks_kept周
+    weekly = {week: weekly[week] for week in sorted(weekly)[-weeks_kept:]}
+
+    return {
+        "total_practice_time": practice_time,
+        "total_problems_attempted": attempted,
+        "total_correct": correct_total,
+        "overall_accuracy": round(correct_total / attempted * 100, 2) if attempted else 0.0,
+        "knowledge_mastery": mastery,
+        "difficulty_performance": by_difficulty,
+        "weekly_progress": weekly,
+    }
+
+class StudentProfileUpdater(threading.Thread):
+    """学生画像增量更新（后台线程定期执行）"""
+
+    def __init__(
+        self,
+        interval: float = 60.0,
+        batch_size: int = 5000,
+        settle_seconds: int = 10,
+        half_life_days: float = 30.0,
+        weeks_kept: int = 12
+    ):
+        super().__init__(daemon=True, name="student-profile-updater")
+        self.interval = interval
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+        self.half_life_days = half_life_days
+        self.weeks_kept = weeks_kept
+        self._update_lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def update_batch(self) -> int:
+        """合并一批新答题记录（一个事务），返回合并的记录数；其他进程正在处理时返回0"""
+        with self._update_lock, db_context() as db:
+            position = crud.lock_profile_cursor(db)
+            if position is None:
+                return 0
+
+            answers = crud.get_answers_after(db, position, self.settle_seconds, self.batch_size)
+            if not answers:
+                return 0
+
+            by_user: Dict[int, List[Any]] = defaultdict(list)
+            for answer in answers:
+                by_user[answer.user_id].append(answer)
+
+            current = crud.get_profile_states(db, by_user)
+            now = datetime.now(timezone.utc)
+            states = []
+            for user_id, user_answers in by_user.items():
+                state = fold_answers(current.get(user_id), user_answers, self.half_life_days, self.weeks_kept)
+                state.update(user_id=user_id, last_calculated_at=now)
+                states.append(state)
+
+            crud.save_profile_states(db, states)
+            crud.advance_profile_cursor(db, answers[-1].id)
+            return len(answers)
+
+    def catch_up(self, max_batches: int = 0) -> int:
+        """连续合并直到没有新记录（或达到max_batches批），返回合并的记录数"""
+        total = 0
+        batches = 0
+        while True:
+            merged = self.update_batch()
+            total += merged
+            batches += 1
+            if merged < self.batch_size or (max_batches and batches >= max_batches) or self._stopped.is_set():
+                return total
+
+    def run(self):
+        logger.info("📈 学生画像增量更新已启动")
+        while not self._stopped.wait(self.interval):
+            try:
+                merged = self.catch_up()
+                if merged:
+                    logger.info(f"📈 学生画像已合并 {merged} 条新答题记录")
+            except Exception as e:
+                # 整批回滚，游标不前进，下次重试
+                logger.error(f"学生画像更新失败: {e}")
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """停止后台线程（未合并的记录留在游标之后，下次启动时继续）"""
+        self._stopped.set()
+        if self.is_alive():
+            self.join(timeout)
+        logger.info("📈 学生画像增量更新已停止")
+
+# 全局画像更新任务（在应用生命周期中启动/停止）
+profile_updater = StudentProfileUpdater(
+    interval=settings.PROFILE_UPDATE_INTERVAL_SECONDS,
+    batch_size=settings.PROFILE_UPDATE_BATCH_SIZE,
+    settle_seconds=settings.PROFILE_SETTLE_SECONDS,
+    half_life_days=settings.PROFILE_MASTERY_HALF_LIFE_DAYS,
+    weeks_kept=settings.PROFILE_WEEKS_KEPT,
+)
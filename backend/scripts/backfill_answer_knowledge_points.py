@@ -0,0 +1,47 @@
+"""
+回填answer_records.knowledge_point_ids
+
+按批处理knowledge_point_ids为NULL的答题记录（例如COPY导入时未提供该列、或触发器被临时禁用期间写入的行），
+每批一个短事务，批间可暂停，避免长时间锁住大量行；可同时运行多个实例（SKIP LOCKED）
+
+用法（在backend目录下）：
+  python scripts/backfill_answer_knowledge_points.py --batch-size 5000 --pause 0.05
+"""
+import argparse
+import sys
+import time
+
+sys.path.append('.')
+
+from app.core.database import db_context
+from app.crud.practice import backfill_answer_knowledge_points
+
+def main():
+    parser = argparse.ArgumentParser(description="回填答题记录的知识点数组")
+    parser.add_argument("--batch-size", type=int, default=5000, help="每批行数")
+    parser.add_argument("--pause", type=float, default=0.0, help="批间暂停秒数（降低对线上写入的影响）")
+    parser.add_argument("--max-batches", type=int, default=0, help="最多处理的批数（0为不限）")
+    args = parser.parse_args()
+
+    total = 0
+    batches = 0
+    start = time.perf_counter()
+    while True:
+        with db_context() as db:
+            updated = backfill_answer_knowledge_points(db, args.batch_size)
+        if not updated:
+            break
+
+        total += updated
+        batches += 1
+        elapsed = time.perf_counter() - start
+        print(f"  第 {batches} 批: {updated} 行，累计 {total} 行（{total / elapsed:.0f} 行/秒）")
+        if args.max_batches and batches >= args.max_batches:
+            break
+        if args.pause:
+            time.sleep(args.pause)
+
+    print(f"✅ 回填完成: {total} 行，{batches} 批，用时 {time.perf_counter() - start:.1f}秒")
+
+if __name__ == "__main__":
+    main()
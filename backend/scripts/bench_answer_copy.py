@@ -0,0 +1,177 @@
+"""
+COPY导入答题记录的性能对比：逐行触发器查询知识点 vs 应用提供knowledge_point_ids
+
+在独立schema（bench_answer_copy）中建表（不影响真实数据），用COPY导入同一批合成答题记录：
+  - before：旧触发器，每行执行一次 array_agg 子查询（COPY数据不含knowledge_point_ids）
+  - after：03-indexes.sql中的触发器（WHEN knowledge_point_ids IS NULL），
+    导入前一次查询得到题目->知识点映射，COPY数据直接带上knowledge_point_ids，触发器不执行
+结束后核对两种方式写入的知识点数组一致
+
+用法（在backend目录下，数据库须已执行03-indexes.sql）：
+  python scripts/bench_answer_copy.py --rows 1000000 --problems 5000
+"""
+import argparse
+import io
+import random
+import sys
+import time
+
+sys.path.append('.')
+
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+
+SCHEMA = "bench_answer_copy"
+
+SETUP_SQL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""
+    CREATE TABLE {SCHEMA}.problem_knowledge_points (
+        problem_id INTEGER NOT NULL,
+        knowledge_point_id INTEGER NOT NULL,
+        PRIMARY KEY (problem_id, knowledge_point_id)
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.answer_records (
+        id BIGSERIAL PRIMARY KEY,
+        session_id INTEGER NOT NULL,
+        problem_id INTEGER NOT NULL,
+        user_id INTEGER NOT NULL,
+        user_answer VARCHAR(10),
+        is_correct BOOLEAN,
+        time_spent INTEGER NOT NULL,
+        knowledge_point_ids INTEGER[]
+    )
+    """,
+    f"""
+    INSERT INTO {SCHEMA}.problem_knowledge_points (problem_id, knowledge_point_id)
+    SELECT DISTINCT p, 1 + (p * k * 7) % 40
+    FROM generate_series(1, %(problems)s) AS p, generate_series(1, 3) AS k
+    """,
+    f"ANALYZE {SCHEMA}.problem_knowledge_points",
+]
+
+# 旧版触发器（原03-indexes.sql中的定义），表名按search_path解析到本schema
+BEFORE_TRIGGER_SQL = [
+    f"""
+    CREATE FUNCTION {SCHEMA}.fill_answer_knowledge_points_old()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        SELECT array_agg(knowledge_point_id ORDER BY knowledge_point_id)
+        INTO NEW.knowledge_point_ids
+        FROM problem_knowledge_points
+        WHERE problem_id = NEW.problem_id;
+        RETURN NEW;
+    END;
+    $$ language 'plpgsql'
+    """,
+    f"""
+    CREATE TRIGGER fill_knowledge_points BEFORE INSERT ON {SCHEMA}.answer_records
+        FOR EACH ROW EXECUTE FUNCTION {SCHEMA}.fill_answer_knowledge_points_old()
+    """,
+]
+
+AFTER_TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER fill_knowledge_points BEFORE INSERT ON {SCHEMA}.answer_records
+        FOR EACH ROW
+        WHEN (NEW.knowledge_point_ids IS NULL)
+        EXECUTE FUNCTION public.fill_answer_knowledge_points()
+    """,
+]
+
+COLUMNS = "session_id, problem_id, user_id, user_answer, is_correct, time_spent"
+
+def make_rows(count, problems, seed):
+    """合成答题记录（固定随机种子，两种方式导入相同的数据）"""
+    rng = random.Random(seed)
+    for index in range(count):
+        yield (
+            1 + index // 20,
+            rng.randint(1, problems),
+            1 + index % 5000,
+            rng.choice("ABCD"),
+            rng.random() < 0.6,
+        )
+
+def csv_chunks(rows, kp_map, chunk_size):
+    """按chunk_size行生成COPY用的CSV文本；kp_map不为None时带上knowledge_point_ids列"""
+    buffer = io.StringIO()
+    written = 0
+    for session_id, problem_id, user_id, answer, correct in rows:
+        line = f"{session_id},{problem_id},{user_id},{answer},{'t' if correct else 'f'},60"
+        if kp_map is not None:
+            line += ',"{' + ",".join(map(str, kp_map.get(problem_id, []))) + '}"'
+        buffer.write(line + "\n")
+        written += 1
+        if written == chunk_size:
+            yield buffer.getvalue()
+            buffer = io.StringIO()
+            written = 0
+    if written:
+        yield buffer.getvalue()
+
+def load_kp_map(cursor):
+    """导入前一次查询得到题目->知识点映射（与应用中的get_knowledge_point_map相同）"""
+    cursor.execute(
+        f"SELECT problem_id, array_agg(knowledge_point_id ORDER BY knowledge_point_id) "
+        f"FROM {SCHEMA}.problem_knowledge_points GROUP BY problem_id"
+    )
+    return dict(cursor.fetchall())
+
+def run(engine, args, mode):
+    conn = engine.raw_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SET search_path TO {SCHEMA}, public")
+        for sql in SETUP_SQL:
+            cursor.execute(sql, {"problems": args.problems})
+        for sql in BEFORE_TRIGGER_SQL if mode == "before" else AFTER_TRIGGER_SQL:
+            cursor.execute(sql)
+        if args.gin:
+            cursor.execute(f"CREATE INDEX ON {SCHEMA}.answer_records USING GIN(knowledge_point_ids)")
+        conn.commit()
+
+        start = time.perf_counter()
+        kp_map = load_kp_map(cursor) if mode == "after" else None
+        columns = COLUMNS + (", knowledge_point_ids" if kp_map is not None else "")
+        rows = make_rows(args.rows, args.problems, seed=42)
+        for chunk in csv_chunks(rows, kp_map, args.chunk_size):
+            cursor.copy_expert(
+                f"COPY {SCHEMA}.answer_records ({columns}) FROM STDIN WITH (FORMAT csv)",
+                io.StringIO(chunk),
+            )
+        conn.commit()
+        elapsed = time.perf_counter() - start
+
+        cursor.execute(
+            f"SELECT md5(string_agg(knowledge_point_ids::text, ';' ORDER BY id)) FROM {SCHEMA}.answer_records"
+        )
+        checksum = cursor.fetchone()[0]
+        cursor.execute(f"DROP SCHEMA {SCHEMA} CASCADE")
+        conn.commit()
+    finally:
+        conn.close()
+
+    print(f"  {mode:<7} {elapsed:7.1f}秒  {args.rows / elapsed:10.0f} 行/秒")
+    return checksum
+
+def main():
+    parser = argparse.ArgumentParser(description="COPY导入答题记录的性能对比")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="导入行数")
+    parser.add_argument("--problems", type=int, default=5000, help="题目数")
+    parser.add_argument("--chunk-size", type=int, default=100_000, help="每次COPY的行数")
+    parser.add_argument("--gin", action="store_true", help="同时维护knowledge_point_ids的GIN索引（与线上一致）")
+    args = parser.parse_args()
+
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URL))
+    print(f"📥 COPY导入 {args.rows} 行答题记录（{args.problems} 道题）")
+    before = run(engine, args, "before")
+    after = run(engine, args, "after")
+    print(f"  知识点数组一致: {'是' if before == after else '否'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""
+并发导入时知识点题目数维护的开销对比：逐行触发器 vs 语句级触发器 + 增量合并
+
+在独立schema（bench_kp_count）中建表（不影响真实数据），多个导入线程同时按批次写入题目和知识点关联，
+所有题目都只关联少数几个热点知识点，分别测量：
+  - row：旧的逐行触发器，每条关联各执行一次 UPDATE knowledge_points（事务结束前一直持有热点行锁）
+  - statement：03-indexes.sql中的语句级触发器（转换表按知识点聚合后写入增量表），
+    同时运行一个合并线程定期调用fold_knowledge_point_counts()
+结束后合并剩余增量，并与全量重算结果核对
+
+用法（在backend目录下，数据库须已执行03-indexes.sql）：
+  python scripts/bench_kp_count_concurrency.py --workers 8 --batches 50 --batch-size 200
+"""
+import argparse
+import statistics
+import sys
+import threading
+import time
+
+sys.path.append('.')
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+
+SCHEMA = "bench_kp_count"
+
+SETUP_SQL = [
+    f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+    f"CREATE SCHEMA {SCHEMA}",
+    f"""
+    CREATE TABLE {SCHEMA}.knowledge_points (
+        id INTEGER PRIMARY KEY,
+        problem_count INTEGER DEFAULT 0
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.problems (
+        id SERIAL PRIMARY KEY,
+        is_published BOOLEAN DEFAULT TRUE,
+        is_deleted BOOLEAN DEFAULT FALSE
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.problem_knowledge_points (
+        problem_id INTEGER NOT NULL REFERENCES {SCHEMA}.problems(id) ON DELETE CASCADE,
+        knowledge_point_id INTEGER NOT NULL REFERENCES {SCHEMA}.knowledge_points(id) ON DELETE CASCADE,
+        PRIMARY KEY (problem_id, knowledge_point_id)
+    )
+    """,
+    f"""
+    CREATE TABLE {SCHEMA}.knowledge_point_count_deltas (
+        id BIGSERIAL PRIMARY KEY,
+        knowledge_point_id INTEGER NOT NULL,
+        delta INTEGER NOT NULL,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+]
+
+# 旧版逐行触发器（原03-indexes.sql中的定义）
+ROW_TRIGGER_SQL = [
+    f"""
+    CREATE FUNCTION {SCHEMA}.row_kp_count()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            UPDATE knowledge_points SET problem_count = problem_count + 1 WHERE id = NEW.knowledge_point_id;
+        ELSIF TG_OP = 'DELETE' THEN
+            UPDATE knowledge_points SET problem_count = problem_count - 1 WHERE id = OLD.knowledge_point_id;
+        END IF;
+        RETURN NULL;
+    END;
+    $$ language 'plpgsql'
+    """,
+    f"""
+    CREATE TRIGGER update_kp_count AFTER INSERT OR DELETE ON {SCHEMA}.problem_knowledge_points
+        FOR EACH ROW EXECUTE FUNCTION {SCHEMA}.row_kp_count()
+    """,
+]
+
+# 新版：直接使用public中的函数，表名按search_path解析到本schema
+STATEMENT_TRIGGER_SQL = [
+    f"""
+    CREATE TRIGGER kp_count_links_insert AFTER INSERT ON {SCHEMA}.problem_knowledge_points
+        REFERENCING NEW TABLE AS new_links
+        FOR EACH STATEMENT EXECUTE FUNCTION public.record_kp_link_count_delta()
+    """,
+    f"""
+    CREATE TRIGGER kp_count_links_delete AFTER DELETE ON {SCHEMA}.problem_knowledge_points
+        REFERENCING OLD TABLE AS old_links
+        FOR EACH STATEMENT EXECUTE FUNCTION public.record_kp_link_count_delta()
+    """,
+]
+
+INSERT_PROBLEMS_SQL = f"""
+INSERT INTO {SCHEMA}.problems (is_published)
+SELECT TRUE FROM generate_series(1, :count)
+RETURNING id
+"""
+
+INSERT_LINKS_SQL = f"""
+INSERT INTO {SCHEMA}.problem_knowledge_points (problem_id, knowledge_point_id)
+SELECT p.id, kp.id
+FROM unnest(CAST(:problem_ids AS int[])) AS p(id)
+CROSS JOIN LATERAL (
+    SELECT DISTINCT 1 + (p.id * k) % :hot AS id FROM generate_series(1, :links) AS k
+) kp
+"""
+
+VERIFY_SQL = f"""
+SELECT count(*) FROM {SCHEMA}.knowledge_points kp
+WHERE kp.problem_count <> (
+    SELECT count(*) FROM {SCHEMA}.problem_knowledge_points l WHERE l.knowledge_point_id = kp.id
+)
+"""
+
+def use_schema(conn):
+    conn.execute(text(f"SET search_path TO {SCHEMA}, public"))
+
+def importer(engine, args, latencies, errors):
+    """按批次导入：每批一个事务，先插题目，再插关联"""
+    with engine.connect() as conn:
+        use_schema(conn)
+        conn.commit()
+        for _ in range(args.batches):
+            start = time.perf_counter()
+            try:
+                ids = [row[0] for row in conn.execute(text(INSERT_PROBLEMS_SQL), {"count": args.batch_size})]
+                conn.execute(
+                    text(INSERT_LINKS_SQL),
+                    {"problem_ids": ids, "hot": args.hot_points, "links": args.links},
+                )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                errors.append(str(e).splitlines()[0])
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+def folder(engine, interval, stopped):
+    """定期合并增量（模拟应用中的后台任务）"""
+    with engine.connect() as conn:
+        use_schema(conn)
+        conn.commit()
+        while not stopped.wait(interval):
+            conn.execute(text("SELECT fold_knowledge_point_counts()"))
+            conn.commit()
+
+def run(engine, args, mode):
+    with engine.connect() as conn:
+        for sql in SETUP_SQL:
+            conn.execute(text(sql))
+        conn.execute(
+            text(f"INSERT INTO {SCHEMA}.knowledge_points (id) SELECT generate_series(1, :hot)"),
+            {"hot": args.hot_points},
+        )
+        for sql in ROW_TRIGGER_SQL if mode == "row" else STATEMENT_TRIGGER_SQL:
+            conn.execute(text(sql))
+        conn.commit()
+
+    latencies, errors = [], []
+    stopped = threading.Event()
+    fold_thread = None
+    if mode == "statement":
+        fold_thread = threading.Thread(target=folder, args=(engine, args.fold_interval, stopped))
+        fold_thread.start()
+
+    workers = [
+        threading.Thread(target=importer, args=(engine, args, latencies, errors))
+        for _ in range(args.workers)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    stopped.set()
+    if fold_thread:
+        fold_thread.join()
+
+    with engine.connect() as conn:
+        use_schema(conn)
+        if mode == "statement":
+            conn.execute(text("SELECT fold_knowledge_point_counts()"))
+        mismatched = conn.execute(text(VERIFY_SQL)).scalar()
+        conn.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+        conn.commit()
+
+    problems = len(latencies) * args.batch_size
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0.0
+    print(
+        f"  {mode:<10} {problems / elapsed:9.0f} 题/秒  每批中位数 {statistics.median(latencies or [0]):8.1f}ms  "
+        f"p95 {p95:8.1f}ms  失败批次 {len(errors)}  计数不一致 {mismatched}"
+    )
+    for message in sorted(set(errors))[:3]:
+        print(f"    ⚠️ {message}")
+
+def main():
+    parser = argparse.ArgumentParser(description="并发导入时知识点题目数维护的开销对比")
+    parser.add_argument("--workers", type=int, default=8, help="并发导入线程数")
+    parser.add_argument("--batches", type=int, default=50, help="每个线程导入的批次数")
+    parser.add_argument("--batch-size", type=int, default=200, help="每批题目数")
+    parser.add_argument("--links", type=int, default=3, help="每道题关联的知识点数（上限）")
+    parser.add_argument("--hot-points", type=int, default=10, help="热点知识点数")
+    parser.add_argument("--fold-interval", type=float, default=1.0, help="合并间隔（秒）")
+    parser.add_argument("--modes", nargs="+", default=["row", "statement"], choices=["row", "statement"])
+    args = parser.parse_args()
+
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URL), pool_size=args.workers + 2)
+    print(
+        f"🔧 {args.workers} 个线程 × {args.batches} 批 × {args.batch_size} 题，"
+        f"关联 {args.hot_points} 个热点知识点"
+    )
+    for mode in args.modes:
+        run(engine, args, mode)
+
+if __name__ == "__main__":
+    main()
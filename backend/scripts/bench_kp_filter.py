@@ -0,0 +1,150 @@
+"""
+按知识点子树过滤题目的性能对比：JOIN + DISTINCT vs EXISTS半连接
+
+在临时表中生成合成题库和三层知识点树（不影响真实数据），按一个一级知识点（含全部子孙）过滤，
+按created_at倒序取一页，分别执行：
+  - 旧写法：JOIN problem_knowledge_points 后 DISTINCT 去重
+  - 新写法：EXISTS (problem_knowledge_points ...)，任一（OR）与全部（AND）两种匹配
+
+用法（在backend目录下）：
+  python scripts/bench_kp_filter.py --rows 100000 --repeat 50
+"""
+import argparse
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+
+SETUP_SQL = [
+    """
+    CREATE TEMP TABLE bench_problems (
+        id SERIAL PRIMARY KEY,
+        is_published BOOLEAN DEFAULT TRUE,
+        is_deleted BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TEMP TABLE bench_pkp (
+        problem_id INTEGER NOT NULL,
+        knowledge_point_id INTEGER NOT NULL,
+        PRIMARY KEY (problem_id, knowledge_point_id)
+    )
+    """,
+]
+
+# 每道题关联1~3个叶子知识点（ID与叶子编号一一对应）
+FILL_SQL = [
+    """
+    INSERT INTO bench_problems (created_at)
+    SELECT now() - g * interval '1 minute' FROM generate_series(1, :rows) AS g
+    """,
+    """
+    INSERT INTO bench_pkp (problem_id, knowledge_point_id)
+    SELECT DISTINCT p.id, 1 + floor(random() * :leaves)::int
+    FROM bench_problems p, generate_series(1, 1 + (random() * 2)::int) AS k
+    """,
+]
+
+INDEX_SQL = [
+    "CREATE INDEX ON bench_problems (created_at, id) WHERE is_deleted = false",
+    "CREATE INDEX ON bench_pkp (knowledge_point_id, problem_id)",
+    "ANALYZE bench_problems",
+    "ANALYZE bench_pkp",
+]
+
+JOIN_SQL = """
+SELECT DISTINCT p.id, p.created_at FROM bench_problems p
+JOIN bench_pkp pkp ON pkp.problem_id = p.id
+WHERE p.is_deleted = FALSE AND p.is_published = TRUE
+  AND pkp.knowledge_point_id = ANY(:kp_ids)
+ORDER BY p.created_at DESC, p.id DESC
+LIMIT 50
+"""
+
+EXISTS_ANY_SQL = """
+SELECT p.id FROM bench_problems p
+WHERE p.is_deleted = FALSE AND p.is_published = TRUE
+  AND EXISTS (
+    SELECT 1 FROM bench_pkp pkp
+    WHERE pkp.problem_id = p.id AND pkp.knowledge_point_id = ANY(:kp_ids)
+  )
+ORDER BY p.created_at DESC, p.id DESC
+LIMIT 50
+"""
+
+EXISTS_ALL_SQL = """
+SELECT p.id FROM bench_problems p
+WHERE p.is_deleted = FALSE AND p.is_published = TRUE
+  AND EXISTS (
+    SELECT 1 FROM bench_pkp pkp
+    WHERE pkp.problem_id = p.id AND pkp.knowledge_point_id = ANY(:kp_ids)
+  )
+  AND EXISTS (
+    SELECT 1 FROM bench_pkp pkp
+    WHERE pkp.problem_id = p.id AND pkp.knowledge_point_id = ANY(:other_ids)
+  )
+ORDER BY p.created_at DESC, p.id DESC
+LIMIT 50
+"""
+
+def timed(conn, sql, params, repeat):
+    """执行多次，返回每次耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"  {name:<14} 中位数 {statistics.median(samples):8.2f}ms  "
+        f"p95 {p95:8.2f}ms  最大 {samples[-1]:8.2f}ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="知识点子树过滤性能对比")
+    parser.add_argument("--rows", type=int, default=100_000, help="合成题目数量")
+    parser.add_argument("--roots", type=int, default=5, help="一级知识点数")
+    parser.add_argument("--fanout", type=int, default=5, help="每个节点的子节点数（共三层）")
+    parser.add_argument("--repeat", type=int, default=50, help="每条查询重复次数")
+    args = parser.parse_args()
+
+    # 叶子按一级知识点连续编号，一个一级知识点的子树 = 一段连续的叶子ID
+    leaves_per_root = args.fanout * args.fanout
+    leaves = args.roots * leaves_per_root
+    subtree = list(range(1, leaves_per_root + 1))
+    other_subtree = list(range(leaves_per_root + 1, 2 * leaves_per_root + 1))
+
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URL))
+    with engine.connect() as conn:
+        print(f"🔧 生成合成题库: {args.rows} 行，{leaves} 个叶子知识点")
+        start = time.perf_counter()
+        for sql in SETUP_SQL:
+            conn.execute(text(sql))
+        for sql in FILL_SQL:
+            conn.execute(text(sql), {"rows": args.rows, "leaves": leaves})
+        for sql in INDEX_SQL:
+            conn.execute(text(sql))
+        print(f"✅ 完成，用时 {time.perf_counter() - start:.1f}秒\n")
+
+        params = {"kp_ids": subtree, "other_ids": other_subtree}
+        print(f"🌳 过滤一个一级知识点（子树 {len(subtree)} 个叶子）")
+        report("JOIN+DISTINCT", timed(conn, JOIN_SQL, params, args.repeat))
+        report("EXISTS 任一", timed(conn, EXISTS_ANY_SQL, params, args.repeat))
+        report("EXISTS 全部", timed(conn, EXISTS_ALL_SQL, params, args.repeat))
+
+        plan = conn.execute(text("EXPLAIN " + EXISTS_ANY_SQL), params).fetchall()
+        index_only = any("Index Only Scan" in row[0] for row in plan)
+        print(f"  EXISTS只读索引（Index Only Scan）: {'是' if index_only else '否'}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+登录高峰对其他接口延迟的影响
+
+先单独测量探测接口（默认 /health）的延迟作为基线，再在大量并发登录（bcrypt）的同时测量一次。
+bcrypt在事件循环线程中计算时，探测接口的p99会被拉到数百毫秒；放入线程池后应接近基线
+
+用法（在backend目录下，先启动服务 uvicorn app.main:app --workers 1）：
+  python scripts/bench_login_storm.py --username student1 --password 123456 \
+      --logins 32 --duration 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+def percentile(samples, pct):
+    samples = sorted(samples)
+    return samples[max(0, int(len(samples) * pct) - 1)] if samples else 0.0
+
+def report(name, samples):
+    print(
+        f"  {name:<8} 请求 {len(samples):>6}  中位数 {statistics.median(samples):7.1f}ms  "
+        f"p95 {percentile(samples, 0.95):7.1f}ms  p99 {percentile(samples, 0.99):7.1f}ms"
+    )
+
+async def probe(client, path, deadline, interval):
+    """按固定间隔请求探测接口，返回每次耗时（毫秒）"""
+    latencies = []
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+async def login_loop(client, username, password, deadline, results):
+    """循环登录直到deadline，按状态码计数"""
+    while time.perf_counter() < deadline:
+        response = await client.post(
+            "/api/v1/auth/login/json", json={"username": username, "password": password}
+        )
+        results[response.status_code] = results.get(response.status_code, 0) + 1
+
+async def main():
+    parser = argparse.ArgumentParser(description="登录高峰下的接口延迟")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--probe-path", default="/health")
+    parser.add_argument("--logins", type=int, default=32, help="并发登录客户端数")
+    parser.add_argument("--duration", type=float, default=10.0, help="每个阶段持续秒数")
+    parser.add_argument("--interval", type=float, default=0.01, help="探测请求间隔（秒）")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.logins + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60, limits=limits) as client:
+        print(f"📏 基线：只请求 {args.probe_path}")
+        deadline = time.perf_counter() + args.duration
+        baseline = await probe(client, args.probe_path, deadline, args.interval)
+        report("基线", baseline)
+
+        print(f"🔥 登录高峰：{args.logins} 个客户端并发登录")
+        results = {}
+        deadline = time.perf_counter() + args.duration
+        storm = await asyncio.gather(
+            probe(client, args.probe_path, deadline, args.interval),
+            *(login_loop(client, args.username, args.password, deadline, results)
+              for _ in range(args.logins)),
+        )
+        report("登录高峰", storm[0])
+        status_summary = ", ".join(f"{code}: {count}" for code, count in sorted(results.items()))
+        print(f"  登录结果 {status_summary}（{sum(results.values()) / args.duration:.1f} 次/秒）")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+题目搜索性能对比：ILIKE全表扫描 vs search_vector全文检索
+
+在临时表中生成大规模合成题库（不影响真实数据），分别执行：
+  - 旧路径：title/content/solution 三个 ILIKE '%kw%'
+  - 新路径：search_vector @@ websearch_to_tsquery，按ts_rank_cd排序
+
+用法（在backend目录下）：
+  python scripts/bench_problem_search.py --rows 200000 --repeat 20
+"""
+import argparse
+import statistics
+import sys
+import time
+
+sys.path.append('.')
+
+from sqlalchemy import create_engine, text
+
+from app.core.config import settings
+
+WORDS = [
+    "triangle", "circle", "square", "prime", "integer", "fraction", "ratio",
+    "probability", "sequence", "arithmetic", "geometric", "polygon", "angle",
+    "perimeter", "area", "volume", "digit", "remainder", "divisible", "factor",
+    "multiple", "equation", "inequality", "function", "graph", "coordinate",
+    "parallel", "perpendicular", "symmetry", "combination", "permutation",
+    "parity", "modular", "pigeonhole", "induction", "counting", "tiling",
+    "chessboard", "clock", "speed", "distance", "work", "mixture", "average",
+]
+
+SETUP_SQL = """
+CREATE TEMP TABLE bench_problems (
+    id SERIAL PRIMARY KEY,
+    title VARCHAR(200) NOT NULL,
+    content TEXT NOT NULL,
+    solution TEXT,
+    is_published BOOLEAN DEFAULT TRUE,
+    is_deleted BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(solution, '')), 'C')
+    ) STORED
+)
+"""
+
+# 每行从词表中随机取词拼成标题/内容/解析（子查询引用g，保证逐行求值）
+FILL_SQL = """
+INSERT INTO bench_problems (title, content, solution, created_at)
+SELECT
+    (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+       FROM generate_series(1, 6) WHERE g > 0),
+    (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+       FROM generate_series(1, 60) WHERE g > 0),
+    (SELECT string_agg(w[1 + floor(random() * array_length(w, 1))::int], ' ')
+       FROM generate_series(1, 40) WHERE g > 0),
+    now() - g * interval '1 minute'
+FROM generate_series(1, :rows) AS g, (SELECT CAST(:words AS text[]) AS w) AS vocab
+"""
+
+ILIKE_SQL = """
+SELECT id FROM bench_problems
+WHERE is_deleted = FALSE AND is_published = TRUE
+  AND (title ILIKE :term OR content ILIKE :term OR solution ILIKE :term)
+ORDER BY created_at DESC
+LIMIT 50
+"""
+
+FTS_SQL = """
+SELECT id, ts_rank_cd('{0.1, 0.2, 0.4, 1.0}'::real[], search_vector, q) AS relevance
+FROM bench_problems, websearch_to_tsquery('english', :keyword) AS q
+WHERE is_deleted = FALSE AND is_published = TRUE
+  AND search_vector @@ q
+ORDER BY relevance DESC, id DESC
+LIMIT 50
+"""
+
+def timed(conn, sql, params, repeat):
+    """执行多次，返回每次耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(text(sql), params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"  {name:<10} 中位数 {statistics.median(samples):8.2f}ms  "
+        f"p95 {p95:8.2f}ms  最大 {samples[-1]:8.2f}ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="题目搜索性能对比")
+    parser.add_argument("--rows", type=int, default=200_000, help="合成题目数量")
+    parser.add_argument("--repeat", type=int, default=20, help="每个关键词重复次数")
+    parser.add_argument(
+        "--keywords", nargs="+", default=["pigeonhole", "prime remainder", "tiling"],
+        help="测试关键词"
+    )
+    args = parser.parse_args()
+
+    engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URL))
+    with engine.connect() as conn:
+        print(f"🔧 生成合成题库: {args.rows} 行")
+        start = time.perf_counter()
+        conn.execute(text(SETUP_SQL))
+        conn.execute(text(FILL_SQL), {"rows": args.rows, "words": WORDS})
+        conn.execute(text("CREATE INDEX ON bench_problems USING GIN(search_vector)"))
+        conn.execute(text("ANALYZE bench_problems"))
+        print(f"✅ 完成，用时 {time.perf_counter() - start:.1f}秒\n")
+
+        for keyword in args.keywords:
+            print(f"🔍 关键词: {keyword!r}")
+            report("ILIKE", timed(conn, ILIKE_SQL, {"term": f"%{keyword}%"}, args.repeat))
+            report("全文检索", timed(conn, FTS_SQL, {"keyword": keyword}, args.repeat))
+
+            plan = conn.execute(text("EXPLAIN " + FTS_SQL), {"keyword": keyword}).fetchall()
+            uses_index = any("Bitmap Index Scan" in row[0] for row in plan)
+            print(f"  全文检索使用GIN索引: {'是' if uses_index else '否'}\n")
+
+if __name__ == "__main__":
+    main()
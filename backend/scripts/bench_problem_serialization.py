@@ -0,0 +1,114 @@
+"""
+题目列表序列化性能对比：ORM -> ProblemResponse vs 列元组 -> ProblemListRow
+
+不连接数据库，在内存中构造题目数据，分别模拟：
+  - 旧路径：ORM对象经from_attributes构造ProblemResponse（执行validator、读取accuracy_rate属性），
+    再由jsonable_encoder + json.dumps输出（FastAPI response_model的处理方式）
+  - 新路径：列元组转字典，由预先构建的problem_list_adapter直接dump_json（不校验）
+
+用法（在backend目录下）：
+  python scripts/bench_problem_serialization.py --rows 100 --repeat 500
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+sys.path.append('.')
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.models.problem import Problem
+from app.schemas.problem import ProblemResponse, problem_list_adapter
+
+response_adapter = TypeAdapter(List[ProblemResponse])
+
+def make_row(index: int) -> dict:
+    """构造一行题目数据（与PROBLEM_LIST_COLUMNS一致）"""
+    total = index * 7 % 300
+    correct = total * 3 // 5
+    return {
+        "id": index,
+        "title": f"第{index}题 数论与计数综合",
+        "content": "已知正整数n满足 n^2 + 3n + 5 能被 121 整除，求n的最小值。" * 3,
+        "content_type": "markdown",
+        "options": {"A": "1", "B": "2", "C": "3", "D": "不存在"},
+        "correct_answer": "D",
+        "solution": "对模11讨论，n^2 + 3n + 5 ≡ (n + 7)^2 (mod 11)……" * 4,
+        "solution_type": "markdown",
+        "difficulty": index % 5 + 1,
+        "source_type": "competition",
+        "source_year": 2000 + index % 24,
+        "source_detail": "全国初中数学联赛",
+        "estimated_time": 300,
+        "is_published": True,
+        "review_status": "approved",
+        "total_attempts": total,
+        "correct_attempts": correct,
+        "accuracy_rate": correct * 100.0 / total if total else 0.0,
+        "created_by": 1,
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=index),
+        "updated_at": None,
+    }
+
+def make_problem(row: dict) -> Problem:
+    """由同一行数据构造ORM对象（accuracy_rate是属性，不是列）"""
+    return Problem(**{key: value for key, value in row.items() if key != "accuracy_rate"})
+
+def orm_path(problems: List[Problem]) -> bytes:
+    validated = response_adapter.validate_python(problems, from_attributes=True)
+    return json.dumps(jsonable_encoder(validated)).encode()
+
+def fast_path(rows: List[dict]) -> bytes:
+    return problem_list_adapter.dump_json(rows)
+
+def timed(func, data, repeat):
+    """执行多次，返回每次耗时（毫秒）"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def report(name, samples):
+    samples = sorted(samples)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(
+        f"  {name:<10} 中位数 {statistics.median(samples):8.3f}ms  "
+        f"p95 {p95:8.3f}ms  最大 {samples[-1]:8.3f}ms"
+    )
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description="题目列表序列化性能对比")
+    parser.add_argument("--rows", type=int, default=100, help="每次序列化的题目数（对应limit）")
+    parser.add_argument("--repeat", type=int, default=500, help="重复次数")
+    args = parser.parse_args()
+
+    rows = [make_row(index) for index in range(1, args.rows + 1)]
+    problems = [make_problem(row) for row in rows]
+
+    # 两条路径输出的内容必须一致（时间的UTC写法可能是+00:00或Z）
+    old_output = json.loads(orm_path(problems))
+    new_output = json.loads(fast_path(rows))
+    for item in old_output + new_output:
+        item["accuracy_rate"] = round(item["accuracy_rate"], 6)
+        item["created_at"] = datetime.fromisoformat(item["created_at"].replace("Z", "+00:00"))
+    assert old_output == new_output, "两条路径的输出不一致"
+
+    # 预热
+    timed(orm_path, problems, 20)
+    timed(fast_path, rows, 20)
+
+    print(f"📦 序列化 {args.rows} 道题目，重复 {args.repeat} 次")
+    old = report("ORM路径", timed(orm_path, problems, args.repeat))
+    new = report("快速路径", timed(fast_path, rows, args.repeat))
+    print(f"  加速比 {old / new:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+答案提交接口压测：模拟全校考试时的集中交卷
+
+先创建若干练习会话，再以给定并发数持续提交答案，输出吞吐量、延迟，
+以及服务端合并出的批次数（每批一个事务，见/metrics或日志）
+
+用法（在backend目录下，先启动服务 uvicorn app.main:app --workers 1）：
+  python scripts/load_test_answers.py --username demo_student --password 123456 \
+      --concurrency 64 256 --duration 10 --problem-ids 1 2 3 4 5
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post(
+        "/api/v1/auth/login/json", json={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def create_session(client: httpx.AsyncClient) -> int:
+    response = await client.post("/api/v1/practice/sessions", json={"session_type": "exam"})
+    response.raise_for_status()
+    return response.json()["id"]
+
+async def worker(client, session_id, problem_ids, deadline, latencies, errors):
+    """循环提交答案直到deadline，记录每次请求耗时（毫秒）"""
+    while time.perf_counter() < deadline:
+        body = {
+            "problem_id": random.choice(problem_ids),
+            "user_answer": random.choice("ABCD"),
+            "time_spent": random.randint(10, 300),
+            "confidence_level": random.randint(1, 5),
+            "steps": [{"time": 5, "action": "read_question"}],
+        }
+        start = time.perf_counter()
+        try:
+            response = await client.post(f"/api/v1/practice/sessions/{session_id}/answers", json=body)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def run_level(base_url, token, concurrency, duration, sessions, problem_ids):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=30,
+    ) as client:
+        session_ids = [await create_session(client) for _ in range(sessions)]
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, session_ids[index % len(session_ids)], problem_ids, deadline, latencies, errors)
+            for index in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0.0
+    p99 = latencies[max(0, int(len(latencies) * 0.99) - 1)] if latencies else 0.0
+    median = statistics.median(latencies) if latencies else 0.0
+    print(
+        f"  并发 {concurrency:>4}  吞吐 {len(latencies) / elapsed:8.1f} 次/秒  "
+        f"中位数 {median:7.1f}ms  p95 {p95:7.1f}ms  p99 {p99:7.1f}ms  错误 {len(errors)}"
+    )
+
+async def main():
+    parser = argparse.ArgumentParser(description="答案提交接口压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="demo_student")
+    parser.add_argument("--password", default="123456")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[64, 256])
+    parser.add_argument("--duration", type=float, default=10.0, help="每个并发级别持续秒数")
+    parser.add_argument("--sessions", type=int, default=50, help="提交分散到的会话数")
+    parser.add_argument("--problem-ids", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+        token = await login(client, args.username, args.password)
+
+    print(f"📝 答案提交压测：{args.sessions} 个会话，每级 {args.duration:.0f} 秒")
+    for concurrency in args.concurrency:
+        await run_level(args.base_url, token, concurrency, args.duration, args.sessions, args.problem_ids)
+
+if __name__ == "__main__":
+    asyncio.run(main())
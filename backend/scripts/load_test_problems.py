@@ -0,0 +1,97 @@
+"""
+题目接口并发压测：观察吞吐量是否随并发客户端数增长
+
+对运行中的服务（单个uvicorn worker即可）依次以不同并发数请求同一组接口，
+输出每个并发级别的吞吐量和延迟。数据库调用阻塞事件循环时，吞吐量在并发1之后基本不变；
+异步数据层下吞吐量应随并发数增长，直到数据库或CPU饱和
+
+用法（在backend目录下，先启动服务 uvicorn app.main:app --workers 1）：
+  python scripts/load_test_problems.py --username admin --password admin123 \
+      --concurrency 1 2 4 8 16 32 --duration 10
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+ENDPOINTS = [
+    "/api/v1/problems/?limit=20",
+    "/api/v1/problems/stats/summary",
+    "/api/v1/problems/practice/random?count=10",
+    "/api/v1/auth/me",
+]
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    response = await client.post(
+        "/api/v1/auth/login/json", json={"username": username, "password": password}
+    )
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+async def worker(client, deadline, latencies, errors, offset):
+    """循环请求直到deadline，记录每次请求耗时（毫秒）"""
+    index = offset
+    while time.perf_counter() < deadline:
+        path = ENDPOINTS[index % len(ENDPOINTS)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 400:
+                errors.append(response.status_code)
+                continue
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+
+async def run_level(base_url, token, concurrency, duration):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        limits=limits,
+        timeout=30,
+    ) as client:
+        latencies, errors = [], []
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, deadline, latencies, errors, offset)
+            for offset in range(concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)] if latencies else 0.0
+    median = statistics.median(latencies) if latencies else 0.0
+    print(
+        f"  并发 {concurrency:>3}  吞吐 {len(latencies) / elapsed:8.1f} req/s  "
+        f"中位数 {median:7.1f}ms  p95 {p95:7.1f}ms  错误 {len(errors)}"
+    )
+    return len(latencies) / elapsed
+
+async def main():
+    parser = argparse.ArgumentParser(description="题目接口并发压测")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", default="admin")
+    parser.add_argument("--password", default="admin123")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duration", type=float, default=10.0, help="每个并发级别持续秒数")
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30) as client:
+        token = await login(client, args.username, args.password)
+
+    print(f"🚦 压测 {args.base_url}，每级 {args.duration:.0f} 秒")
+    baseline = None
+    for concurrency in args.concurrency:
+        throughput = await run_level(args.base_url, token, concurrency, args.duration)
+        baseline = baseline or throughput
+    if baseline:
+        print(f"  最高并发相对并发{args.concurrency[0]}的吞吐倍数: {throughput / baseline:.1f}x")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,46 @@
+"""
+学生画像增量更新（独立运行）
+
+合并游标之后的新答题记录后退出；--loop 时作为常驻后台进程定期运行
+（与应用内的后台线程共用job_cursors游标，可同时运行，不会重复合并）
+首次运行时游标为0，会按批合并全部历史记录
+
+用法（在backend目录下）：
+  python scripts/update_student_profiles.py
+  python scripts/update_student_profiles.py --loop --interval 30
+"""
+import argparse
+import sys
+import time
+
+sys.path.append('.')
+
+from app.core.config import settings
+from app.services.student_profiles import StudentProfileUpdater
+
+def main():
+    parser = argparse.ArgumentParser(description="学生画像增量更新")
+    parser.add_argument("--batch-size", type=int, default=settings.PROFILE_UPDATE_BATCH_SIZE, help="每批合并的答题记录数")
+    parser.add_argument("--loop", action="store_true", help="常驻运行，定期合并新记录")
+    parser.add_argument("--interval", type=float, default=settings.PROFILE_UPDATE_INTERVAL_SECONDS, help="常驻运行时的检查间隔（秒）")
+    args = parser.parse_args()
+
+    updater = StudentProfileUpdater(
+        interval=args.interval,
+        batch_size=args.batch_size,
+        settle_seconds=settings.PROFILE_SETTLE_SECONDS,
+        half_life_days=settings.PROFILE_MASTERY_HALF_LIFE_DAYS,
+        weeks_kept=settings.PROFILE_WEEKS_KEPT,
+    )
+
+    while True:
+        start = time.perf_counter()
+        merged = updater.catch_up()
+        elapsed = time.perf_counter() - start
+        print(f"📈 合并 {merged} 条新答题记录，用时 {elapsed:.2f}秒")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+if __name__ == "__main__":
+    main()
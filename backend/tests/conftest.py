@@ -0,0 +1,225 @@
+"""
+测试公共夹具和按接口限制SQL语句数（查询预算）
+依赖数据库的夹具在PostgreSQL不可用时跳过测试
+
+查询预算：测试中通过call_api发出的每个请求结束时，由request_instrumentation中间件通知，
+超出预算的请求会让测试失败，并列出执行次数最多的语句形状
+预算来源（优先级从高到低）：
+  1. 标记：@pytest.mark.query_budget(3) 或 @pytest.mark.query_budget({"GET /api/v1/problems/": 3})
+  2. 配置（pytest.ini）：
+       query_budgets =
+           GET /api/v1/problems/ = 3
+           GET /api/v1/problems/{problem_id} = 3
+  3. 配置 query_budget_default（未配置时不限制）
+接口名为"方法 路由模板"，与N+1告警日志中的endpoint一致
+"""
+import asyncio
+import os
+import uuid
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import pytest
+
+def pytest_addoption(parser):
+    parser.addini("query_budgets", "各接口的SQL语句数上限（每行：方法 路由 = 数量）", type="linelist", default=[])
+    parser.addini("query_budget_default", "未单独配置的接口的SQL语句数上限", default="")
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(limit): 限制本测试中每个请求的SQL语句数（整数，或 接口 -> 整数 的字典）",
+    )
+
+def _parse_budgets(lines: List[str]) -> Dict[str, int]:
+    budgets = {}
+    for line in lines:
+        endpoint, _, limit = line.rpartition("=")
+        if endpoint.strip():
+            budgets[endpoint.strip()] = int(limit)
+    return budgets
+
+def _resolve_budget(
+    endpoint: str,
+    marker_budget,
+    ini_budgets: Dict[str, int],
+    default: Optional[int]
+) -> Optional[int]:
+    if isinstance(marker_budget, int):
+        return marker_budget
+    if isinstance(marker_budget, dict) and endpoint in marker_budget:
+        return marker_budget[endpoint]
+    return ini_budgets.get(endpoint, default)
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    from app.core.query_stats import add_request_listener, remove_request_listener
+    
+    config = item.config
+    ini_budgets = _parse_budgets(config.getini("query_budgets"))
+    default_value = config.getini("query_budget_default")
+    default = int(default_value) if default_value else None
+    marker = item.get_closest_marker("query_budget")
+    marker_budget = marker.args[0] if marker and marker.args else None
+    
+    violations = []
+    
+    def check(endpoint, stats) -> None:
+        budget = _resolve_budget(endpoint, marker_budget, ini_budgets, default)
+        if budget is not None and stats.count > budget:
+            violations.append((endpoint, stats.count, budget, stats))
+    
+    add_request_listener(check)
+    try:
+        result = yield  # 测试本身失败时异常从这里抛出，不再叠加预算错误
+    finally:
+        remove_request_listener(check)
+    
+    if violations:
+        lines = []
+        for endpoint, count, budget, stats in violations:
+            lines.append(f"{endpoint}: {count} 条SQL，预算 {budget}")
+            for shape, times in stats.shapes.most_common(3):
+                lines.append(f"    {times}x {shape[:160]}")
+        pytest.fail("超出SQL查询预算:\n" + "\n".join(lines), pytrace=False)
+    return result
+
+class FakeRedis:
+    """Redis替身：内存字典实现get/set/delete，failing为真时所有操作抛出连接错误"""
+
+    def __init__(self):
+        self.data = {}
+        self.failing = False
+        self.calls = 0
+
+    def _call(self):
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError("redis unavailable")
+
+    def get(self, key):
+        self._call()
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        self._call()
+        if nx and key in self.data:
+            return None
+        self.data[key] = value if isinstance(value, bytes) else str(value).encode()
+        return True
+
+    def delete(self, *keys):
+        self._call()
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """同步引擎（用于准备测试数据）；连接不上数据库时跳过"""
+    from app.core.database import engine
+    
+    try:
+        with engine.connect():
+            pass
+    except Exception as e:
+        pytest.skip(f"数据库不可用: {e}")
+    return engine
+
+def _temporary_user(role: str):
+    """创建临时账号，产出(账号, Bearer请求头)，结束后删除"""
+    from app.core.database import SessionLocal
+    from app.core.security import create_access_token
+    from app.models.user import User
+    
+    username = f"test_{uuid.uuid4().hex[:12]}"
+    with SessionLocal() as db:
+        user = User(
+            username=username,
+            email=f"{username}@example.com",
+            hashed_password="!",
+            role=role,
+            is_active=True,
+        )
+        db.add(user)
+        db.commit()
+        user_id = user.id
+    
+    token = create_access_token({"sub": username})
+    yield SimpleNamespace(id=user_id, username=username, headers={"Authorization": f"Bearer {token}"})
+    
+    with SessionLocal() as db:
+        db.query(User).filter(User.id == user_id).delete(synchronize_session=False)
+        db.commit()
+
+@pytest.fixture
+def student(db_engine):
+    """临时学生账号及其Bearer请求头，测试结束后删除"""
+    yield from _temporary_user("student")
+
+@pytest.fixture
+def admin(db_engine):
+    """临时管理员账号及其Bearer请求头，测试结束后删除"""
+    yield from _temporary_user("admin")
+
+@pytest.fixture
+def published_problems(student):
+    """50道已发布的临时题目（创建者为student），返回题目ID列表"""
+    from app.core.database import SessionLocal
+    from app.models.problem import Problem
+    from app.services.problem_sampler import problem_sampler
+    
+    with SessionLocal() as db:
+        problems = [
+            Problem(
+                title=f"查询计数测试题 {i}",
+                content=f"{i} + 1 = ?",
+                options={"A": str(i + 1), "B": str(i), "C": str(i + 2), "D": str(i - 1)},
+                correct_answer="A",
+                difficulty=i % 5 + 1,
+                is_published=True,
+                review_status="approved",
+                created_by=student.id,
+            )
+            for i in range(50)
+        ]
+        db.add_all(problems)
+        db.commit()
+        problem_ids = [problem.id for problem in problems]
+    
+    # 题目由同步会话直接写入，下次抽题时重新加载ID池
+    problem_sampler.invalidate()
+    yield problem_ids
+    
+    with SessionLocal() as db:
+        db.query(Problem).filter(Problem.id.in_(problem_ids)).delete(synchronize_session=False)
+        db.commit()
+    problem_sampler.invalidate()
+
+@pytest.fixture
+def call_api(db_engine):
+    """
+    call_api(scenario)：在一个事件循环中运行协程函数scenario(client)并返回其结果
+    client为直连应用的httpx.AsyncClient（不执行lifespan，不启动后台任务）；
+    asyncpg连接绑定事件循环，结束时释放异步连接池
+    """
+    import httpx
+    
+    os.makedirs("uploads", exist_ok=True)  # app.main挂载的上传目录
+    from app.core.database import async_engine
+    from app.main import app
+    
+    def run(scenario):
+        async def main():
+            transport = httpx.ASGITransport(app=app)
+            try:
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await scenario(client)
+            finally:
+                await async_engine.dispose()
+        
+        return asyncio.run(main())
+    
+    return run
@@ -0,0 +1,105 @@
+"""
+两级缓存：一级进程内、二级Redis（替身）、Redis故障退化和single-flight
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core.cache import TTLCache, TwoTierCache
+
+def _two_tier(fake_redis, **kwargs):
+    return TwoTierCache("test", ttl=60, redis_client_factory=lambda: fake_redis, **kwargs)
+
+def test_l2_is_shared_between_processes(fake_redis):
+    writer = _two_tier(fake_redis)
+    reader = _two_tier(fake_redis)  # 另一个进程：一级缓存为空
+    writer.set(1, {"title": "鸡兔同笼"})
+    
+    assert reader.get_or_load(1, lambda: pytest.fail("不应回源")) == {"title": "鸡兔同笼"}
+    assert reader.l2_hits == 1
+
+def test_delete_clears_both_tiers(fake_redis):
+    cache = _two_tier(fake_redis)
+    cache.set(1, "old")
+    cache.delete(1)
+    
+    assert fake_redis.data == {}
+    assert cache.get_or_load(1, lambda: "new") == "new"
+
+def test_async_set_and_delete(fake_redis):
+    cache = _two_tier(fake_redis)
+    other = _two_tier(fake_redis)
+    
+    async def scenario():
+        await cache.set_async(1, "value")
+        assert await other.get_or_load_async(1, _loader_returning("reloaded")) == "value"
+        await cache.delete_async(1)
+        assert cache.local.get(1) is None
+        assert fake_redis.data == {}
+    
+    asyncio.run(scenario())
+
+def test_redis_failure_falls_back_to_local(fake_redis):
+    cache = _two_tier(fake_redis, retry_after=30)
+    fake_redis.failing = True
+    
+    assert cache.get_or_load(1, lambda: "loaded") == "loaded"
+    assert cache.get_or_load(1, lambda: "reloaded") == "loaded"  # 一级缓存命中
+    
+    # 退避期间不再访问Redis
+    calls = fake_redis.calls
+    cache.set(2, "value")
+    cache.delete(2)
+    assert fake_redis.calls == calls
+
+def test_async_redis_failure_falls_back_to_loader(fake_redis):
+    cache = _two_tier(fake_redis)
+    fake_redis.failing = True
+    
+    assert asyncio.run(cache.get_or_load_async(1, _loader_returning("loaded"))) == "loaded"
+
+def test_single_flight_threads():
+    cache = TTLCache(ttl=60)
+    loads = []
+    started = threading.Event()
+    
+    def loader():
+        loads.append(1)
+        started.set()
+        time.sleep(0.05)
+        return "value"
+    
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_load("key", loader)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == ["value"] * 8
+    assert len(loads) == 1
+
+def test_single_flight_async(fake_redis):
+    cache = _two_tier(fake_redis)
+    loads = []
+    
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+    
+    async def scenario():
+        return await asyncio.gather(*(cache.get_or_load_async("key", loader) for _ in range(8)))
+    
+    assert asyncio.run(scenario()) == ["value"] * 8
+    assert len(loads) == 1
+
+def _loader_returning(value):
+    async def loader():
+        return value
+    return loader
@@ -0,0 +1,28 @@
+"""
+条件请求：弱ETag，If-None-Match按弱比较匹配
+"""
+from starlette.requests import Request
+
+from app.api.etag import etag_matches, make_etag
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "headers": headers})
+
+def test_etag_is_weak_and_stable():
+    etag = make_etag("problems", 7, True)
+    
+    assert etag.startswith('W/"')
+    assert etag == make_etag("problems", 7, True)
+    assert etag != make_etag("problems", 8, True)
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("problem", 1, "2024-01-01")
+    opaque = etag.removeprefix("W/")
+    
+    assert etag_matches(_request(etag), etag)
+    assert etag_matches(_request(opaque), etag)
+    assert etag_matches(_request(f'"other", {etag}'), etag)
+    assert etag_matches(_request("*"), etag)
+    assert not etag_matches(_request('"other"'), etag)
+    assert not etag_matches(_request(), etag)
@@ -0,0 +1,16 @@
+"""
+模型可以导入，映射配置完整（关系、延迟加载的生成列）
+"""
+from sqlalchemy.orm import configure_mappers
+
+from app.models import knowledge_point, practice, problem, user  # noqa: F401
+
+def test_mappers_configure():
+    configure_mappers()
+
+def test_search_vectors_are_deferred():
+    attrs = problem.Problem.__mapper__.attrs
+    
+    for name in ("search_vector", "search_vector_cjk"):
+        assert attrs[name].deferred
+        assert problem.Problem.__table__.c[name].computed is not None
@@ -0,0 +1,62 @@
+"""
+练习会话引擎：题单位置的占用、释放和推进（Redis替身）
+"""
+import asyncio
+
+import pytest
+
+from app.services.practice_engine import PracticeSessionEngine
+
+@pytest.fixture
+def engine(fake_redis, monkeypatch):
+    engine = PracticeSessionEngine()
+    monkeypatch.setattr(engine, "_redis", lambda: fake_redis)
+    return engine
+
+def _payload():
+    return {"user_id": 1, "problem_ids": [10, 11, 12], "questions": [], "position": 0}
+
+def test_claim_accepts_only_current_problem_once(engine):
+    payload = _payload()
+    
+    async def scenario():
+        with pytest.raises(ValueError):
+            await engine.claim(1, payload, 11)  # 跳题
+        position = await engine.claim(1, payload, 10)
+        with pytest.raises(ValueError):
+            await engine.claim(1, payload, 10)  # 重复提交
+        return position
+    
+    assert asyncio.run(scenario()) == 0
+
+def test_cancelled_submit_keeps_claim_and_advances_after_write(engine):
+    payload = _payload()
+    
+    async def scenario():
+        position = await engine.claim(1, payload, 10)
+        pending = asyncio.get_running_loop().create_future()
+        engine.advance_when_written(1, payload, position, pending)
+        
+        # 写入完成前重试被拒绝
+        with pytest.raises(ValueError):
+            await engine.claim(1, payload, 10)
+        
+        pending.set_result(99)
+        await asyncio.gather(*engine._pending_advances)
+        return await engine.position(1, payload)
+    
+    assert asyncio.run(scenario()) == 1
+
+def test_failed_write_after_cancel_releases_claim(engine):
+    payload = _payload()
+    
+    async def scenario():
+        position = await engine.claim(1, payload, 10)
+        pending = asyncio.get_running_loop().create_future()
+        engine.advance_when_written(1, payload, position, pending)
+        
+        pending.set_exception(RuntimeError("写入失败"))
+        await asyncio.gather(*engine._pending_advances)
+        return await engine.claim(1, payload, 10)  # 可以重新提交
+    
+    assert asyncio.run(scenario()) == 0
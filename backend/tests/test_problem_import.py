@@ -0,0 +1,65 @@
+"""
+批量导入：解析和校验在线程中逐批进行，事件循环上只执行数据库写入
+"""
+import asyncio
+import io
+import json
+import threading
+
+from app.services import problem_import
+
+def _jsonl(count, bad_rows=()):
+    lines = []
+    for i in range(count):
+        if i in bad_rows:
+            lines.append("{not json")
+            continue
+        lines.append(json.dumps({
+            "title": f"题目{i}",
+            "content": "1 + 1 = ?",
+            "options": {"A": "1", "B": "2", "C": "3", "D": "4"},
+            "correct_answer": "B",
+        }, ensure_ascii=False))
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+class FakeAsyncSession:
+    """只记录run_sync在哪个线程执行"""
+
+    def __init__(self):
+        self.threads = set()
+
+    async def run_sync(self, fn, *args, **kwargs):
+        self.threads.add(threading.get_ident())
+        return fn(self, *args, **kwargs)
+
+def test_async_import_parses_off_the_event_loop(monkeypatch):
+    parse_threads = set()
+    flushed = []
+    read_batch = problem_import._read_batch
+    
+    def tracking_read_batch(*args):
+        parse_threads.add(threading.get_ident())
+        return read_batch(*args)
+    
+    def fake_flush(db, batch, created_by, report):
+        flushed.append([row for row, _ in batch])
+        report.problem_ids.extend(row for row, _ in batch)
+    
+    monkeypatch.setattr(problem_import, "_read_batch", tracking_read_batch)
+    monkeypatch.setattr(problem_import, "_flush_batch", fake_flush)
+    db = FakeAsyncSession()
+    
+    async def scenario():
+        result = await problem_import.import_problems_async(
+            db, _jsonl(5, bad_rows={2}), "jsonl", created_by=1, batch_size=2
+        )
+        return result, threading.get_ident()
+    
+    result, loop_thread = asyncio.run(scenario())
+    
+    assert loop_thread not in parse_threads
+    assert db.threads == {loop_thread}
+    assert flushed == [[1, 2], [4, 5]]
+    assert result["total_rows"] == 5
+    assert result["imported"] == 4
+    assert result["errors"][0]["row"] == 3
@@ -0,0 +1,26 @@
+"""
+题目写接口（需要PostgreSQL，不可用时跳过）
+"""
+from datetime import datetime
+
+PROBLEMS_URL = "/api/v1/problems/"
+
+def test_update_problem_returns_refreshed_problem(call_api, admin, published_problems):
+    problem_id = published_problems[0]
+    url = f"{PROBLEMS_URL}{problem_id}"
+    
+    async def scenario(client):
+        before = await client.get(url, headers=admin.headers)
+        updated = await client.put(url, headers=admin.headers, json={"title": "更新后的标题", "difficulty": 5})
+        after = await client.get(url, headers=admin.headers)
+        return before, updated, after
+    
+    before, updated, after = call_api(scenario)
+    
+    assert updated.status_code == 200, updated.text
+    body = updated.json()
+    assert body["title"] == "更新后的标题"
+    assert body["difficulty"] == 5
+    assert datetime.fromisoformat(body["updated_at"]) >= datetime.fromisoformat(before.json()["updated_at"])
+    # 详情缓存随更新失效
+    assert after.json()["title"] == "更新后的标题"
@@ -0,0 +1,53 @@
+"""
+抽题ID池：按难度的下标抽样、知识点过滤和增删后的一致性
+"""
+import time
+
+from app.services.problem_sampler import ProblemSampler
+
+def _sampler(problems):
+    """problems: [(题目ID, 难度, 知识点ID列表)]"""
+    sampler = ProblemSampler(refresh_interval=3600)
+    sampler._loaded_at = time.monotonic()  # 跳过数据库加载
+    for problem_id, difficulty, kp_ids in problems:
+        sampler.refresh_problem(problem_id, True, difficulty, kp_ids)
+    return sampler
+
+def test_sample_by_difficulty_without_duplicates():
+    sampler = _sampler([(i, i % 5 + 1, []) for i in range(1, 1001)])
+    
+    ids = sampler.sample_ids(None, 50, difficulty_range=[2, 3])
+    assert len(ids) == len(set(ids)) == 50
+    assert all(i % 5 + 1 in (2, 3) for i in ids)
+    
+    assert sorted(sampler.sample_ids(None, 5000)) == list(range(1, 1001))
+
+def test_discard_keeps_pools_consistent():
+    sampler = _sampler([(i, 3, [10]) for i in range(1, 101)])
+    sampler.discard(range(1, 100, 2))
+    sampler.refresh_problem(2, False)
+    
+    remaining = set(range(4, 101, 2))
+    assert set(sampler.sample_ids(None, 1000, difficulty_range=[3])) == remaining
+    assert set(sampler.sample_ids(None, 1000, knowledge_point_groups=[{10}])) == remaining
+
+def test_knowledge_point_groups_and_difficulty():
+    sampler = _sampler([
+        (1, 1, [10]), (2, 2, [10, 20]), (3, 2, [20]), (4, 3, [10, 20]),
+    ])
+    
+    assert set(sampler.sample_ids(None, 10, knowledge_point_groups=[{10}, {20}])) == {1, 2, 3, 4}
+    assert set(sampler.sample_ids(None, 10, knowledge_point_groups=[{10}, {20}], match_all=True)) == {2, 4}
+    assert set(sampler.sample_ids(
+        None, 10, difficulty_range=[2], knowledge_point_groups=[{10}, {20}], match_all=True
+    )) == {2}
+
+def test_sampling_is_roughly_uniform():
+    sampler = _sampler([(i, 1 if i <= 10 else 2, []) for i in range(1, 21)])
+    counts = dict.fromkeys(range(1, 21), 0)
+    for _ in range(2000):
+        for problem_id in sampler.sample_ids(None, 1):
+            counts[problem_id] += 1
+    
+    # 期望每题100次
+    assert min(counts.values()) > 50 and max(counts.values()) < 150
@@ -0,0 +1,72 @@
+"""
+端点的SQL语句数固定，不随返回的题目数增长（需要PostgreSQL，不可用时跳过）
+每个测试先发一次预热请求，加载调用者缓存和抽题ID池，计数只包含端点自身的查询
+"""
+import pytest
+
+from app.core.query_stats import track_queries
+from app.crud.problem import problem_cache
+
+PROBLEMS_URL = "/api/v1/problems/"
+RANDOM_URL = "/api/v1/problems/practice/random"
+
+async def _get_counted(client, url, headers, params=None):
+    with track_queries() as stats:
+        response = await client.get(url, headers=headers, params=params)
+    assert response.status_code == 200, response.text
+    return response, stats
+
+def test_random_practice_problems_queries(call_api, student, published_problems):
+    params = {"count": 50}
+    
+    async def scenario(client):
+        await client.get(RANDOM_URL, headers=student.headers, params=params)
+        return await _get_counted(client, RANDOM_URL, student.headers, params)
+    
+    response, stats = call_api(scenario)
+    
+    assert len(response.json()) == 50
+    # 按主键取回题目 + selectinload知识点
+    assert stats.count == 2, stats.shapes
+
+def test_problem_list_queries(call_api, student, published_problems):
+    params = {"limit": 50}
+    
+    async def scenario(client):
+        await client.get(PROBLEMS_URL, headers=student.headers, params=params)
+        return await _get_counted(client, PROBLEMS_URL, student.headers, params)
+    
+    response, stats = call_api(scenario)
+    
+    assert len(response.json()) == 50
+    # 集合版本号（ETag） + 列表列元组
+    assert stats.count == 2, stats.shapes
+
+def test_problem_detail_queries(call_api, student, published_problems):
+    problem_id = published_problems[0]
+    url = f"{PROBLEMS_URL}{problem_id}"
+    
+    async def scenario(client):
+        await client.get(url, headers=student.headers)
+        await problem_cache.delete_async(problem_id)
+        cold = await _get_counted(client, url, student.headers)
+        warm = await _get_counted(client, url, student.headers)
+        return cold, warm
+    
+    (cold_response, cold), (warm_response, warm) = call_api(scenario)
+    
+    assert cold_response.json()["id"] == problem_id
+    assert warm_response.json() == cold_response.json()
+    # 版本信息 + 一次JOIN加载详情；缓存命中时只读取版本信息
+    assert cold.count == 2, cold.shapes
+    assert warm.count == 1, warm.shapes
+
+@pytest.mark.query_budget({"GET /api/v1/problems/{problem_id}": 3})
+def test_problem_detail_query_budget(call_api, student, published_problems):
+    # 首次请求：调用者查询 + 版本信息 + 详情，之后的请求都应在预算内
+    async def scenario(client):
+        for problem_id in published_problems[:10]:
+            response = await client.get(f"{PROBLEMS_URL}{problem_id}", headers=student.headers)
+            assert response.status_code == 200, response.text
+    
+    call_api(scenario)
@@ -0,0 +1,22 @@
+"""
+track_queries：按代码块统计SQL，嵌套时内层语句同时计入外层
+"""
+from sqlalchemy import create_engine, text
+
+from app.core.query_stats import instrument_engine, track_queries
+
+def test_nested_track_queries_count_into_outer():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    
+    with engine.connect() as conn:
+        with track_queries() as outer:
+            conn.execute(text("SELECT 1"))
+            with track_queries() as inner:
+                conn.execute(text("SELECT 2"))
+                conn.execute(text("SELECT 3"))
+        conn.execute(text("SELECT 4"))
+    
+    assert inner.count == 2
+    assert outer.count == 3
+    assert outer.shapes["SELECT N"] == 3
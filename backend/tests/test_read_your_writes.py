@@ -0,0 +1,102 @@
+"""
+读己之写：flush/DML监听器只设置会话标记，中间件在响应发出前发布到recent_writers（Redis替身）
+"""
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI
+
+from app.core import database
+from app.core.cache import TwoTierCache
+from app.core.security import create_access_token
+
+@pytest.fixture
+def writers(fake_redis, monkeypatch):
+    cache = TwoTierCache("recent-writer", ttl=5, redis_client_factory=lambda: fake_redis)
+    monkeypatch.setattr(database, "recent_writers", cache)
+    return cache
+
+@pytest.fixture
+def app(monkeypatch):
+    """与app.main相同的接线：读己之写中间件 + 主库/只读会话依赖（配置了副本）"""
+    monkeypatch.setattr(database, "async_replica_engine", object())
+    app = FastAPI()
+    
+    @app.middleware("http")
+    async def read_your_writes(request, call_next):
+        response = await call_next(request)
+        await database.publish_request_writes(request)
+        return response
+    
+    @app.post("/write")
+    async def write(db=Depends(database.get_async_db)):
+        database.mark_write(db)
+        return {}
+    
+    @app.get("/read")
+    async def read(db=Depends(database.get_async_read_db)):
+        return {}
+    
+    @app.get("/read-state")
+    async def read_state(db=Depends(database.get_async_read_db)):
+        return {"use_replica": db.info["use_replica"]}
+    
+    return app
+
+async def _call(app, method, path, username, on_start=None):
+    """直接调用ASGI应用；on_start在响应头发出时调用（此时客户端已经可以发出下一个请求）"""
+    token = create_access_token({"sub": username})
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": method, "scheme": "http", "path": path, "raw_path": path.encode(),
+        "query_string": b"", "root_path": "", "client": ("127.0.0.1", 50000), "server": ("test", 80),
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+    }
+    received = False
+    body = []
+    
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await asyncio.Event().wait()
+    
+    async def send(message):
+        if message["type"] == "http.response.start" and on_start is not None:
+            on_start()
+        elif message["type"] == "http.response.body":
+            body.append(message.get("body", b""))
+    
+    await app(scope, receive, send)
+    return b"".join(body)
+
+def test_mark_write_only_sets_session_flag(writers, fake_redis):
+    session = database.RoutingSession(info={"caller": "alice"})
+    database._mark_write(session)
+    
+    assert session.info["wrote"] is True
+    assert fake_redis.calls == 0
+    assert writers.local.get("alice") is None
+
+def test_read_right_after_write_response_goes_to_primary(writers, fake_redis, app):
+    marked_at_response = []
+    
+    async def scenario():
+        await _call(app, "POST", "/write", "alice", lambda: marked_at_response.append(writers.local.get("alice")))
+        alice = await _call(app, "GET", "/read-state", "alice")
+        bob = await _call(app, "GET", "/read-state", "bob")
+        return alice, bob
+    
+    alice, bob = asyncio.run(scenario())
+    
+    assert marked_at_response == [True]  # 响应发出之前已经发布
+    assert "recent-writer:alice" in fake_redis.data
+    assert alice == b'{"use_replica":false}'
+    assert bob == b'{"use_replica":true}'
+
+def test_reads_do_not_publish(writers, fake_redis, app):
+    asyncio.run(_call(app, "GET", "/read", "carol"))
+    
+    assert writers.local.get("carol") is None
+    assert "recent-writer:carol" not in fake_redis.data
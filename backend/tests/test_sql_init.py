@@ -0,0 +1,57 @@
+"""
+初始化脚本中 @ddl 片段的拆分和读取
+"""
+import pytest
+
+from app.core.sql_init import ddl_statements, split_statements
+
+# 模型通过attach_ddl引用的片段
+MODEL_DDL_BLOCKS = (
+    "cjk_segment", "problem_collection_version", "knowledge_point_count",
+    "knowledge_point_path", "answer_knowledge_points", "job_cursors",
+)
+
+def test_split_keeps_function_bodies_and_strings():
+    sql = """
+    -- 注释; 不拆分
+    CREATE FUNCTION f() RETURNS TEXT AS $$
+    BEGIN
+        RETURN 'a;b';
+    END;
+    $$ LANGUAGE plpgsql;
+    -- 只有注释的片段被丢弃
+    ;
+    INSERT INTO t VALUES ('x;y');
+    """
+    statements = split_statements(sql)
+    assert len(statements) == 2
+    assert statements[0].startswith("CREATE FUNCTION f()")
+    assert "RETURN 'a;b';" in statements[0]
+    assert statements[1] == "INSERT INTO t VALUES ('x;y')"
+
+@pytest.mark.parametrize("name", MODEL_DDL_BLOCKS)
+def test_model_ddl_blocks_exist_in_init_scripts(name):
+    assert ddl_statements(name)
+
+def test_cjk_segment_is_one_statement():
+    statements = ddl_statements("cjk_segment")
+    assert len(statements) == 1
+    assert statements[0].startswith("CREATE OR REPLACE FUNCTION cjk_segment")
+
+def test_counter_updates_do_not_bump_collection_version():
+    trigger = next(
+        statement for statement in ddl_statements("problem_collection_version")
+        if statement.startswith("CREATE CONSTRAINT TRIGGER bump_problems_version")
+    )
+    assert "UPDATE OF" in trigger
+    assert "total_attempts" not in trigger and "correct_attempts" not in trigger
+
+def test_collection_version_bumps_at_commit():
+    triggers = [
+        statement for statement in ddl_statements("problem_collection_version")
+        if statement.startswith(("CREATE TRIGGER", "CREATE CONSTRAINT TRIGGER"))
+    ]
+    assert len(triggers) == 2
+    for trigger in triggers:
+        assert trigger.startswith("CREATE CONSTRAINT TRIGGER")
+        assert "DEFERRABLE INITIALLY DEFERRED" in trigger
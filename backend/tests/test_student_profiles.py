@@ -0,0 +1,33 @@
+"""
+学生画像增量合并
+"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.services.student_profiles import fold_answers
+
+def _answer(is_correct: bool):
+    return SimpleNamespace(
+        is_correct=is_correct,
+        time_spent=30,
+        answered_at=datetime(2024, 5, 21, 8, 30, tzinfo=timezone.utc),
+        knowledge_point_ids=[1],
+        difficulty=3,
+    )
+
+def test_correct_count_is_exact_across_batches():
+    state = None
+    for _ in range(300):
+        # 1/3正确率在每批合并后四舍五入，答对总数不能由正确率反推
+        state = fold_answers(state, [_answer(True), _answer(False), _answer(False)])
+    
+    assert state["total_problems_attempted"] == 900
+    assert state["total_correct"] == 300
+    assert state["overall_accuracy"] == 33.33
+
+def test_legacy_profile_without_correct_count():
+    state = {"total_problems_attempted": 4, "overall_accuracy": 75.0, "total_correct": None}
+    state = fold_answers(state, [_answer(True)])
+    
+    assert state["total_correct"] == 4
+    assert state["total_problems_attempted"] == 5
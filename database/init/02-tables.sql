@@ -40,7 +40,12 @@ CREATE TABLE knowledge_points (
     name VARCHAR(100) NOT NULL,  -- 知识点名称
     code VARCHAR(50) UNIQUE NOT NULL,  -- 知识点编码，如 'geometry.plane.area'
     parent_id INTEGER REFERENCES knowledge_points(id) ON DELETE CASCADE,
-    level INTEGER NOT NULL DEFAULT 1,  -- 层级：1-一级，2-二级...
+    level INTEGER NOT NULL DEFAULT 1,  -- 层级：1-一级，2-二级...（触发器按路径深度维护）
+    
+    -- 物化路径（触发器维护，见03-indexes.sql）
+    path TEXT COLLATE "C" NOT NULL DEFAULT '',  -- 祖先ID链，如 '/2/11/'
+    full_path TEXT NOT NULL DEFAULT '',  -- 祖先编码依次用'.'连接
+    
     description TEXT,
     
     -- 排序和权重
@@ -56,6 +61,40 @@ CREATE TABLE knowledge_points (
 
 COMMENT ON TABLE knowledge_points IS '知识点表（支持多级分类）';
 COMMENT ON COLUMN knowledge_points.code IS '知识点编码，用于快速查询和关联，如 algebra.equation.quadratic';
+COMMENT ON COLUMN knowledge_points.path IS '物化路径（祖先ID链），子树查询为索引范围扫描';
+
+-- 中文分词函数：CJK连续片段展开为重叠二元组，末字单独成词，其余文本原样保留
+-- 例如 '三角形面积' -> '三角 角形 形面 面积 积'
+-- （数据库使用C locale，pg_trgm和默认解析器都不会切分中文）
+-- @ddl cjk_segment
+CREATE OR REPLACE FUNCTION cjk_segment(src TEXT)
+RETURNS TEXT AS $$
+DECLARE
+    part TEXT[];
+    run TEXT;
+    result TEXT := '';
+    i INTEGER;
+BEGIN
+    IF src IS NULL THEN
+        RETURN '';
+    END IF;
+    
+    FOR part IN SELECT regexp_matches(src, '([^\u3400-\u9fff]+)|([\u3400-\u9fff]+)', 'g') LOOP
+        IF part[2] IS NULL THEN
+            result := result || ' ' || part[1];
+        ELSE
+            run := part[2];
+            FOR i IN 1 .. char_length(run) - 1 LOOP
+                result := result || ' ' || substr(run, i, 2);
+            END LOOP;
+            result := result || ' ' || substr(run, char_length(run), 1);
+        END IF;
+    END LOOP;
+    
+    RETURN result;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE;
+-- @end
 
 -- 题目表
 CREATE TABLE problems (
@@ -108,12 +147,20 @@ CREATE TABLE problems (
         setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
         setweight(to_tsvector('english', coalesce(content, '')), 'B') ||
         setweight(to_tsvector('english', coalesce(solution, '')), 'C')
+    ) STORED,
+    
+    -- 中文全文搜索（二元组分词）
+    search_vector_cjk tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', cjk_segment(title)), 'A') ||
+        setweight(to_tsvector('simple', cjk_segment(content)), 'B') ||
+        setweight(to_tsvector('simple', cjk_segment(solution)), 'C')
     ) STORED
 );
 
 COMMENT ON TABLE problems IS '题目表';
 COMMENT ON COLUMN problems.options IS '题目选项，JSON格式：{"A": "选项A内容", "B": "选项B内容", ...}';
 COMMENT ON COLUMN problems.search_vector IS '全文搜索向量，用于快速搜索题目';
+COMMENT ON COLUMN problems.search_vector_cjk IS '中文全文搜索向量（cjk_segment二元组分词），查询含中文时使用';
 
 -- 题目-知识点关联表（多对多）
 CREATE TABLE problem_knowledge_points (
@@ -147,8 +194,13 @@ CREATE TABLE practice_sessions (
     completed_questions INTEGER DEFAULT 0,
     correct_questions INTEGER DEFAULT 0,
     
+    -- 题单和进度（创建时按配置预选题目；进度由会话引擎定期批量写回）
+    problem_ids INTEGER[],
+    current_index INTEGER DEFAULT 0,
+    
     -- 时间跟踪
     started_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    last_activity_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
     completed_at TIMESTAMP WITH TIME ZONE,
     total_duration INTEGER,  -- 总用时（秒）
     
@@ -163,6 +215,8 @@ CREATE TABLE practice_sessions (
 
 COMMENT ON TABLE practice_sessions IS '练习会话表';
 COMMENT ON COLUMN practice_sessions.config IS '练习配置JSON，如 {"knowledge_points": [1,2,3], "difficulty": [3,4], "count": 20}';
+COMMENT ON COLUMN practice_sessions.problem_ids IS '预选题单（按作答顺序），自由练习为NULL';
+COMMENT ON COLUMN practice_sessions.last_activity_at IS '最近一次取题或答题的时间，超时未活动的会话由后台任务标记为abandoned';
 
 -- 答题记录表（核心学习数据）
 CREATE TABLE answer_records (
@@ -239,11 +293,13 @@ CREATE TABLE student_profiles (
     -- 总体统计
     total_practice_time INTEGER DEFAULT 0,  -- 总练习时间（秒）
     total_problems_attempted INTEGER DEFAULT 0,
+    total_correct INTEGER,  -- 答对总数（增量合并按整数累加；早期画像为NULL，由overall_accuracy推算）
     overall_accuracy FLOAT DEFAULT 0,
     
     -- 知识点掌握度（JSON格式）
     knowledge_mastery JSONB DEFAULT '{}'::jsonb,
-    -- 格式: {"knowledge_point_id": {"score": 0.85, "attempts": 10, "last_practiced": "2024-05-21"}}
+    -- 格式: {"knowledge_point_id": {"score": 0.85, "attempts": 10, "last_practiced": "2024-05-21T08:30:00+00:00", ...}}
+    -- score为按时间指数衰减加权的正确率，weight为衰减后的证据量（见app/services/student_profiles.py）
     
     -- 难度表现
     difficulty_performance JSONB DEFAULT '{}'::jsonb,
@@ -266,6 +322,44 @@ CREATE TABLE student_profiles (
 
 COMMENT ON TABLE student_profiles IS '学生能力画像表';
 COMMENT ON COLUMN student_profiles.knowledge_mastery IS '知识点掌握度，JSON格式存储';
+COMMENT ON COLUMN student_profiles.last_calculated_at IS '画像最近一次合并新答题记录的时间（增量位置见job_cursors）';
+
+-- 集合版本号表（列表响应ETag使用，由语句级触发器在同一事务内递增）
+-- @ddl problem_collection_version
+CREATE TABLE collection_versions (
+    name VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0
+);
+
+COMMENT ON TABLE collection_versions IS '集合版本号（problems等集合的内容写入后递增，用于HTTP条件请求；答题计数不计入）';
+
+INSERT INTO collection_versions (name, version) VALUES ('problems', 0);
+-- @end
+
+-- 知识点题目数增量表（触发器按语句聚合后追加，后台任务定期合并到knowledge_points.problem_count）
+-- @ddl knowledge_point_count
+CREATE TABLE knowledge_point_count_deltas (
+    id BIGSERIAL PRIMARY KEY,
+    knowledge_point_id INTEGER NOT NULL,
+    delta INTEGER NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE knowledge_point_count_deltas IS '知识点题目数的待合并增量（只追加，写入方不锁knowledge_points热点行）';
+-- @end
+
+-- 后台任务游标（增量任务已处理到的位置，行锁保证同一时刻只有一个进程在处理）
+-- @ddl job_cursors
+CREATE TABLE job_cursors (
+    name VARCHAR(50) PRIMARY KEY,
+    position BIGINT NOT NULL DEFAULT 0,  -- 已处理的最大记录ID
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMENT ON TABLE job_cursors IS '增量后台任务的处理位置（如student_profiles已合并到的answer_records.id）';
+
+INSERT INTO job_cursors (name, position) VALUES ('student_profiles', 0);
+-- @end
 
 -- 系统配置表
 CREATE TABLE system_configs (
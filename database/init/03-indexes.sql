@@ -17,16 +17,26 @@ CREATE INDEX idx_problems_is_published ON problems(is_published) WHERE is_publis
 CREATE INDEX idx_problems_created_at ON problems(created_at DESC);
 CREATE INDEX idx_problems_review_status ON problems(review_status);
 
+-- 游标分页索引：(排序键, id)，与ProblemFilter允许的sort_by一一对应
+CREATE INDEX idx_problems_keyset_created_at ON problems(created_at, id) WHERE is_deleted = FALSE;
+CREATE INDEX idx_problems_keyset_updated_at ON problems(updated_at, id) WHERE is_deleted = FALSE;
+CREATE INDEX idx_problems_keyset_difficulty ON problems(difficulty, id) WHERE is_deleted = FALSE;
+CREATE INDEX idx_problems_keyset_total_attempts ON problems(total_attempts, id) WHERE is_deleted = FALSE;
+CREATE INDEX idx_problems_keyset_title ON problems(title, id) WHERE is_deleted = FALSE;
+
 -- 全文搜索索引
 CREATE INDEX idx_problems_search ON problems USING GIN(search_vector);
+CREATE INDEX idx_problems_search_cjk ON problems USING GIN(search_vector_cjk);
 
 -- knowledge_points表索引
 CREATE INDEX idx_knowledge_points_parent_id ON knowledge_points(parent_id);
 CREATE INDEX idx_knowledge_points_code ON knowledge_points(code);
 CREATE INDEX idx_knowledge_points_level ON knowledge_points(level);
+CREATE INDEX idx_knowledge_points_path ON knowledge_points(path);
 
 -- problem_knowledge_points表索引
-CREATE INDEX idx_pkp_knowledge_point_id ON problem_knowledge_points(knowledge_point_id);
+-- 按知识点找题目的覆盖索引：EXISTS半连接只读索引（主键(problem_id, knowledge_point_id)负责反方向）
+CREATE INDEX idx_pkp_knowledge_point_problem ON problem_knowledge_points(knowledge_point_id, problem_id);
 CREATE INDEX idx_pkp_problem_id ON problem_knowledge_points(problem_id);
 
 -- practice_sessions表索引
@@ -34,6 +44,8 @@ CREATE INDEX idx_sessions_user_id ON practice_sessions(user_id);
 CREATE INDEX idx_sessions_status ON practice_sessions(status);
 CREATE INDEX idx_sessions_started_at ON practice_sessions(started_at DESC);
 CREATE INDEX idx_sessions_user_status ON practice_sessions(user_id, status);
+-- 放弃会话清理：只索引进行中的会话
+CREATE INDEX idx_sessions_in_progress_activity ON practice_sessions(last_activity_at) WHERE status = 'in_progress';
 
 -- answer_records表索引（查询最频繁的表）
 CREATE INDEX idx_answers_user_id ON answer_records(user_id);
@@ -43,6 +55,8 @@ CREATE INDEX idx_answers_is_correct ON answer_records(is_correct);
 CREATE INDEX idx_answers_answered_at ON answer_records(answered_at DESC);
 CREATE INDEX idx_answers_user_problem ON answer_records(user_id, problem_id);
 CREATE INDEX idx_answers_knowledge_points ON answer_records USING GIN(knowledge_point_ids);
+-- 回填任务按批查找未填充知识点的记录
+CREATE INDEX idx_answers_missing_knowledge_points ON answer_records(id) WHERE knowledge_point_ids IS NULL;
 
 -- mistake_collections表索引
 CREATE INDEX idx_mistakes_user_id ON mistake_collections(user_id);
@@ -73,8 +87,12 @@ CREATE TRIGGER update_users_updated_at BEFORE UPDATE ON users
 CREATE TRIGGER update_knowledge_points_updated_at BEFORE UPDATE ON knowledge_points
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- 答题统计刷新只改total_attempts/correct_attempts，不视为题目修改（updated_at是详情ETag和缓存的版本）
 CREATE TRIGGER update_problems_updated_at BEFORE UPDATE ON problems
-    FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+    FOR EACH ROW
+    WHEN (OLD.total_attempts IS NOT DISTINCT FROM NEW.total_attempts
+          AND OLD.correct_attempts IS NOT DISTINCT FROM NEW.correct_attempts)
+    EXECUTE FUNCTION update_updated_at_column();
 
 CREATE TRIGGER update_mistake_collections_updated_at BEFORE UPDATE ON mistake_collections
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
@@ -85,31 +103,243 @@ CREATE TRIGGER update_student_profiles_updated_at BEFORE UPDATE ON student_profi
 CREATE TRIGGER update_system_configs_updated_at BEFORE UPDATE ON system_configs
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
--- 自动更新知识点题目数量
-CREATE OR REPLACE FUNCTION update_knowledge_point_problem_count()
+-- 知识点物化路径：插入、移动（改parent_id）或改编码时计算path/full_path/level
+-- @ddl knowledge_point_path
+CREATE OR REPLACE FUNCTION set_knowledge_point_path()
+RETURNS TRIGGER AS $$
+DECLARE
+    parent_path TEXT;
+    parent_full_path TEXT;
+BEGIN
+    IF NEW.parent_id IS NULL THEN
+        NEW.path := '/' || NEW.id || '/';
+        NEW.full_path := NEW.code;
+    ELSE
+        SELECT path, full_path INTO parent_path, parent_full_path
+        FROM knowledge_points WHERE id = NEW.parent_id;
+        IF parent_path IS NULL THEN
+            RAISE EXCEPTION '父知识点 % 不存在', NEW.parent_id;
+        END IF;
+        IF TG_OP = 'UPDATE' AND left(parent_path, length(OLD.path)) = OLD.path THEN
+            RAISE EXCEPTION '知识点不能移动到自身或其子孙节点下';
+        END IF;
+        NEW.path := parent_path || NEW.id || '/';
+        NEW.full_path := parent_full_path || '.' || NEW.code;
+    END IF;
+    NEW.level := length(NEW.path) - length(replace(NEW.path, '/', '')) - 1;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+-- 路径变化后同步整个子树（子树为path的索引范围扫描；删除由parent_id的级联删除处理）
+CREATE OR REPLACE FUNCTION propagate_knowledge_point_path()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.path IS DISTINCT FROM OLD.path OR NEW.full_path IS DISTINCT FROM OLD.full_path THEN
+        UPDATE knowledge_points
+        SET path = NEW.path || substr(path, length(OLD.path) + 1),
+            full_path = NEW.full_path || substr(full_path, length(OLD.full_path) + 1),
+            level = level + (NEW.level - OLD.level)
+        WHERE path > OLD.path AND path < left(OLD.path, -1) || '0';
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER set_knowledge_point_path BEFORE INSERT OR UPDATE OF parent_id, code ON knowledge_points
+    FOR EACH ROW EXECUTE FUNCTION set_knowledge_point_path();
+
+CREATE TRIGGER propagate_knowledge_point_path AFTER UPDATE OF parent_id, code ON knowledge_points
+    FOR EACH ROW EXECUTE FUNCTION propagate_knowledge_point_path();
+-- @end
+
+-- 知识点题目数量（只统计已发布且未删除的题目）
+-- 写入方只向knowledge_point_count_deltas追加增量：关联表每条语句按知识点聚合一次（转换表），
+-- 题目发布/取消发布/删除时按其关联追加；后台任务调用fold_knowledge_point_counts()按知识点ID顺序合并，
+-- 批量导入之间不再争抢knowledge_points的热点行锁
+-- @ddl knowledge_point_count
+CREATE OR REPLACE FUNCTION record_kp_link_count_delta()
 RETURNS TRIGGER AS $$
 BEGIN
     IF TG_OP = 'INSERT' THEN
-        UPDATE knowledge_points 
-        SET problem_count = problem_count + 1
-        WHERE id = NEW.knowledge_point_id;
+        INSERT INTO knowledge_point_count_deltas (knowledge_point_id, delta)
+        SELECT l.knowledge_point_id, count(*)
+        FROM new_links l JOIN problems p ON p.id = l.problem_id
+        WHERE p.is_published IS TRUE AND p.is_deleted IS NOT TRUE
+        GROUP BY l.knowledge_point_id;
     ELSIF TG_OP = 'DELETE' THEN
-        UPDATE knowledge_points 
-        SET problem_count = problem_count - 1
-        WHERE id = OLD.knowledge_point_id;
+        -- 题目被物理删除时（级联删除关联）这里已看不到题目行，由delete_problem_count_delta处理
+        INSERT INTO knowledge_point_count_deltas (knowledge_point_id, delta)
+        SELECT l.knowledge_point_id, -count(*)
+        FROM old_links l JOIN problems p ON p.id = l.problem_id
+        WHERE p.is_published IS TRUE AND p.is_deleted IS NOT TRUE
+        GROUP BY l.knowledge_point_id;
+    ELSE
+        INSERT INTO knowledge_point_count_deltas (knowledge_point_id, delta)
+        SELECT knowledge_point_id, sum(delta)
+        FROM (
+            SELECT l.knowledge_point_id, 1 AS delta
+            FROM new_links l JOIN problems p ON p.id = l.problem_id
+            WHERE p.is_published IS TRUE AND p.is_deleted IS NOT TRUE
+            UNION ALL
+            SELECT l.knowledge_point_id, -1
+            FROM old_links l JOIN problems p ON p.id = l.problem_id
+            WHERE p.is_published IS TRUE AND p.is_deleted IS NOT TRUE
+        ) changes
+        GROUP BY knowledge_point_id
+        HAVING sum(delta) <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER kp_count_links_insert AFTER INSERT ON problem_knowledge_points
+    REFERENCING NEW TABLE AS new_links
+    FOR EACH STATEMENT EXECUTE FUNCTION record_kp_link_count_delta();
+
+CREATE TRIGGER kp_count_links_delete AFTER DELETE ON problem_knowledge_points
+    REFERENCING OLD TABLE AS old_links
+    FOR EACH STATEMENT EXECUTE FUNCTION record_kp_link_count_delta();
+
+CREATE TRIGGER kp_count_links_update AFTER UPDATE ON problem_knowledge_points
+    REFERENCING OLD TABLE AS old_links NEW TABLE AS new_links
+    FOR EACH STATEMENT EXECUTE FUNCTION record_kp_link_count_delta();
+
+-- 题目可见性变化（发布、取消发布、软删除、恢复）：只在状态真正变化的行上触发
+CREATE OR REPLACE FUNCTION record_problem_visibility_count_delta()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO knowledge_point_count_deltas (knowledge_point_id, delta)
+    SELECT knowledge_point_id,
+           CASE WHEN NEW.is_published IS TRUE AND NEW.is_deleted IS NOT TRUE THEN 1 ELSE -1 END
+    FROM problem_knowledge_points
+    WHERE problem_id = NEW.id;
+    RETURN NULL;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER kp_count_problem_visibility AFTER UPDATE OF is_published, is_deleted ON problems
+    FOR EACH ROW
+    WHEN ((OLD.is_published IS TRUE AND OLD.is_deleted IS NOT TRUE)
+          IS DISTINCT FROM (NEW.is_published IS TRUE AND NEW.is_deleted IS NOT TRUE))
+    EXECUTE FUNCTION record_problem_visibility_count_delta();
+
+-- 物理删除可见题目：在级联删除关联之前按其关联扣减
+CREATE OR REPLACE FUNCTION delete_problem_count_delta()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO knowledge_point_count_deltas (knowledge_point_id, delta)
+    SELECT knowledge_point_id, -1
+    FROM problem_knowledge_points
+    WHERE problem_id = OLD.id;
+    RETURN OLD;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER kp_count_problem_delete BEFORE DELETE ON problems
+    FOR EACH ROW
+    WHEN (OLD.is_published IS TRUE AND OLD.is_deleted IS NOT TRUE)
+    EXECUTE FUNCTION delete_problem_count_delta();
+
+-- 合并增量：取走全部增量，按知识点求和，按ID顺序加锁后更新（多个进程同时合并不会死锁或重复计数）
+CREATE OR REPLACE FUNCTION fold_knowledge_point_counts()
+RETURNS INTEGER AS $$
+DECLARE
+    folded INTEGER;
+BEGIN
+    WITH moved AS (
+        DELETE FROM knowledge_point_count_deltas
+        RETURNING knowledge_point_id, delta
+    ), totals AS (
+        SELECT knowledge_point_id, sum(delta) AS delta
+        FROM moved
+        GROUP BY knowledge_point_id
+        HAVING sum(delta) <> 0
+    ), locked AS (
+        SELECT kp.id, totals.delta
+        FROM knowledge_points kp JOIN totals ON totals.knowledge_point_id = kp.id
+        ORDER BY kp.id
+        FOR UPDATE OF kp
+    )
+    UPDATE knowledge_points kp
+    SET problem_count = kp.problem_count + locked.delta
+    FROM locked
+    WHERE kp.id = locked.id;
+    
+    GET DIAGNOSTICS folded = ROW_COUNT;
+    RETURN folded;
+END;
+$$ language 'plpgsql';
+
+-- 全量重算（初始化数据、修复漂移时使用），同时丢弃已计入的增量
+CREATE OR REPLACE FUNCTION recount_knowledge_point_problems()
+RETURNS INTEGER AS $$
+DECLARE
+    changed INTEGER;
+BEGIN
+    -- 阻塞新的增量写入，并等待已写入增量的事务结束，保证重算结果与清空的增量一致
+    LOCK TABLE knowledge_point_count_deltas IN EXCLUSIVE MODE;
+    DELETE FROM knowledge_point_count_deltas;
+    
+    UPDATE knowledge_points kp
+    SET problem_count = counted.total
+    FROM (
+        SELECT k.id, count(p.id) AS total
+        FROM knowledge_points k
+        LEFT JOIN problem_knowledge_points l ON l.knowledge_point_id = k.id
+        LEFT JOIN problems p ON p.id = l.problem_id
+            AND p.is_published IS TRUE AND p.is_deleted IS NOT TRUE
+        GROUP BY k.id
+    ) counted
+    WHERE kp.id = counted.id AND kp.problem_count IS DISTINCT FROM counted.total;
+    
+    GET DIAGNOSTICS changed = ROW_COUNT;
+    RETURN changed;
+END;
+$$ language 'plpgsql';
+-- @end
+
+-- 题目集合版本号：problems内容列及知识点关联写入后递增（每个事务一次）
+-- 只更新答题计数（total_attempts/correct_attempts）的语句不递增，统计刷新不会使列表ETag失效
+-- 延迟到提交时执行：版本行的行锁只在提交的瞬间持有，并发的导入、编辑事务不会在整个事务期间互相阻塞；
+-- 递增与数据在同一事务中提交，读到新版本号时一定能读到对应的数据
+-- @ddl problem_collection_version
+CREATE OR REPLACE FUNCTION bump_problem_collection_version()
+RETURNS TRIGGER AS $$
+BEGIN
+    -- 延迟触发器逐行排队，事务内只递增一次（事务级设置在事务结束时失效）
+    IF current_setting('olympiad.problems_version_bumped', true) = 'on' THEN
+        RETURN NULL;
     END IF;
+    PERFORM set_config('olympiad.problems_version_bumped', 'on', true);
+    
+    UPDATE collection_versions SET version = version + 1 WHERE name = 'problems';
     RETURN NULL;
 END;
 $$ language 'plpgsql';
 
-CREATE TRIGGER update_kp_count AFTER INSERT OR DELETE ON problem_knowledge_points
-    FOR EACH ROW EXECUTE FUNCTION update_knowledge_point_problem_count();
+CREATE CONSTRAINT TRIGGER bump_problems_version
+    AFTER INSERT OR DELETE OR UPDATE OF
+        title, content, content_type, options, correct_answer, solution, solution_type,
+        difficulty, source_type, source_year, source_detail, estimated_time, success_rate,
+        is_published, is_deleted, reviewed_by, reviewed_at, review_status, created_by
+    ON problems
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_problem_collection_version();
+
+CREATE CONSTRAINT TRIGGER bump_problem_kp_version AFTER INSERT OR UPDATE OR DELETE ON problem_knowledge_points
+    DEFERRABLE INITIALLY DEFERRED
+    FOR EACH ROW EXECUTE FUNCTION bump_problem_collection_version();
+-- @end
 
 -- 自动填充answer_records的知识点数组
+-- 应用写入时已从缓存的题目->知识点映射带上knowledge_point_ids，只有未提供（NULL）的行才执行子查询，
+-- 多行INSERT/COPY批量写入不再逐行查询problem_knowledge_points
+-- @ddl answer_knowledge_points
 CREATE OR REPLACE FUNCTION fill_answer_knowledge_points()
 RETURNS TRIGGER AS $$
 BEGIN
-    SELECT array_agg(knowledge_point_id)
+    SELECT COALESCE(array_agg(knowledge_point_id ORDER BY knowledge_point_id), '{}')
     INTO NEW.knowledge_point_ids
     FROM problem_knowledge_points
     WHERE problem_id = NEW.problem_id;
@@ -119,4 +349,7 @@ END;
 $$ language 'plpgsql';
 
 CREATE TRIGGER fill_knowledge_points BEFORE INSERT ON answer_records
-    FOR EACH ROW EXECUTE FUNCTION fill_answer_knowledge_points();
+    FOR EACH ROW
+    WHEN (NEW.knowledge_point_ids IS NULL)
+    EXECUTE FUNCTION fill_answer_knowledge_points();
+-- @end
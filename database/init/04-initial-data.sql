@@ -116,13 +116,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 
@@ -302,13 +297,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 
@@ -488,13 +478,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 
@@ -674,13 +659,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 
@@ -860,13 +840,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 
@@ -1046,13 +1021,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 
@@ -1232,13 +1202,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 
@@ -1418,13 +1383,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 
@@ -1604,13 +1564,8 @@ INSERT INTO problem_knowledge_points (problem_id, knowledge_point_id, is_primary
 INSERT INTO student_profiles (user_id) 
 SELECT id FROM users WHERE username = 'demo_student';
 
--- 更新知识点题目计数
-UPDATE knowledge_points kp
-SET problem_count = (
-    SELECT COUNT(DISTINCT problem_id)
-    FROM problem_knowledge_points pkp
-    WHERE pkp.knowledge_point_id = kp.id
-);
+-- 更新知识点题目计数（只统计已发布且未删除的题目）
+SELECT recount_knowledge_point_problems();
 
 -- 创建初始练习会话
 INSERT INTO practice_sessions (user_id, session_type, config, status, total_questions, completed_questions, started_at) 